@@ -2,83 +2,183 @@
 Servidor Flask para ejecutar la API localmente.
 Ejecutar con: python app.py
 """
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
+import itertools
+import json
+import math
 import sys
 import os
+import time
 
 # Añadir path para imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
+from models.batch import MAX_BATCH_OPERATIONS, run_batch
+from models.centrality import DEFAULT_PIVOTS, METRICS
 from models.graph import FlightGraph
-from utils.helpers import load_json_file, get_data_path
+from models.kpaths import MAX_K
+from models.longest import DEFAULT_TIME_BUDGET
+from models.matrix import MAX_MATRIX_AIRPORTS, parse_codes
+from models.paths import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor
+from models.planner import QueryPlanner
+from models.reach import MAX_STOPS
+from models.routing import ALGORITHMS
+from models.snapshot import write_snapshot
+from models.spatial import valid_coordinates
+from utils.datasource import get_data_source
+from utils.metrics import GRAPH_LOAD, REQUEST_DURATION, render_prometheus, update_graph_gauges
+from utils.profiler import PROFILE_HEADER, SamplingProfiler, profiling_requested
+from utils.rendered import rendered
+from utils.helpers import get_data_path, data_checksum
 
 app = Flask(__name__, static_folder='frontend')
 CORS(app)  # Permitir peticiones desde el frontend
 
-# Inicializar el grafo
-graph = FlightGraph()
+# Inicializar el grafo (GRAPH_BACKEND=csr activa la vista compacta)
+graph = FlightGraph(backend=os.environ.get('GRAPH_BACKEND', 'networkx'))
+
+# Control de admisión de las consultas caras (QUERY_BUDGET_MS, QUERY_POLICY)
+planner = QueryPlanner.from_env()
+
+# Datos locales o S3 (DATA_BUCKET) revalidados por ETag
+data_source = get_data_source()
 
 def init_graph():
     """Inicializa el grafo con los datos."""
-    airports = load_json_file(get_data_path('airports.json'))
-    flights = load_json_file(get_data_path('flights.json'))
-    graph.load_data(airports, flights)
+    airports_path = data_source.path('airports.json')
+    flights_path = data_source.path('flights.json')
+    start = time.perf_counter()
+    checksum = data_checksum([airports_path, flights_path])
+    graph.clear()
+    # Snapshot binario (scripts/build_snapshot.py o caché en /tmp) si no está obsoleto
+    source = 'snapshot'
+    snapshot_path = data_source.snapshot_path()
+    if snapshot_path is None or not graph.load_snapshot(snapshot_path, checksum):
+        source = 'json'
+        report = graph.load_stream(airports_path, flights_path)
+        print(json.dumps({'ingest': report.as_dict()}), file=sys.stderr)
+        if data_source.cache_snapshot:
+            write_snapshot(graph, snapshot_path, checksum)
+    # Oráculo precalculado (scripts/build_oracle.py); se ignora si está obsoleto
+    graph.load_oracle(get_data_path('oracle.bin'), checksum)
+    GRAPH_LOAD.observe(time.perf_counter() - start, source=source)
 
 # Inicializar al arrancar
+data_source.sync()
 init_graph()
 
 
+@app.before_request
+def start_timer():
+    g.start = time.perf_counter()
+    g.profiler = None
+    # Profiler de muestreo solo para peticiones con el token de PROFILE_TOKEN
+    if profiling_requested(request.headers.get(PROFILE_HEADER)):
+        g.profiler = SamplingProfiler().__enter__()
+
+
+@app.after_request
+def record_request(response):
+    """Latencia por ruta (patrón de la regla, no la URL) hasta enviar las cabeceras."""
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    REQUEST_DURATION.observe(time.perf_counter() - g.start, route=route, method=request.method,
+                             status=response.status_code)
+    return response
+
+
+@app.teardown_request
+def stop_profiler(error=None):
+    """Se ejecuta también si la vista lanza una excepción: el hilo de muestreo siempre se detiene."""
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.__exit__(None, None, None)
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        print(json.dumps({'profile': profiler.report(), 'route': route, 'method': request.method}),
+              file=sys.stderr)
+
+
 # Servir frontend
 @app.route('/')
 def index():
     return send_from_directory('frontend', 'index.html')
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    update_graph_gauges(graph)
+    return Response(render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+
 # API Endpoints
+def rendered_response(name, build):
+    """Cuerpo pre-serializado por versión del grafo, con ETag fuerte y 304."""
+    cached_body = rendered(graph, name, build)
+    body, etag, encoding = cached_body.select(request.headers.get('Accept-Encoding'))
+    headers = {'ETag': etag, 'Vary': 'Accept-Encoding'}
+    if cached_body.not_modified(request.headers.get('If-None-Match')):
+        return Response(status=304, headers=headers)
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+    return Response(body, mimetype='application/json', headers=headers)
+
+
 @app.route('/airports', methods=['GET'])
 def get_airports():
-    return jsonify({'airports': graph.get_all_airports()})
+    return rendered_response('airports', lambda: {'airports': graph.get_all_airports()})
 
 
 @app.route('/stats', methods=['GET'])
 def get_stats():
-    return jsonify(graph.get_graph_stats())
+    return rendered_response('stats', graph.get_graph_stats)
 
 
 @app.route('/shortest-path', methods=['GET'])
 def shortest_path():
     origin = request.args.get('origin', '').upper()
     destination = request.args.get('destination', '').upper()
+    algorithm = request.args.get('algorithm')
     
     if not origin or not destination:
         return jsonify({'error': 'origin and destination required'}), 400
     
-    path = graph.shortest_path(origin, destination)
-    distance = graph.shortest_path_distance(origin, destination)
+    if algorithm is not None and algorithm not in ALGORITHMS:
+        return jsonify({'error': f'algorithm must be one of {", ".join(ALGORITHMS)}'}), 400
+    
+    # Una sola búsqueda devuelve camino y distancia
+    route = graph.route(origin, destination, algorithm)
     
-    if path is None:
+    if route is None:
         return jsonify({'error': 'No path found'}), 404
     
     return jsonify({
         'origin': origin,
         'destination': destination,
-        'path': path,
-        'distance': distance,
-        'stops': len(path) - 2
+        'path': route['path'],
+        'distance': route['distance'],
+        'stops': route['stops']
     })
 
 
-@app.route('/all-paths', methods=['GET'])
-def all_paths():
+@app.route('/k-shortest-paths', methods=['GET'])
+def k_shortest_paths():
     origin = request.args.get('origin', '').upper()
     destination = request.args.get('destination', '').upper()
-    max_length = int(request.args.get('max_length', 5))
+    try:
+        k = int(request.args.get('k', 3))
+    except ValueError:
+        k = 0
     
     if not origin or not destination:
         return jsonify({'error': 'origin and destination required'}), 400
     
-    paths = graph.all_paths(origin, destination, max_length)
+    if not 1 <= k <= MAX_K:
+        return jsonify({'error': f'k must be between 1 and {MAX_K}'}), 400
+    
+    paths = graph.k_shortest_paths(origin, destination, k)
+    
+    if not paths:
+        return jsonify({'error': 'No path found'}), 404
     
     return jsonify({
         'origin': origin,
@@ -88,6 +188,96 @@ def all_paths():
     })
 
 
+def over_budget(plan):
+    """422 para una consulta rechazada por el planificador (con lo que cabría, si se puede rebajar)."""
+    return jsonify({'error': 'Query exceeds the compute budget', 'plan': plan.as_dict()}), 422
+
+
+@app.route('/distance-matrix', methods=['GET', 'POST'])
+def distance_matrix():
+    params = (request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    if not isinstance(params, dict):
+        return jsonify({'error': 'Invalid JSON body'}), 400
+    origins = parse_codes(params.get('origins'))
+    destinations = parse_codes(params.get('destinations'))
+    predecessors = str(params.get('predecessors', 'false')).lower() in ('1', 'true')
+    
+    if origins is None or destinations is None:
+        return jsonify({'error': 'origins and destinations required'}), 400
+    
+    if max(len(set(origins)), len(set(destinations))) > MAX_MATRIX_AIRPORTS:
+        return jsonify({'error': f'at most {MAX_MATRIX_AIRPORTS} origins and destinations'}), 400
+    
+    # Una búsqueda por origen distinto (o por destino si no hacen falta predecesores)
+    searches = len(set(origins)) if predecessors else min(len(set(origins)), len(set(destinations)))
+    plan = planner.plan_matrix(graph.csr, searches)
+    if plan.rejected:
+        return over_budget(plan)
+    
+    try:
+        matrix = graph.distance_matrix(origins, destinations, predecessors)
+    except ValueError as error:
+        return jsonify({'error': str(error)}), 404
+    
+    return jsonify(matrix)
+
+
+@app.route('/all-paths', methods=['GET'])
+def all_paths():
+    origin = request.args.get('origin', '').upper()
+    destination = request.args.get('destination', '').upper()
+    max_length = int(request.args.get('max_length', 5))
+    cursor = request.args.get('cursor')
+    stream = request.args.get('format') == 'ndjson' or 'application/x-ndjson' in request.headers.get('Accept', '')
+    
+    if not origin or not destination:
+        return jsonify({'error': 'origin and destination required'}), 400
+    
+    # En modo streaming sin limit se envían todos los caminos según se encuentran
+    limit = request.args.get('limit', None if stream else DEFAULT_PAGE_SIZE)
+    if limit is not None:
+        limit = int(limit)
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            return jsonify({'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+    
+    plan = planner.plan_paths(graph.csr, origin, max_length)
+    if plan.rejected:
+        return over_budget(plan)
+    max_length = plan.used('max_length', max_length)
+    
+    if stream:
+        try:
+            enumerator = graph.iter_paths(origin, destination, max_length, cursor, planner.budget_for())
+        except InvalidCursor as e:
+            return jsonify({'error': str(e)}), 400
+        
+        def generate():
+            for found in itertools.islice(enumerator, limit):
+                yield json.dumps({'path': found}) + '\n'
+            # Al agotar el presupuesto se cierra con el cursor aunque no se pidiera limit
+            if limit is not None or enumerator.truncated:
+                yield json.dumps({'next_cursor': enumerator.cursor(), 'truncated': enumerator.truncated}) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    try:
+        page = graph.paths_page(origin, destination, max_length, limit, cursor, planner.budget, planner.max_expansions)
+    except InvalidCursor as e:
+        return jsonify({'error': str(e)}), 400
+    
+    body = {
+        'origin': origin,
+        'destination': destination,
+        'total_paths': len(page['paths']),
+        'paths': page['paths'],
+        'next_cursor': page['next_cursor'],
+        'truncated': page['truncated']
+    }
+    if plan.changes:
+        body['plan'] = plan.as_dict()
+    return jsonify(body)
+
+
 @app.route('/hubs', methods=['GET'])
 def get_hubs():
     top_n = int(request.args.get('top', 5))
@@ -96,7 +286,7 @@ def get_hubs():
 
 @app.route('/isolated', methods=['GET'])
 def get_isolated():
-    return jsonify({'isolated_airports': graph.get_isolated_nodes()})
+    return rendered_response('isolated', lambda: {'isolated_airports': graph.get_isolated_nodes()})
 
 
 @app.route('/connections', methods=['GET'])
@@ -131,41 +321,209 @@ def get_by_degree():
     })
 
 
-@app.route('/clusters', methods=['GET'])
-def get_clusters():
-    clusters = graph.get_clusters()
+@app.route('/reachable', methods=['GET'])
+def reachable():
+    origin = request.args.get('origin', '').upper()
+    try:
+        max_stops = int(request.args.get('max_stops', 1))
+    except ValueError:
+        max_stops = -1
+    
+    if not origin:
+        return jsonify({'error': 'origin required'}), 400
+    
+    if not 0 <= max_stops <= MAX_STOPS:
+        return jsonify({'error': f'max_stops must be between 0 and {MAX_STOPS}'}), 400
+    
+    airports = graph.reachable_within((origin,), max_stops)[origin]
+    
+    if airports is None:
+        return jsonify({'error': 'Airport not found'}), 404
+    
     return jsonify({
-        'total_clusters': len(clusters),
-        'clusters': clusters
+        'origin': origin,
+        'max_stops': max_stops,
+        'airports': airports,
+        'total': len(airports)
     })
 
 
+@app.route('/nearby', methods=['GET'])
+def nearby():
+    try:
+        lat = float(request.args['lat'])
+        lon = float(request.args['lon'])
+        radius_km = float(request.args.get('radius_km', 100))
+    except (KeyError, ValueError):
+        return jsonify({'error': 'lat and lon required'}), 400
+    try:
+        limit = int(request.args['limit']) if 'limit' in request.args else None
+    except ValueError:
+        limit = 0
+    
+    if not valid_coordinates(lat, lon) or not radius_km > 0:
+        return jsonify({'error': 'lat/lon out of range or radius_km not positive'}), 400
+    
+    if limit is not None and limit < 1:
+        return jsonify({'error': 'limit must be a positive integer'}), 400
+    
+    airports = graph.nearby(lat, lon, radius_km, limit)
+    
+    return jsonify({
+        'lat': lat,
+        'lon': lon,
+        'radius_km': radius_km,
+        'airports': airports,
+        'total': len(airports)
+    })
+
+
+@app.route('/centrality', methods=['GET'])
+def centrality():
+    metric = request.args.get('metric', 'betweenness')
+    k = request.args.get('k', DEFAULT_PIVOTS, type=int)
+    top = request.args.get('top', 10, type=int)
+    weighted = request.args.get('weighted', 'false').lower() in ('1', 'true')
+    seed = request.args.get('seed', 0, type=int)
+    
+    if metric not in METRICS:
+        return jsonify({'error': f'metric must be one of {", ".join(METRICS)}'}), 400
+    
+    if k < 1 or top < 1:
+        return jsonify({'error': 'k and top must be positive'}), 400
+    
+    plan = planner.plan_centrality(graph.csr, k, weighted)
+    if plan.rejected:
+        return over_budget(plan)
+    
+    body = graph.centrality(metric, plan.used('k', k), top, weighted, seed)
+    if plan.changes:
+        body = dict(body, plan=plan.as_dict())
+    return jsonify(body)
+
+
+@app.route('/components', methods=['GET'])
+def get_components():
+    airport = request.args.get('airport', '').upper()
+    
+    if airport:
+        size = graph.component_size(airport)
+        if size is None:
+            return jsonify({'error': 'Airport not found'}), 404
+        return jsonify({'airport': airport, 'component_size': size})
+    
+    return rendered_response('components', graph.get_components)
+
+
+@app.route('/clusters', methods=['GET'])
+def get_clusters():
+    def clusters_body():
+        clusters = graph.get_clusters()
+        return {'total_clusters': len(clusters), 'clusters': clusters}
+    return rendered_response('clusters', clusters_body)
+
+
 @app.route('/longest-path', methods=['GET'])
 def longest_path():
     origin = request.args.get('origin', '').upper()
     destination = request.args.get('destination', '').upper()
+    weighted = request.args.get('weighted', 'false').lower() in ('1', 'true')
+    try:
+        time_budget = float(request.args.get('time_budget_ms', DEFAULT_TIME_BUDGET * 1000)) / 1000
+        expansions = request.args.get('max_expansions')
+        node_budget = int(expansions) if expansions is not None else None
+    except ValueError:
+        time_budget, node_budget = math.nan, None
     
     if not origin or not destination:
         return jsonify({'error': 'origin and destination required'}), 400
     
-    path = graph.longest_path(origin, destination)
+    # 0, negativos, nan o inf darían un resultado "aproximado" al instante o una búsqueda sin límite
+    if not math.isfinite(time_budget) or time_budget <= 0 or (node_budget is not None and node_budget < 1):
+        return jsonify({'error': 'time_budget_ms and max_expansions must be positive numbers'}), 400
+    
+    plan = planner.plan_longest(time_budget)
+    if plan.rejected:
+        return over_budget(plan)
+    
+    time_budget = plan.used('time_budget_ms', time_budget * 1000) / 1000
+    result = graph.longest_path_search(
+        origin, destination, weighted, time_budget, node_budget
+    )
     
-    if path is None:
+    if result is None:
         return jsonify({'error': 'No path found'}), 404
     
-    return jsonify({
+    # approximate: la búsqueda agotó su presupuesto y devuelve el mejor camino encontrado
+    body = {
         'origin': origin,
         'destination': destination,
-        'path': path,
-        'length': len(path)
-    })
+        'path': result['path'],
+        'length': len(result['path']),
+        'distance': result['distance'],
+        'approximate': result['approximate']
+    }
+    if plan.changes:
+        body['plan'] = plan.as_dict()
+    return jsonify(body)
+
+
+@app.route('/batch', methods=['POST'])
+def batch():
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({'error': 'Invalid JSON body'}), 400
+    operations = body.get('operations')
+    
+    if not isinstance(operations, list):
+        return jsonify({'error': 'operations list required'}), 400
+    
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'error': f'at most {MAX_BATCH_OPERATIONS} operations per batch'}), 400
+    
+    return jsonify({'results': run_batch(graph, operations)})
+
+
+@app.route('/flights', methods=['POST', 'PATCH', 'DELETE'])
+def flights():
+    body = request.get_json(silent=True) or {}
+    if not isinstance(body, dict):
+        return jsonify({'error': 'Invalid JSON body'}), 400
+    origin = body.get('origin') or request.args.get('origin')
+    destination = body.get('destination') or request.args.get('destination')
+    distance = body.get('distance')
+    
+    if not isinstance(origin, str) or not isinstance(destination, str):
+        return jsonify({'error': 'origin and destination required'}), 400
+    origin, destination = origin.upper(), destination.upper()
+    
+    if request.method != 'DELETE' and (isinstance(distance, bool) or not isinstance(distance, (int, float))
+                                       or not (math.isfinite(distance) and distance >= 0)):
+        return jsonify({'error': 'distance must be a non-negative number'}), 400
+    
+    if request.method == 'POST':
+        if not graph.has_airport(origin) or not graph.has_airport(destination):
+            return jsonify({'error': 'Airport not found'}), 404
+        if graph.has_flight(origin, destination):
+            return jsonify({'error': 'Flight already exists'}), 409
+        graph.add_flight(origin, destination, distance)
+        return jsonify({'origin': origin, 'destination': destination, 'distance': distance}), 201
+    
+    if request.method == 'PATCH':
+        if not graph.update_flight(origin, destination, distance):
+            return jsonify({'error': 'Flight not found'}), 404
+        return jsonify({'origin': origin, 'destination': destination, 'distance': distance})
+    
+    if not graph.remove_flight(origin, destination):
+        return jsonify({'error': 'Flight not found'}), 404
+    return jsonify({'origin': origin, 'destination': destination, 'deleted': True})
 
 
 if __name__ == '__main__':
     print("=" * 50)
     print("🚀 Flight Network Graph API")
     print("=" * 50)
-    print(f"📊 Grafo cargado: {graph.graph.number_of_nodes()} aeropuertos, {graph.graph.number_of_edges()} vuelos")
+    print(f"📊 Grafo cargado: {graph.number_of_airports()} aeropuertos, {graph.number_of_flights()} vuelos")
     print(f"🌐 API: http://localhost:5000")
     print(f"🖥️  Frontend: http://localhost:5000")
     print("=" * 50)
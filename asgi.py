@@ -0,0 +1,136 @@
+"""
+Servidor ASGI asíncrono sobre el mismo FlightGraph que la Lambda.
+Las consultas baratas (búsquedas O(1)/O(grado), rutas, respuestas
+pre-serializadas) se responden en el propio bucle; /clusters, /longest-path,
+/all-paths, /centrality y /distance-matrix se ejecutan en un pool acotado de
+procesos con tiempo máximo por petición, así que no bloquean a las demás.
+Ejecutar con: uvicorn asgi:app --port 8000
+"""
+import asyncio
+import base64
+import os
+import sys
+import time
+from urllib.parse import parse_qsl
+
+# Añadir path para imports
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from lambdas.graph_operations import ROUTES, graph, handle, init_graph
+from utils.helpers import format_response
+from utils.metrics import REQUEST_DURATION, render_prometheus, update_graph_gauges
+from utils.workers import PoolSaturated, PoolTimeout, WorkerPool
+
+# Endpoints que pueden tardar segundos: van al pool de procesos
+HEAVY_ROUTES = frozenset(('/clusters', '/longest-path', '/all-paths', '/centrality', '/distance-matrix'))
+DEFAULT_TIMEOUT = float(os.environ.get('ASYNC_TIMEOUT_SECONDS', 30))
+MAX_TIMEOUT = float(os.environ.get('ASYNC_MAX_TIMEOUT_SECONDS', 120))
+
+pool = WorkerPool(
+    handle,
+    size=int(os.environ.get('ASYNC_WORKERS', 0)) or None,
+    max_pending=int(os.environ.get('ASYNC_MAX_PENDING', 16)),
+    version=lambda: graph.version,
+    init=init_graph
+)
+
+
+def request_timeout(query_params):
+    """Tiempo máximo de la petición: timeout_ms (acotado por ASYNC_MAX_TIMEOUT_SECONDS) o el de por defecto."""
+    try:
+        timeout = float(query_params['timeout_ms']) / 1000
+    except (KeyError, ValueError):
+        return DEFAULT_TIMEOUT
+    return min(max(timeout, 0.001), MAX_TIMEOUT)
+
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def run_heavy(event, receive):
+    """Ejecuta la petición en el pool; si el cliente se desconecta antes, se cancela."""
+    task = asyncio.ensure_future(pool.run(event, request_timeout(event['queryStringParameters'])))
+    watcher = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+    if not task.done():
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return None
+    try:
+        return task.result()
+    except PoolTimeout:
+        return format_response(504, {'error': 'Request timed out'})
+    except PoolSaturated:
+        return format_response(503, {'error': 'Server busy, try again later'})
+
+
+async def send_response(send, response):
+    headers = [(key.lower().encode('latin-1'), str(value).encode('latin-1'))
+               for key, value in (response.get('headers') or {}).items()]
+    body = response.get('body') or ''
+    body = base64.b64decode(body) if response.get('isBase64Encoded') else body.encode('utf-8')
+    await send({'type': 'http.response.start', 'status': response['statusCode'], 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await pool.start()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await pool.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """Aplicación ASGI: traduce la petición HTTP al evento de API Gateway que espera handle()."""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+    start = time.perf_counter()
+    path, method = scope['path'], scope['method']
+    if path == '/metrics' and method == 'GET':
+        update_graph_gauges(graph)
+        return await send_response(send, {'statusCode': 200, 'body': render_prometheus(),
+                                          'headers': {'Content-Type': 'text/plain; version=0.0.4'}})
+    body = await read_body(receive)
+    if body is None:
+        return
+    event = {
+        'path': path,
+        'httpMethod': method,
+        'queryStringParameters': dict(parse_qsl(scope.get('query_string', b'').decode('latin-1'))),
+        'headers': {key.decode('latin-1'): value.decode('latin-1') for key, value in scope.get('headers', [])},
+        'body': body.decode('utf-8') if body else None
+    }
+    # Solo consultas: las mutaciones (/flights) nunca están en HEAVY_ROUTES
+    if path in HEAVY_ROUTES and method in ('GET', 'POST'):
+        response = await run_heavy(event, receive)
+        if response is None:
+            # Cliente desconectado: el worker ya se ha terminado, no hay a quién responder
+            return
+    else:
+        response = handle(event)
+    REQUEST_DURATION.observe(time.perf_counter() - start, route=path if path in ROUTES else 'unmatched',
+                             method=method, status=response['statusCode'])
+    await send_response(send, response)
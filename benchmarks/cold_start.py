@@ -0,0 +1,94 @@
+"""
+Compara el arranque en frío cargando desde JSON y desde el snapshot binario.
+Cada medición se hace en un intérprete nuevo (como un contenedor Lambda frío).
+Ejecutar con: python benchmarks/cold_start.py [--airports 10000 --flights 70000]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SRC = os.path.join(ROOT, 'src')
+
+sys.path.insert(0, SRC)
+
+from models.graph import FlightGraph
+from models.snapshot import write_snapshot
+from utils.helpers import load_json_file, data_checksum
+
+JSON_LOAD = '''
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {src!r})
+from models.graph import FlightGraph
+from utils.helpers import load_json_file
+graph = FlightGraph()
+graph.load_data(load_json_file({airports!r}), load_json_file({flights!r}))
+print(time.perf_counter() - start)
+'''
+
+SNAPSHOT_LOAD = '''
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {src!r})
+from models.graph import FlightGraph
+graph = FlightGraph()
+assert graph.load_snapshot({snapshot!r})
+print(time.perf_counter() - start)
+'''
+
+
+def generate_dataset(directory, n_airports, n_flights, seed=42):
+    """Escribe un conjunto de datos aleatorio (airports.json, flights.json)."""
+    rng = random.Random(seed)
+    codes = [f"A{i:05d}" for i in range(n_airports)]
+    airports = [{"code": c, "name": f"Airport {c}", "city": f"City {c}", "country": "XX"} for c in codes]
+    flights = [
+        {"origin": rng.choice(codes), "destination": rng.choice(codes), "distance": rng.randint(100, 9000)}
+        for _ in range(n_flights)
+    ]
+    paths = []
+    for name, data in (("airports.json", airports), ("flights.json", flights)):
+        path = os.path.join(directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        paths.append(path)
+    return paths
+
+
+def measure(code, repeat):
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+        times.append(float(output.stdout.strip()))
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--airports', type=int, default=10000)
+    parser.add_argument('--flights', type=int, default=70000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        airports_path, flights_path = generate_dataset(directory, args.airports, args.flights)
+        snapshot_path = os.path.join(directory, 'graph.snapshot')
+        graph = FlightGraph()
+        graph.load_data(load_json_file(airports_path), load_json_file(flights_path))
+        write_snapshot(graph, snapshot_path, data_checksum([airports_path, flights_path]))
+
+        json_time = measure(JSON_LOAD.format(src=SRC, airports=airports_path, flights=flights_path), args.repeat)
+        snapshot_time = measure(SNAPSHOT_LOAD.format(src=SRC, snapshot=snapshot_path), args.repeat)
+
+    print(f"Dataset: {args.airports} aeropuertos, {args.flights} vuelos")
+    print(f"JSON:     {json_time * 1000:8.1f} ms")
+    print(f"Snapshot: {snapshot_time * 1000:8.1f} ms  (x{json_time / snapshot_time:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Generador determinista de redes de vuelos sintéticas con estructura hub-and-spoke.
+Cada aeropuerto nuevo se conecta a aeropuertos existentes elegidos con
+probabilidad proporcional a su grado (enlace preferencial), así que aparecen
+pocos hubs muy conectados y muchos aeropuertos regionales con 1-2 rutas, como
+en las redes reales. Las distancias salen de coordenadas aleatorias (haversine).
+"""
+import json
+import math
+import os
+import random
+from typing import Dict, List, Tuple
+
+# Rutas por aeropuerto nuevo: mayoría regionales, algunos con muchas
+ROUTES_PER_AIRPORT = (1, 1, 1, 2, 2, 3, 4, 8)
+ISOLATED_FRACTION = 0.005
+EARTH_RADIUS_KM = 6371.0
+
+
+def haversine(a: Tuple[float, float], b: Tuple[float, float]) -> int:
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return max(1, round(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(h))))
+
+
+def generate_network(n_airports: int, seed: int = 42) -> Tuple[List[Dict], List[Dict]]:
+    """Devuelve (airports, flights) con el formato de data/*.json."""
+    rng = random.Random(seed)
+    codes = [f"A{i:05d}" for i in range(n_airports)]
+    coordinates = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in codes]
+    airports = [
+        {"code": code, "name": f"Airport {code}", "city": f"City {code}", "country": f"C{i % 200:03d}",
+         "lat": round(lat, 4), "lon": round(lon, 4)}
+        for i, (code, (lat, lon)) in enumerate(zip(codes, coordinates))
+    ]
+    n_isolated = int(n_airports * ISOLATED_FRACTION)
+    connected = n_airports - n_isolated
+    flights: List[Dict] = []
+    seen = set()
+    # Cada extremo de ruta aparece una vez por conexión: elegir de aquí es elegir por grado
+    endpoints: List[int] = []
+    core = min(connected, 4)
+    for i in range(core):
+        for j in range(i):
+            seen.add((j, i))
+            endpoints += [i, j]
+            flights.append({"origin": codes[i], "destination": codes[j],
+                            "distance": haversine(coordinates[i], coordinates[j])})
+    for i in range(core, connected):
+        for _ in range(min(i, rng.choice(ROUTES_PER_AIRPORT))):
+            j = rng.choice(endpoints)
+            pair = (min(i, j), max(i, j))
+            if j == i or pair in seen:
+                continue
+            seen.add(pair)
+            endpoints += [i, j]
+            flights.append({"origin": codes[i], "destination": codes[j],
+                            "distance": haversine(coordinates[i], coordinates[j])})
+    return airports, flights
+
+
+def write_dataset(directory: str, airports: List[Dict], flights: List[Dict]) -> Tuple[str, str]:
+    """Escribe airports.json y flights.json en directory y devuelve sus rutas."""
+    paths = []
+    for name, data in (("airports.json", airports), ("flights.json", flights)):
+        path = os.path.join(directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        paths.append(path)
+    return paths[0], paths[1]
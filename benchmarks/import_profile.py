@@ -0,0 +1,79 @@
+"""
+Perfil de importación del handler Lambda (equivalente a `python -X importtime`).
+Muestra los módulos más costosos, falla si se importa algún módulo prohibido
+en el arranque (p. ej. networkx) y compara con una línea base guardada.
+Ejecutar con: python benchmarks/import_profile.py [--save] [--check]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SRC = os.path.join(ROOT, 'src')
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'import_profile.json')
+
+# Módulos pesados que no deben cargarse en la fase de init de la Lambda
+FORBIDDEN = ('networkx', 'scipy', 'pandas', 'matplotlib')
+LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def profile(module='lambdas.graph_operations'):
+    """Ejecuta un intérprete nuevo con -X importtime y devuelve {módulo: (self_us, cumulative_us)}."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=SRC, capture_output=True, text=True, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--save', action='store_true', help='guarda el perfil como línea base')
+    parser.add_argument('--check', action='store_true', help='falla si hay regresiones')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='regresión relativa permitida')
+    args = parser.parse_args()
+
+    modules = profile()
+    total = modules['lambdas.graph_operations'][1]
+    print(f"{'módulo':<45} {'self ms':>9} {'acum. ms':>9}")
+    for name, (own, cumulative) in sorted(modules.items(), key=lambda item: -item[1][1])[:args.top]:
+        print(f"{name:<45} {own / 1000:9.1f} {cumulative / 1000:9.1f}")
+
+    failures = [f"módulo prohibido importado en init: {name}" for name in modules
+                if name.split('.')[0] in FORBIDDEN]
+    if os.path.exists(BASELINE) and not args.save:
+        with open(BASELINE, encoding='utf-8') as f:
+            baseline = json.load(f)
+        limit = baseline['total_us'] * (1 + args.tolerance)
+        print(f"\nTotal: {total / 1000:.1f} ms (línea base {baseline['total_us'] / 1000:.1f} ms)")
+        if total > limit:
+            failures.append(f"import total {total / 1000:.1f} ms > {limit / 1000:.1f} ms")
+        new = sorted(set(name.split('.')[0] for name in modules) - set(baseline['packages']))
+        if new:
+            print(f"Paquetes nuevos respecto a la línea base: {', '.join(new)}")
+    if args.save:
+        os.makedirs(os.path.dirname(BASELINE), exist_ok=True)
+        with open(BASELINE, 'w', encoding='utf-8') as f:
+            json.dump({
+                'total_us': total,
+                'packages': sorted(set(name.split('.')[0] for name in modules))
+            }, f, indent=2)
+        print(f"\nLínea base guardada en {BASELINE}")
+
+    for failure in failures:
+        print(f"REGRESIÓN: {failure}")
+    if args.check and failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
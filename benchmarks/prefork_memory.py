@@ -0,0 +1,115 @@
+"""
+Memoria por worker de serve.py (pre-fork) sobre una red sintética.
+Arranca el lanzador con N workers, reparte peticiones entre ellos y lee
+/proc/<pid>/smaps_rollup: Private_Dirty es lo que cada worker no comparte con
+el padre (lo que cuesta un worker adicional). Solo Linux.
+Ejecutar con: python benchmarks/prefork_memory.py [--airports 50000 --workers 4] [--snapshot] [--no-freeze]
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SRC = os.path.join(ROOT, 'src')
+
+sys.path.insert(0, SRC)
+
+from generator import generate_network, write_dataset
+from models.graph import FlightGraph
+from models.snapshot import write_snapshot
+from utils.helpers import SNAPSHOT_FILE, data_checksum
+
+
+def smaps(pid):
+    """Rss, Pss y Private_Dirty de un proceso en MB."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup', encoding='utf-8') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss', 'Private_Dirty'):
+                values[key] = int(rest.split()[0]) / 1024
+    return values
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children', encoding='utf-8') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--airports', type=int, default=50000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--snapshot', action='store_true', help='el padre carga un snapshot en vez de los JSON')
+    parser.add_argument('--no-freeze', action='store_true')
+    args = parser.parse_args()
+
+    airports, flights = generate_network(args.airports)
+    rng = random.Random(1)
+    codes = [airport['code'] for airport in airports]
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_dataset(directory, airports, flights)
+        if args.snapshot:
+            graph = FlightGraph()
+            graph.load_stream(*paths)
+            write_snapshot(graph, os.path.join(directory, SNAPSHOT_FILE), data_checksum(list(paths)))
+            del graph
+        port = free_port()
+        command = [sys.executable, os.path.join(ROOT, 'serve.py'), '--workers', str(args.workers),
+                   '--port', str(port)] + (['--no-freeze'] if args.no_freeze else [])
+        server = subprocess.Popen(command, env=dict(os.environ, DATA_DIR=directory),
+                                  stderr=subprocess.DEVNULL, cwd=ROOT)
+        try:
+            base = f'http://127.0.0.1:{port}'
+            for _ in range(600):
+                try:
+                    urllib.request.urlopen(f'{base}/hubs').read()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            idle = {pid: smaps(pid) for pid in children(server.pid)}
+            urls = ['/stats', '/hubs?top=20', '/isolated', '/by-degree?degree=1']
+            for i in range(args.requests):
+                origin, destination = rng.sample(codes, 2)
+                urls.append(f'/shortest-path?origin={origin}&destination={destination}')
+                urls.append(f'/connections?airport={origin}')
+            for url in urls:
+                try:
+                    urllib.request.urlopen(base + url).read()
+                except urllib.error.HTTPError:
+                    pass  # 404 si no hay ruta entre componentes distintas
+            busy = {pid: smaps(pid) for pid in children(server.pid)}
+            parent = smaps(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"{args.airports} aeropuertos, {args.workers} workers, carga desde "
+          f"{'snapshot' if args.snapshot else 'JSON'}, gc.freeze={'no' if args.no_freeze else 'sí'}")
+    print(f"padre: RSS {parent['Rss']:.1f} MB")
+    for pid in busy:
+        print(f"worker {pid}: RSS {busy[pid]['Rss']:.1f} MB  PSS {busy[pid]['Pss']:.1f} MB  "
+              f"privada {idle[pid]['Private_Dirty']:.1f} -> {busy[pid]['Private_Dirty']:.1f} MB")
+    print(json.dumps({
+        'parent_rss_mb': round(parent['Rss'], 1),
+        'worker_private_mb': [round(values['Private_Dirty'], 1) for values in busy.values()]
+    }))
+
+
+if __name__ == '__main__':
+    main()
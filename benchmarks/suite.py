@@ -0,0 +1,345 @@
+"""
+Benchmark de todas las operaciones de FlightGraph y de las rutas del handler
+Lambda sobre redes sintéticas hub-and-spoke (benchmarks/generator.py) de
+varios tamaños, más arranque en frío y memoria pico en un intérprete nuevo.
+Los resultados se escriben en JSON y se comparan con una línea base guardada.
+Ejecutar con: python benchmarks/suite.py [--sizes 1000 5000] [--save] [--check]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SRC = os.path.join(ROOT, 'src')
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'suite.json')
+
+sys.path.insert(0, SRC)
+
+from generator import generate_network, write_dataset
+from models.graph import FlightGraph
+from models.snapshot import write_snapshot
+from utils.helpers import data_checksum
+
+DEFAULT_SIZES = (1000, 5000, 10000, 50000)
+QUERIES = 20
+# greedy_modularity_communities crece de forma superlineal: solo en grafos pequeños
+CLUSTERS_MAX_AIRPORTS = 2000
+# Trabajo fijo (no tiempo fijo) para que el camino más largo sea comparable entre ejecuciones
+LONGEST_EXPANSIONS = 16
+# Pivotes de la centralidad: un BFS completo por pivote
+CENTRALITY_PIVOTS = 16
+# Diferencias absolutas por debajo de esto son ruido, no regresiones
+MIN_DELTA_MS = 0.5
+
+# VmHWM se reinicia con exec; ru_maxrss en Linux hereda el pico del proceso padre
+COLD_START = '''
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {src!r})
+from models.graph import FlightGraph
+graph = FlightGraph()
+{load}
+elapsed = time.perf_counter() - start
+try:
+    with open("/proc/self/status") as f:
+        peak_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+except OSError:
+    import resource
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{"ms": elapsed * 1000, "peak_rss_mb": peak_kb / 1024}}))
+'''
+JSON_LOAD = 'graph.load_stream({airports!r}, {flights!r})'
+SNAPSHOT_LOAD = 'assert graph.load_snapshot({snapshot!r})'
+
+
+def timings(samples_ms):
+    """Resumen de una lista de tiempos en ms."""
+    ordered = sorted(samples_ms)
+    return {
+        'calls': len(ordered),
+        'median_ms': round(statistics.median(ordered), 4),
+        'p95_ms': round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        'min_ms': round(ordered[0], 4)
+    }
+
+
+def time_calls(calls, repeat, before=None):
+    """Ejecuta cada llamada repeat veces (before() antes de cada una, fuera del tiempo)."""
+    samples = []
+    for _ in range(repeat):
+        for call in calls:
+            if before is not None:
+                before()
+            start = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - start) * 1000)
+    return timings(samples)
+
+
+def cold_start(load, repeat):
+    """Mejor tiempo de arranque y memoria pico (RSS) de un intérprete nuevo."""
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', COLD_START.format(src=SRC, load=load)],
+                                capture_output=True, text=True, check=True)
+        runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return {
+        'ms': round(min(run['ms'] for run in runs), 2),
+        'peak_rss_mb': round(min(run['peak_rss_mb'] for run in runs), 2)
+    }
+
+
+def sample_queries(graph, rng, count):
+    """Pares origen-destino distintos entre aeropuertos con vuelos."""
+    codes = [code for code in graph.csr.codes if graph.csr.neighbors(code)]
+    return [tuple(rng.sample(codes, 2)) for _ in range(count)]
+
+
+def new_flight(graph, rng):
+    """Un par de aeropuertos sin vuelo directo (para medir altas y bajas)."""
+    codes = graph.csr.codes
+    while True:
+        origin, destination = rng.sample(codes, 2)
+        if not graph.has_flight(origin, destination):
+            return origin, destination
+
+
+def bench_methods(graph, paths, queries, repeat, rng):
+    """Tiempos de cada método de FlightGraph sin caché de resultados."""
+    airports_path, flights_path, snapshot_path = paths
+    origin, destination = queries[0]
+    hub = graph.get_hubs(1)[0]['airport']
+    clear = graph.cache.clear
+    results = {
+        'load_stream': time_calls([lambda: graph.load_stream(airports_path, flights_path)], repeat),
+        'load_snapshot': time_calls([lambda: graph.load_snapshot(snapshot_path)], repeat),
+        'get_all_airports': time_calls([graph.get_all_airports], repeat, clear),
+        'get_graph_stats': time_calls([graph.get_graph_stats], repeat, clear),
+        'get_hubs': time_calls([lambda: graph.get_hubs(10)], repeat, clear),
+        'get_isolated_nodes': time_calls([graph.get_isolated_nodes], repeat, clear),
+        'get_nodes_by_degree': time_calls([lambda: graph.get_nodes_by_degree(1)], repeat, clear),
+        'get_connections': time_calls([lambda o=o: graph.get_connections(o) for o, _ in queries], repeat, clear),
+        'shortest_path': time_calls([lambda o=o, d=d: graph.shortest_path(o, d) for o, d in queries], repeat, clear),
+        'shortest_path_distance': time_calls(
+            [lambda o=o, d=d: graph.shortest_path_distance(o, d) for o, d in queries], repeat, clear),
+        'routes_from': time_calls(
+            [lambda: graph.routes_from(origin, tuple(d for _, d in queries))], repeat, clear),
+        'paths_page': time_calls(
+            [lambda o=o, d=d: graph.paths_page(o, d, max_length=4, limit=100) for o, d in queries], repeat, clear),
+        'k_shortest_paths': time_calls(
+            [lambda o=o, d=d: graph.k_shortest_paths(o, d, 10) for o, d in queries], repeat, clear),
+        'distance_matrix': time_calls(
+            [lambda: graph.distance_matrix(tuple(o for o, _ in queries), tuple(d for _, d in queries))],
+            repeat, clear),
+        'reachable_within': time_calls(
+            [lambda: graph.reachable_within(tuple(o for o, _ in queries), 2)], repeat, clear),
+        'centrality': time_calls([lambda: graph.centrality('betweenness', CENTRALITY_PIVOTS)], 1, clear),
+        'longest_path_search': time_calls(
+            [lambda: graph.longest_path_search(origin, destination, time_budget=None,
+                                               node_budget=LONGEST_EXPANSIONS)],
+            repeat, clear),
+    }
+    for algorithm in ('dijkstra', 'bidirectional', 'alt'):
+        results[f'route[{algorithm}]'] = time_calls(
+            [lambda o=o, d=d, a=algorithm: graph.route(o, d, a) for o, d in queries], repeat, clear)
+    if graph.number_of_airports() <= CLUSTERS_MAX_AIRPORTS:
+        results['get_clusters'] = time_calls([graph.get_clusters], 1, clear)
+
+    # Mutaciones: cada alta se deshace con su baja para no alterar el grafo
+    flights = [new_flight(graph, rng) for _ in range(QUERIES)]
+    graph.route(*queries[0])
+    graph.routes_from(hub, (destination,))
+    results['add_flight'] = time_calls([lambda f=f: graph.add_flight(*f, 500) for f in flights], 1)
+    results['update_flight'] = time_calls([lambda f=f: graph.update_flight(*f, 400) for f in flights], 1)
+    results['remove_flight'] = time_calls([lambda f=f: graph.remove_flight(*f) for f in flights], 1)
+    return results
+
+
+def bench_endpoints(handler, graph, queries, repeat, rng):
+    """Tiempos de cada ruta de lambda_handler (caché vaciada antes de cada petición)."""
+    origin, destination = queries[0]
+    hub = graph.get_hubs(1)[0]['airport']
+
+    def get(path, params=None):
+        return {'path': path, 'httpMethod': 'GET', 'queryStringParameters': params}
+
+    def requests(build):
+        return [lambda o=o, d=d: handler(build(o, d), None) for o, d in queries]
+
+    results = {
+        '/airports': time_calls([lambda: handler(get('/airports'), None)], repeat, graph.cache.clear),
+        '/stats': time_calls([lambda: handler(get('/stats'), None)], repeat, graph.cache.clear),
+        '/hubs': time_calls([lambda: handler(get('/hubs', {'top': '10'}), None)], repeat, graph.cache.clear),
+        '/isolated': time_calls([lambda: handler(get('/isolated'), None)], repeat, graph.cache.clear),
+        '/by-degree': time_calls([lambda: handler(get('/by-degree', {'degree': '1'}), None)],
+                                 repeat, graph.cache.clear),
+        '/connections': time_calls(requests(lambda o, d: get('/connections', {'airport': o})),
+                                   repeat, graph.cache.clear),
+        '/shortest-path': time_calls(
+            requests(lambda o, d: get('/shortest-path', {'origin': o, 'destination': d})),
+            repeat, graph.cache.clear),
+        '/k-shortest-paths': time_calls(
+            requests(lambda o, d: get('/k-shortest-paths', {'origin': o, 'destination': d, 'k': '10'})),
+            repeat, graph.cache.clear),
+        '/all-paths': time_calls(
+            requests(lambda o, d: get('/all-paths', {
+                'origin': o, 'destination': d, 'max_length': '4', 'limit': '100'})),
+            repeat, graph.cache.clear),
+        '/longest-path': time_calls([lambda: handler(get('/longest-path', {
+            'origin': origin, 'destination': destination,
+            'max_expansions': str(LONGEST_EXPANSIONS)}), None)], repeat, graph.cache.clear),
+        '/batch': time_calls([lambda: handler({'path': '/batch', 'httpMethod': 'POST', 'body': json.dumps({
+            'operations': [{'op': 'shortest-path', 'origin': hub, 'destination': d} for _, d in queries]
+        })}, None)], repeat, graph.cache.clear),
+    }
+    if graph.number_of_airports() <= CLUSTERS_MAX_AIRPORTS:
+        results['/clusters'] = time_calls([lambda: handler(get('/clusters'), None)], 1, graph.cache.clear)
+
+    flights = [new_flight(graph, rng) for _ in range(QUERIES)]
+
+    def mutation(method, flight, distance=None):
+        body = {'origin': flight[0], 'destination': flight[1]}
+        if distance is not None:
+            body['distance'] = distance
+        return lambda: handler({'path': '/flights', 'httpMethod': method, 'body': json.dumps(body)}, None)
+
+    results['POST /flights'] = time_calls([mutation('POST', f, 500) for f in flights], 1)
+    results['PATCH /flights'] = time_calls([mutation('PATCH', f, 400) for f in flights], 1)
+    results['DELETE /flights'] = time_calls([mutation('DELETE', f) for f in flights], 1)
+    return results
+
+
+def run(sizes, repeat, seed, backend):
+    # Import tardío: el módulo del handler carga data/ al importarse
+    from lambdas import graph_operations
+
+    results = {
+        'meta': {
+            'seed': seed,
+            'repeat': repeat,
+            'backend': backend,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S')
+        },
+        'sizes': {}
+    }
+    for size in sizes:
+        rng = random.Random(seed)
+        airports, flights = generate_network(size, seed)
+        with tempfile.TemporaryDirectory() as directory:
+            airports_path, flights_path = write_dataset(directory, airports, flights)
+            snapshot_path = os.path.join(directory, 'graph.snapshot')
+            graph = FlightGraph(backend=backend)
+            graph.load_stream(airports_path, flights_path)
+            write_snapshot(graph, snapshot_path, data_checksum([airports_path, flights_path]))
+            queries = sample_queries(graph, rng, QUERIES)
+            print(f"{size} aeropuertos, {graph.number_of_flights()} vuelos", file=sys.stderr)
+
+            entry = {
+                'airports': graph.number_of_airports(),
+                'flights': graph.number_of_flights(),
+                'cold_start': {
+                    'json': cold_start(JSON_LOAD.format(airports=airports_path, flights=flights_path), repeat),
+                    'snapshot': cold_start(SNAPSHOT_LOAD.format(snapshot=snapshot_path), repeat)
+                },
+                'methods': bench_methods(graph, (airports_path, flights_path, snapshot_path),
+                                         queries, repeat, rng)
+            }
+            del graph
+            handler_graph = graph_operations.graph
+            handler_graph.load_stream(airports_path, flights_path)
+            entry['endpoints'] = bench_endpoints(graph_operations.lambda_handler, handler_graph,
+                                                 queries, repeat, rng)
+            handler_graph.clear()
+        results['sizes'][str(size)] = entry
+    return results
+
+
+def metrics(results):
+    """Aplana los resultados en {(tamaño, métrica): valor} comparables."""
+    flat = {}
+    for size, entry in results['sizes'].items():
+        for mode, cold in entry['cold_start'].items():
+            flat[(size, f'cold_start[{mode}].ms')] = cold['ms']
+            flat[(size, f'cold_start[{mode}].peak_rss_mb')] = cold['peak_rss_mb']
+        for group in ('methods', 'endpoints'):
+            for name, timing in entry[group].items():
+                flat[(size, f'{group}.{name}')] = timing['median_ms']
+    return flat
+
+
+def compare(results, baseline, tolerance):
+    """Métricas que empeoran más de tolerance (relativo) respecto a la línea base."""
+    current, previous = metrics(results), metrics(baseline)
+    regressions = []
+    for key, value in sorted(current.items()):
+        base = previous.get(key)
+        if base is None:
+            continue
+        # En ms se ignoran diferencias absolutas mínimas (ruido de medida)
+        noise = 0 if key[1].endswith('peak_rss_mb') else MIN_DELTA_MS
+        if value > base * (1 + tolerance) and value - base > noise:
+            regressions.append((key[0], key[1], base, value))
+    return regressions
+
+
+def report(results):
+    for size, entry in results['sizes'].items():
+        print(f"\n== {size} aeropuertos, {entry['flights']} vuelos ==")
+        for mode, cold in entry['cold_start'].items():
+            print(f"cold start {mode:<26} {cold['ms']:10.1f} ms  {cold['peak_rss_mb']:8.1f} MB pico")
+        for group in ('methods', 'endpoints'):
+            for name, timing in entry[group].items():
+                print(f"{name:<37} {timing['median_ms']:10.3f} ms  p95 {timing['p95_ms']:10.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--backend', choices=('networkx', 'csr'), default='networkx')
+    parser.add_argument('--output', help='escribe los resultados en este JSON')
+    parser.add_argument('--results', help='compara un JSON de resultados ya medido en vez de ejecutar')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save', action='store_true', help='guarda los resultados como línea base')
+    parser.add_argument('--check', action='store_true', help='falla si hay regresiones')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='regresión relativa permitida')
+    args = parser.parse_args()
+
+    if args.results:
+        with open(args.results, encoding='utf-8') as f:
+            results = json.load(f)
+    else:
+        results = run(args.sizes, args.repeat, args.seed, args.backend)
+        report(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    if args.save:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nLínea base guardada en {args.baseline}")
+
+    for size, name, base, value in regressions:
+        print(f"REGRESIÓN [{size}] {name}: {base:.3f} -> {value:.3f}")
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""
+Construye el oráculo de distancias (all-pairs) a partir de los datos JSON.
+Ejecutar con: python scripts/build_oracle.py [--output data/oracle.bin]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from models.graph import FlightGraph
+from models.oracle import DistanceOracle
+from utils.helpers import get_data_path, data_checksum
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--output', default=get_data_path('oracle.bin'))
+    args = parser.parse_args()
+
+    airports_path = get_data_path('airports.json')
+    flights_path = get_data_path('flights.json')
+    graph = FlightGraph(num_landmarks=0)
+    # El mismo cargador que init_graph y build_snapshot: valida y se queda con el vuelo más corto
+    graph.load_stream(airports_path, flights_path)
+
+    start = time.perf_counter()
+    DistanceOracle.build(graph.csr, args.output, data_checksum([airports_path, flights_path]))
+    n = graph.csr.number_of_nodes()
+    print(f"Oráculo {args.output}: {n} aeropuertos, {os.path.getsize(args.output)} bytes "
+          f"en {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
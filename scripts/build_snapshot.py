@@ -0,0 +1,36 @@
+"""
+Construye el snapshot binario del grafo a partir de los datos JSON.
+Ejecutar con: python scripts/build_snapshot.py [--airports ...] [--flights ...] [--output ...]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from models.graph import FlightGraph
+from models.snapshot import write_snapshot
+from utils.helpers import get_data_path, data_checksum, SNAPSHOT_FILE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--airports', default=get_data_path('airports.json'))
+    parser.add_argument('--flights', default=get_data_path('flights.json'))
+    parser.add_argument('--output', default=get_data_path(SNAPSHOT_FILE))
+    parser.add_argument('--landmarks', type=int, default=4, help='landmarks ALT a precalcular (0 = ninguno)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    graph = FlightGraph(num_landmarks=args.landmarks)
+    report = graph.load_stream(args.airports, args.flights)
+    write_snapshot(graph, args.output, data_checksum([args.airports, args.flights]))
+    print(f"Snapshot {args.output}: {graph.number_of_airports()} aeropuertos, "
+          f"{graph.number_of_flights()} vuelos, {os.path.getsize(args.output)} bytes "
+          f"en {time.perf_counter() - start:.2f}s "
+          f"({report.records_per_second:.0f} registros/s, rechazados: {report.rejected or 0})")
+
+
+if __name__ == '__main__':
+    main()
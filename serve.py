@@ -0,0 +1,105 @@
+"""
+Lanzador pre-fork de la API Flask con varios procesos worker.
+El grafo se carga una sola vez en el padre, se congela frente al recolector de
+basura (gc.freeze) y después se hace fork de los workers: todos comparten las
+páginas del grafo (copy-on-write) en lugar de cargar cada uno su propia copia.
+Los workers aceptan conexiones del mismo socket; si alguno muere se repone.
+Ejecutar con: python serve.py --workers 4 [--port 5000]
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+# Evita "huecos" en las páginas del padre mientras se carga el grafo
+gc.disable()
+
+
+def serve(sock, host, port, threaded):
+    """Bucle de un worker sobre el socket heredado."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: os._exit(0))
+    # Lo congelado en el padre queda fuera de las colecciones del worker
+    gc.enable()
+    from werkzeug.serving import make_server
+    import app as application
+    server = make_server(host, port, application.app, threaded=threaded, fd=sock.fileno())
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--no-threads', action='store_true', help='una petición a la vez por worker')
+    parser.add_argument('--no-freeze', action='store_true', help='sin gc.freeze (para comparar memoria)')
+    args = parser.parse_args()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(128)
+    sock.set_inheritable(True)
+
+    # Carga (init_graph al importar app) y estructuras derivadas, una sola vez.
+    # werkzeug.serving se importa aquí solo para que quede en memoria compartida
+    # y congelada antes del fork, en vez de importarse en cada worker
+    import werkzeug.serving  # noqa: F401
+    import app as application
+    application.graph.warm()
+    if args.no_freeze:
+        gc.enable()
+    else:
+        gc.freeze()
+
+    workers = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                serve(sock, args.host, args.port, not args.no_threads)
+            finally:
+                os._exit(1)
+        workers[pid] = time.monotonic()
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(args.workers):
+        spawn()
+    print(f"{args.workers} workers en http://{args.host}:{args.port} "
+          f"({application.graph.number_of_airports()} aeropuertos)", file=sys.stderr)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = workers.pop(pid, None)
+        if stopping or started is None:
+            continue
+        print(f"worker {pid} terminó (estado {status}); se repone", file=sys.stderr)
+        # Evita un bucle de fork si el worker falla nada más arrancar
+        if time.monotonic() - started < 1:
+            time.sleep(1)
+        spawn()
+
+
+if __name__ == '__main__':
+    main()
@@ -2,82 +2,190 @@
 Lambda handler para operaciones sobre el grafo de vuelos.
 """
 import json
+import math
 import sys
 import os
+import time
 
 # Añadir el path para imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from models.batch import MAX_BATCH_OPERATIONS, run_batch
+from models.centrality import DEFAULT_PIVOTS, METRICS
 from models.graph import FlightGraph
-from utils.helpers import load_json_file, get_data_path, format_response, parse_request_body
+from models.kpaths import MAX_K
+from models.longest import DEFAULT_TIME_BUDGET
+from models.matrix import MAX_MATRIX_AIRPORTS, parse_codes
+from models.paths import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursor
+from models.planner import QueryPlanner
+from models.reach import MAX_STOPS
+from models.routing import ALGORITHMS
+from models.snapshot import write_snapshot
+from models.spatial import valid_coordinates
+from utils.datasource import get_data_source
+from utils.metrics import GRAPH_LOAD, REQUEST_DURATION, emf_record, work_totals
+from utils.profiler import PROFILE_HEADER, SamplingProfiler, profiling_requested
+from utils.rendered import rendered
+from utils.helpers import (get_data_path, data_checksum, format_response, format_rendered, get_header,
+                           parse_request_body)
 
 
-# Inicializar el grafo
-graph = FlightGraph()
+# Inicializar el grafo (GRAPH_BACKEND=csr activa la vista compacta)
+graph = FlightGraph(backend=os.environ.get('GRAPH_BACKEND', 'networkx'))
+
+# Control de admisión de las consultas caras (QUERY_BUDGET_MS, QUERY_POLICY)
+planner = QueryPlanner.from_env()
+
+# Datos locales o S3 (DATA_BUCKET) revalidados por ETag
+data_source = get_data_source()
+
+# Rutas conocidas: etiqueta de las métricas (el resto se agrupa en 'unmatched')
+ROUTES = frozenset((
+    '/airports', '/stats', '/shortest-path', '/k-shortest-paths', '/all-paths', '/hubs', '/isolated',
+    '/distance-matrix', '/connections', '/by-degree', '/reachable', '/nearby', '/centrality', '/components',
+    '/clusters', '/longest-path', '/batch', '/flights'
+))
 
 
 def init_graph():
     """Inicializa el grafo con los datos de aeropuertos y vuelos."""
-    airports = load_json_file(get_data_path('airports.json'))
-    flights = load_json_file(get_data_path('flights.json'))
-    graph.load_data(airports, flights)
+    airports_path = data_source.path('airports.json')
+    flights_path = data_source.path('flights.json')
+    start = time.perf_counter()
+    checksum = data_checksum([airports_path, flights_path])
+    graph.clear()
+    # Snapshot binario (scripts/build_snapshot.py o caché en /tmp) si no está obsoleto
+    source = 'snapshot'
+    snapshot_path = data_source.snapshot_path()
+    if snapshot_path is None or not graph.load_snapshot(snapshot_path, checksum):
+        source = 'json'
+        report = graph.load_stream(airports_path, flights_path)
+        print(json.dumps({'ingest': report.as_dict()}), file=sys.stderr)
+        if data_source.cache_snapshot:
+            write_snapshot(graph, snapshot_path, checksum)
+    # Oráculo precalculado (scripts/build_oracle.py); se ignora si está obsoleto
+    graph.load_oracle(get_data_path('oracle.bin'), checksum)
+    elapsed = time.perf_counter() - start
+    GRAPH_LOAD.observe(elapsed, source=source)
+    print(json.dumps(emf_record({'Source': source}, {
+        'GraphLoadDuration': (elapsed * 1000, 'Milliseconds'),
+        'Airports': (graph.number_of_airports(), 'Count'),
+        'Flights': (graph.number_of_flights(), 'Count')
+    })), file=sys.stderr)
+
+
+# Construir el grafo en la fase de init de Lambda (fuera del tiempo facturado
+# de la primera petición). NetworkX no se importa aquí: solo /clusters lo carga.
+data_source.sync()
+init_graph()
+
+
+def over_budget(plan):
+    """422 para una consulta rechazada por el planificador (con lo que cabría, si se puede rebajar)."""
+    return format_response(422, {'error': 'Query exceeds the compute budget', 'plan': plan.as_dict()})
 
 
 def lambda_handler(event, context):
-    """Handler principal de la Lambda."""
+    """Handler principal de la Lambda: mide cada petición y la registra como línea EMF."""
+    path = event.get('path', '/')
+    method = event.get('httpMethod', 'GET')
+    route = path if path in ROUTES else 'unmatched'
+    before = work_totals()
+    cache_before = graph.cache.stats()
+    start = time.perf_counter()
+    
+    # Profiler de muestreo solo para peticiones con el token de PROFILE_TOKEN
+    if profiling_requested(get_header(event.get('headers') or {}, PROFILE_HEADER)):
+        with SamplingProfiler() as profiler:
+            response = handle(event)
+        print(json.dumps({'profile': profiler.report(), 'route': route, 'method': method}), file=sys.stderr)
+    else:
+        response = handle(event)
+    
+    elapsed = time.perf_counter() - start
+    status = response['statusCode']
+    REQUEST_DURATION.observe(elapsed, route=route, method=method, status=status)
+    after = work_totals()
+    cache_after = graph.cache.stats()
+    values = {'Latency': (elapsed * 1000, 'Milliseconds')}
+    values.update({name: (after[name] - before[name], 'Count') for name in after})
+    values['CacheHits'] = (cache_after['hits'] - cache_before['hits'], 'Count')
+    values['CacheMisses'] = (cache_after['misses'] - cache_before['misses'], 'Count')
+    print(json.dumps(emf_record({'Route': route, 'Method': method}, values, {'StatusCode': status})),
+          file=sys.stderr)
+    return response
+
+
+def handle(event):
+    """Resuelve una petición de API Gateway."""
     
-    # Inicializar grafo si está vacío
-    if graph.graph.number_of_nodes() == 0:
+    # Reintento por si el init falló o el grafo se vació; con S3, recarga si
+    # algún ETag ha cambiado (revalidación como mucho cada DATA_REVALIDATE_SECONDS)
+    if data_source.refresh() or graph.number_of_airports() == 0:
         init_graph()
     
     # Obtener la operación del path
     path = event.get('path', '/')
     method = event.get('httpMethod', 'GET')
     query_params = event.get('queryStringParameters', {}) or {}
+    headers = event.get('headers') or {}
     
     try:
         # GET /airports - Listar todos los aeropuertos
         if path == '/airports' and method == 'GET':
-            return format_response(200, {
+            return format_rendered(rendered(graph, 'airports', lambda: {
                 'airports': graph.get_all_airports()
-            })
+            }), headers)
         
         # GET /stats - Estadísticas del grafo
         elif path == '/stats' and method == 'GET':
-            return format_response(200, graph.get_graph_stats())
+            return format_rendered(rendered(graph, 'stats', graph.get_graph_stats), headers)
         
         # GET /shortest-path?origin=X&destination=Y
         elif path == '/shortest-path' and method == 'GET':
             origin = query_params.get('origin')
             destination = query_params.get('destination')
+            algorithm = query_params.get('algorithm')
             
             if not origin or not destination:
                 return format_response(400, {'error': 'origin and destination required'})
             
-            path_result = graph.shortest_path(origin.upper(), destination.upper())
-            distance = graph.shortest_path_distance(origin.upper(), destination.upper())
+            if algorithm is not None and algorithm not in ALGORITHMS:
+                return format_response(400, {'error': f'algorithm must be one of {", ".join(ALGORITHMS)}'})
             
-            if path_result is None:
+            # Una sola búsqueda devuelve camino y distancia
+            route = graph.route(origin.upper(), destination.upper(), algorithm)
+            
+            if route is None:
                 return format_response(404, {'error': 'No path found'})
             
             return format_response(200, {
                 'origin': origin.upper(),
                 'destination': destination.upper(),
-                'path': path_result,
-                'distance': distance,
-                'stops': len(path_result) - 2
+                'path': route['path'],
+                'distance': route['distance'],
+                'stops': route['stops']
             })
         
-        # GET /all-paths?origin=X&destination=Y
-        elif path == '/all-paths' and method == 'GET':
+        # GET /k-shortest-paths?origin=X&destination=Y&k=N
+        elif path == '/k-shortest-paths' and method == 'GET':
             origin = query_params.get('origin')
             destination = query_params.get('destination')
-            max_length = int(query_params.get('max_length', 5))
+            try:
+                k = int(query_params.get('k', 3))
+            except ValueError:
+                k = 0
             
             if not origin or not destination:
                 return format_response(400, {'error': 'origin and destination required'})
             
-            paths = graph.all_paths(origin.upper(), destination.upper(), max_length)
+            if not 1 <= k <= MAX_K:
+                return format_response(400, {'error': f'k must be between 1 and {MAX_K}'})
+            
+            paths = graph.k_shortest_paths(origin.upper(), destination.upper(), k)
+            
+            if not paths:
+                return format_response(404, {'error': 'No path found'})
             
             return format_response(200, {
                 'origin': origin.upper(),
@@ -86,6 +194,73 @@ def lambda_handler(event, context):
                 'paths': paths
             })
         
+        # GET /distance-matrix?origins=A,B&destinations=C,D[&predecessors=true]
+        # POST /distance-matrix {"origins": [...], "destinations": [...], "predecessors": false}
+        elif path == '/distance-matrix' and method in ('GET', 'POST'):
+            params = (parse_request_body(event) or {}) if method == 'POST' else query_params
+            if not isinstance(params, dict):
+                return format_response(400, {'error': 'Invalid JSON body'})
+            origins = parse_codes(params.get('origins'))
+            destinations = parse_codes(params.get('destinations'))
+            predecessors = str(params.get('predecessors', 'false')).lower() in ('1', 'true')
+            
+            if origins is None or destinations is None:
+                return format_response(400, {'error': 'origins and destinations required'})
+            
+            if max(len(set(origins)), len(set(destinations))) > MAX_MATRIX_AIRPORTS:
+                return format_response(400, {'error': f'at most {MAX_MATRIX_AIRPORTS} origins and destinations'})
+            
+            # Una búsqueda por origen distinto (o por destino si no hacen falta predecesores)
+            searches = len(set(origins)) if predecessors else min(len(set(origins)), len(set(destinations)))
+            plan = planner.plan_matrix(graph.csr, searches)
+            if plan.rejected:
+                return over_budget(plan)
+            
+            try:
+                matrix = graph.distance_matrix(origins, destinations, predecessors)
+            except ValueError as error:
+                return format_response(404, {'error': str(error)})
+            
+            return format_response(200, matrix)
+        
+        # GET /all-paths?origin=X&destination=Y
+        elif path == '/all-paths' and method == 'GET':
+            origin = query_params.get('origin')
+            destination = query_params.get('destination')
+            max_length = int(query_params.get('max_length', 5))
+            limit = int(query_params.get('limit', DEFAULT_PAGE_SIZE))
+            cursor = query_params.get('cursor')
+            
+            if not origin or not destination:
+                return format_response(400, {'error': 'origin and destination required'})
+            
+            if not 1 <= limit <= MAX_PAGE_SIZE:
+                return format_response(400, {'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'})
+            
+            plan = planner.plan_paths(graph.csr, origin.upper(), max_length)
+            if plan.rejected:
+                return over_budget(plan)
+            
+            # Paginación con cursor: la memoria no depende del número total de caminos;
+            # si se agota el presupuesto la página sale truncada y el cursor sigue desde ahí
+            try:
+                page = graph.paths_page(origin.upper(), destination.upper(), plan.used('max_length', max_length),
+                                        limit, cursor, planner.budget, planner.max_expansions)
+            except InvalidCursor as e:
+                return format_response(400, {'error': str(e)})
+            
+            body = {
+                'origin': origin.upper(),
+                'destination': destination.upper(),
+                'total_paths': len(page['paths']),
+                'paths': page['paths'],
+                'next_cursor': page['next_cursor'],
+                'truncated': page['truncated']
+            }
+            if plan.changes:
+                body['plan'] = plan.as_dict()
+            return format_response(200, body)
+        
         # GET /hubs?top=N
         elif path == '/hubs' and method == 'GET':
             top_n = int(query_params.get('top', 5))
@@ -95,9 +270,9 @@ def lambda_handler(event, context):
         
         # GET /isolated
         elif path == '/isolated' and method == 'GET':
-            return format_response(200, {
+            return format_rendered(rendered(graph, 'isolated', lambda: {
                 'isolated_airports': graph.get_isolated_nodes()
-            })
+            }), headers)
         
         # GET /connections?airport=X
         elif path == '/connections' and method == 'GET':
@@ -129,37 +304,205 @@ def lambda_handler(event, context):
                 'total': len(airports)
             })
         
-        # GET /clusters
-        elif path == '/clusters' and method == 'GET':
-            clusters = graph.get_clusters()
+        # GET /reachable?origin=X&max_stops=N
+        elif path == '/reachable' and method == 'GET':
+            origin = query_params.get('origin')
+            try:
+                max_stops = int(query_params.get('max_stops', 1))
+            except ValueError:
+                max_stops = -1
+            
+            if not origin:
+                return format_response(400, {'error': 'origin required'})
+            
+            if not 0 <= max_stops <= MAX_STOPS:
+                return format_response(400, {'error': f'max_stops must be between 0 and {MAX_STOPS}'})
+            
+            airports = graph.reachable_within((origin.upper(),), max_stops)[origin.upper()]
+            
+            if airports is None:
+                return format_response(404, {'error': 'Airport not found'})
+            
             return format_response(200, {
-                'total_clusters': len(clusters),
-                'clusters': clusters
+                'origin': origin.upper(),
+                'max_stops': max_stops,
+                'airports': airports,
+                'total': len(airports)
             })
         
+        # GET /nearby?lat=Y&lon=X&radius_km=R&limit=N
+        elif path == '/nearby' and method == 'GET':
+            try:
+                lat = float(query_params['lat'])
+                lon = float(query_params['lon'])
+                radius_km = float(query_params.get('radius_km', 100))
+            except (KeyError, ValueError):
+                return format_response(400, {'error': 'lat and lon required'})
+            try:
+                limit = int(query_params['limit']) if query_params.get('limit') is not None else None
+            except ValueError:
+                limit = 0
+            
+            if not valid_coordinates(lat, lon) or not radius_km > 0:
+                return format_response(400, {'error': 'lat/lon out of range or radius_km not positive'})
+            
+            if limit is not None and limit < 1:
+                return format_response(400, {'error': 'limit must be a positive integer'})
+            
+            airports = graph.nearby(lat, lon, radius_km, limit)
+            
+            return format_response(200, {
+                'lat': lat,
+                'lon': lon,
+                'radius_km': radius_km,
+                'airports': airports,
+                'total': len(airports)
+            })
+        
+        # GET /centrality?metric=betweenness&k=64&top=10&weighted=false&seed=0
+        elif path == '/centrality' and method == 'GET':
+            metric = query_params.get('metric', 'betweenness')
+            k = int(query_params.get('k', DEFAULT_PIVOTS))
+            top = int(query_params.get('top', 10))
+            weighted = query_params.get('weighted', 'false').lower() in ('1', 'true')
+            seed = int(query_params.get('seed', 0))
+            
+            if metric not in METRICS:
+                return format_response(400, {'error': f'metric must be one of {", ".join(METRICS)}'})
+            
+            if k < 1 or top < 1:
+                return format_response(400, {'error': 'k and top must be positive'})
+            
+            plan = planner.plan_centrality(graph.csr, k, weighted)
+            if plan.rejected:
+                return over_budget(plan)
+            
+            body = graph.centrality(metric, plan.used('k', k), top, weighted, seed)
+            if plan.changes:
+                body = dict(body, plan=plan.as_dict())
+            return format_response(200, body)
+        
+        # GET /components[?airport=X]
+        elif path == '/components' and method == 'GET':
+            airport = query_params.get('airport')
+            
+            if airport:
+                size = graph.component_size(airport.upper())
+                if size is None:
+                    return format_response(404, {'error': 'Airport not found'})
+                return format_response(200, {'airport': airport.upper(), 'component_size': size})
+            
+            return format_rendered(rendered(graph, 'components', graph.get_components), headers)
+        
+        # GET /clusters
+        elif path == '/clusters' and method == 'GET':
+            def clusters_body():
+                clusters = graph.get_clusters()
+                return {'total_clusters': len(clusters), 'clusters': clusters}
+            return format_rendered(rendered(graph, 'clusters', clusters_body), headers)
+        
         # GET /longest-path?origin=X&destination=Y
         elif path == '/longest-path' and method == 'GET':
             origin = query_params.get('origin')
             destination = query_params.get('destination')
+            weighted = query_params.get('weighted', 'false').lower() in ('1', 'true')
+            try:
+                time_budget = float(query_params.get('time_budget_ms', DEFAULT_TIME_BUDGET * 1000)) / 1000
+                expansions = query_params.get('max_expansions')
+                node_budget = int(expansions) if expansions is not None else None
+            except ValueError:
+                time_budget, node_budget = math.nan, None
             
             if not origin or not destination:
                 return format_response(400, {'error': 'origin and destination required'})
             
-            path_result = graph.longest_path(origin.upper(), destination.upper())
+            # 0, negativos, nan o inf darían un resultado "aproximado" al instante o una búsqueda sin límite
+            if not math.isfinite(time_budget) or time_budget <= 0 or (node_budget is not None and node_budget < 1):
+                return format_response(400, {'error': 'time_budget_ms and max_expansions must be positive numbers'})
+            
+            plan = planner.plan_longest(time_budget)
+            if plan.rejected:
+                return over_budget(plan)
+            
+            time_budget = plan.used('time_budget_ms', time_budget * 1000) / 1000
+            result = graph.longest_path_search(
+                origin.upper(), destination.upper(), weighted, time_budget, node_budget
+            )
             
-            if path_result is None:
+            if result is None:
                 return format_response(404, {'error': 'No path found'})
             
-            return format_response(200, {
+            # approximate: la búsqueda agotó su presupuesto y devuelve el mejor camino encontrado
+            body = {
                 'origin': origin.upper(),
                 'destination': destination.upper(),
-                'path': path_result,
-                'length': len(path_result)
+                'path': result['path'],
+                'length': len(result['path']),
+                'distance': result['distance'],
+                'approximate': result['approximate']
+            }
+            if plan.changes:
+                body['plan'] = plan.as_dict()
+            return format_response(200, body)
+        
+        # POST /batch - Varias operaciones; las rutas comparten un Dijkstra por origen
+        elif path == '/batch' and method == 'POST':
+            body = parse_request_body(event) or {}
+            if not isinstance(body, dict):
+                return format_response(400, {'error': 'Invalid JSON body'})
+            operations = body.get('operations')
+            
+            if not isinstance(operations, list):
+                return format_response(400, {'error': 'operations list required'})
+            
+            if len(operations) > MAX_BATCH_OPERATIONS:
+                return format_response(400, {'error': f'at most {MAX_BATCH_OPERATIONS} operations per batch'})
+            
+            return format_response(200, {
+                'results': run_batch(graph, operations)
             })
         
+        # POST/PATCH/DELETE /flights - Alta, cambio de distancia y baja de vuelos
+        elif path == '/flights' and method in ('POST', 'PATCH', 'DELETE'):
+            body = parse_request_body(event) or {}
+            if not isinstance(body, dict):
+                return format_response(400, {'error': 'Invalid JSON body'})
+            origin = body.get('origin') or query_params.get('origin')
+            destination = body.get('destination') or query_params.get('destination')
+            distance = body.get('distance')
+            
+            if not isinstance(origin, str) or not isinstance(destination, str):
+                return format_response(400, {'error': 'origin and destination required'})
+            origin, destination = origin.upper(), destination.upper()
+            
+            if method != 'DELETE' and (isinstance(distance, bool) or not isinstance(distance, (int, float))
+                                       or not (math.isfinite(distance) and distance >= 0)):
+                return format_response(400, {'error': 'distance must be a non-negative number'})
+            
+            if method == 'POST':
+                if not graph.has_airport(origin) or not graph.has_airport(destination):
+                    return format_response(404, {'error': 'Airport not found'})
+                if graph.has_flight(origin, destination):
+                    return format_response(409, {'error': 'Flight already exists'})
+                graph.add_flight(origin, destination, distance)
+                return format_response(201, {'origin': origin, 'destination': destination, 'distance': distance})
+            
+            if method == 'PATCH':
+                if not graph.update_flight(origin, destination, distance):
+                    return format_response(404, {'error': 'Flight not found'})
+                return format_response(200, {'origin': origin, 'destination': destination, 'distance': distance})
+            
+            if not graph.remove_flight(origin, destination):
+                return format_response(404, {'error': 'Flight not found'})
+            return format_response(200, {'origin': origin, 'destination': destination, 'deleted': True})
+        
         # Ruta no encontrada
         else:
             return format_response(404, {'error': 'Endpoint not found'})
     
+    # Body que no es JSON (POST /batch, /flights, /distance-matrix)
+    except json.JSONDecodeError:
+        return format_response(400, {'error': 'Invalid JSON body'})
+    
     except Exception as e:
         return format_response(500, {'error': str(e)})
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+Consultas por lotes (POST /batch).
+Las rutas se agrupan por origen: un único Dijkstra de una fuente por origen
+distinto responde a todos sus destinos. Las consultas de alcance se agrupan
+por max_stops y se expanden todas a la vez con los bitsets de models.reach. Cada operación recibe su propio
+status y cuerpo, con el mismo formato que el endpoint individual.
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from models.reach import MAX_STOPS
+
+MAX_BATCH_OPERATIONS = 500
+OPERATIONS = ("shortest-path", "connections", "reachable")
+
+
+def _codes(operation: Dict, *fields: str) -> Optional[List[str]]:
+    """Códigos de aeropuerto de los campos en mayúsculas; None si alguno falta o no es texto."""
+    values = [operation.get(field) for field in fields]
+    if not all(isinstance(value, str) and value for value in values):
+        return None
+    return [value.upper() for value in values]
+
+
+def _shortest_path_body(origin: str, destination: str, route) -> Tuple[int, Dict]:
+    if route is None:
+        return 404, {'error': 'No path found'}
+    return 200, {
+        'origin': origin,
+        'destination': destination,
+        'path': route['path'],
+        'distance': route['distance'],
+        'stops': route['stops']
+    }
+
+
+def _reachable_body(origin: str, max_stops: int, airports) -> Tuple[int, Dict]:
+    if airports is None:
+        return 404, {'error': 'Airport not found'}
+    return 200, {
+        'origin': origin,
+        'max_stops': max_stops,
+        'airports': airports,
+        'total': len(airports)
+    }
+
+
+def run_batch(graph, operations: List[Dict]) -> List[Dict]:
+    """Ejecuta las operaciones y devuelve [{status, body}] en el mismo orden."""
+    results: List[Dict] = [None] * len(operations)
+    # origen -> [(posición, destino)]
+    routes: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+    # max_stops -> [(posición, origen)]
+    reach: Dict[int, List[Tuple[int, str]]] = defaultdict(list)
+
+    for i, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            results[i] = {'status': 400, 'body': {'error': 'operation must be an object'}}
+            continue
+        op = operation.get('op')
+        if op == 'shortest-path':
+            codes = _codes(operation, 'origin', 'destination')
+            if codes is None:
+                results[i] = {'status': 400, 'body': {'error': 'origin and destination required'}}
+                continue
+            origin, destination = codes
+            routes[origin].append((i, destination))
+        elif op == 'connections':
+            codes = _codes(operation, 'airport')
+            if codes is None:
+                results[i] = {'status': 400, 'body': {'error': 'airport required'}}
+                continue
+            airport, = codes
+            connections = graph.get_connections(airport)
+            results[i] = {'status': 200, 'body': {
+                'airport': airport,
+                'connections': connections,
+                'total': len(connections)
+            }}
+        elif op == 'reachable':
+            codes = _codes(operation, 'origin')
+            max_stops = operation.get('max_stops', 1)
+            if codes is None:
+                results[i] = {'status': 400, 'body': {'error': 'origin required'}}
+                continue
+            origin, = codes
+            if type(max_stops) is not int or not 0 <= max_stops <= MAX_STOPS:
+                results[i] = {'status': 400, 'body': {'error': f'max_stops must be between 0 and {MAX_STOPS}'}}
+                continue
+            reach[max_stops].append((i, origin))
+        else:
+            results[i] = {'status': 400, 'body': {'error': f'op must be one of {", ".join(OPERATIONS)}'}}
+
+    for origin, queries in routes.items():
+        destinations = tuple(sorted({destination for _, destination in queries}))
+        found = graph.routes_from(origin, destinations)
+        for i, destination in queries:
+            status, body = _shortest_path_body(origin, destination, found[destination])
+            results[i] = {'status': status, 'body': body}
+
+    for max_stops, queries in reach.items():
+        found = graph.reachable_within(tuple(sorted({origin for _, origin in queries})), max_stops)
+        for i, origin in queries:
+            status, body = _reachable_body(origin, max_stops, found[origin])
+            results[i] = {'status': status, 'body': body}
+
+    return results
@@ -0,0 +1,122 @@
+"""
+Caché de resultados de consultas sobre el grafo.
+LRU acotada por número de entradas y por tamaño aproximado en bytes; las
+claves incluyen la versión del grafo, así que nunca se sirven datos obsoletos.
+Un resultado que depende del momento (cortado por el reloj) puede excluirse
+con keep para que la siguiente llamada lo recalcule.
+Las consultas concurrentes (lado compartido del cerrojo del grafo) la usan a
+la vez: un cerrojo propio protege la LRU, nunca el cálculo.
+"""
+import functools
+import inspect
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def estimate_size(value: Any) -> int:
+    """Tamaño aproximado en bytes de un resultado (listas, dicts, str, números)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class ResultCache:
+    """Caché LRU con desalojo por número de entradas y por bytes."""
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any],
+                       keep: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Devuelve el resultado cacheado o lo calcula y lo guarda (si keep no lo descarta).
+
+        Los resultados se comparten entre llamadas: no deben modificarse.
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+        value = compute()
+        if keep is None or keep(value):
+            self.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        size = estimate_size(value)
+        # Un resultado mayor que toda la caché no se guarda
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: Hashable) -> None:
+        del self._entries[key]
+        self.bytes -= self._sizes.pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Contadores de aciertos, fallos y desalojos."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self.bytes
+        }
+
+
+def cached(operation: str, keep: Optional[Callable[[Any], bool]] = None):
+    """Decorador para métodos de FlightGraph: clave (operación, parámetros, versión).
+
+    Los parámetros se normalizan aplicando los valores por defecto, de modo que
+    all_paths(a, b) y all_paths(a, b, 5) comparten entrada. keep(resultado)
+    False deja el resultado fuera de la caché. El objeto debe tener un atributo
+    lock (utils.locks.ReadWriteLock).
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            params = tuple(bound.arguments.values())[1:]
+            # Con el cerrojo de lectura: ninguna mutación cambia la versión ni los datos a medias
+            with self.lock.read():
+                key = (operation, params, self.version)
+                return self.cache.get_or_compute(key, lambda: method(self, *args, **kwargs), keep)
+        return wrapper
+    return decorator
@@ -0,0 +1,215 @@
+"""
+Centralidad de intermediación (betweenness) y de cercanía (closeness)
+aproximadas por muestreo de pivotes.
+Con k pivotes elegidos al azar (semilla fija) se hace una búsqueda desde cada
+uno (algoritmo de Brandes) y se extrapola: betweenness estima la suma de
+dependencias de todos los orígenes (Brandes-Pich) y closeness la suma de
+distancias de cada aeropuerto al resto (Eppstein-Wang). Por Hoeffding, con
+probabilidad CONFIDENCE todas las estimaciones quedan a menos de error_bound
+del valor exacto. Las búsquedas son independientes: se reparten por lotes en
+un pool de procesos y se suman. El pool se reutiliza entre peticiones mientras
+la vista CSR y la versión del grafo no cambien: sus procesos reciben el CSR una
+sola vez al arrancar, así que un cambio del grafo obliga a crear otro.
+"""
+import heapq
+import math
+import multiprocessing
+import os
+import random
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.csr import CSRGraph
+from utils.workers import START_METHOD
+
+METRICS = ("betweenness", "closeness")
+DEFAULT_PIVOTS = 64
+CONFIDENCE = 0.95
+# Por debajo de estos pivotes arrancar procesos cuesta más que lo que se gana
+PARALLEL_MIN_PIVOTS = 16
+BATCHES_PER_WORKER = 4
+
+# Vista CSR de cada proceso del pool, fijada por su initializer (solo en los workers)
+_csr: Optional[CSRGraph] = None
+
+# Pool vigente: (CSR del que se creó, versión, workers, executor); se protege con _pool_lock
+_pool: Optional[Tuple[weakref.ref, int, int, ProcessPoolExecutor]] = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker(csr: CSRGraph) -> None:
+    global _csr
+    _csr = csr
+
+
+def _bfs_dependencies(csr: CSRGraph, source: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Dependencias de Brandes y distancias (en vuelos, -1 inalcanzable) desde source."""
+    n = csr.number_of_nodes()
+    dist = np.full(n, -1, dtype=np.int64)
+    sigma = np.zeros(n)
+    dist[source] = 0
+    sigma[source] = 1.0
+    frontier = np.array([source], dtype=np.int64)
+    levels = []
+    depth = 0
+    while len(frontier):
+        lengths = csr.indptr[frontier + 1] - csr.indptr[frontier]
+        parents = np.repeat(frontier, lengths)
+        children = csr.gather(frontier).astype(np.int64)
+        fresh = children[dist[children] == -1]
+        dist[fresh] = depth + 1
+        # Aristas del DAG de caminos mínimos entre este nivel y el siguiente
+        forward = dist[children] == depth + 1
+        parents, children = parents[forward], children[forward]
+        sigma += np.bincount(children, weights=sigma[parents], minlength=n)
+        levels.append((parents, children))
+        frontier = np.unique(children)
+        depth += 1
+    delta = np.zeros(n)
+    for parents, children in reversed(levels):
+        delta += np.bincount(parents, weights=sigma[parents] / sigma[children] * (1 + delta[children]), minlength=n)
+    return delta, dist.astype(np.float64)
+
+
+def _dijkstra_dependencies(csr: CSRGraph, source: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Como _bfs_dependencies pero con la distancia de los vuelos como peso."""
+    n = csr.number_of_nodes()
+    indptr, indices, weights = csr.indptr, csr.indices, csr.weights
+    sigma = [0.0] * n
+    preds: List[List[int]] = [[] for _ in range(n)]
+    best = {source: 0.0}
+    sigma[source] = 1.0
+    dist = np.full(n, -1.0)
+    order = []
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heapq.heappop(heap)
+        if dist[u] >= 0:
+            continue
+        dist[u] = d
+        order.append(u)
+        start, end = indptr[u], indptr[u + 1]
+        for v, w in zip(indices[start:end].tolist(), weights[start:end].tolist()):
+            nd = d + w
+            known = best.get(v)
+            if known is None or nd < known:
+                best[v] = nd
+                sigma[v] = sigma[u]
+                preds[v] = [u]
+                heapq.heappush(heap, (nd, v))
+            elif nd == known and dist[v] < 0:
+                sigma[v] += sigma[u]
+                preds[v].append(u)
+    delta = [0.0] * n
+    for w in reversed(order):
+        coefficient = (1 + delta[w]) / sigma[w]
+        for v in preds[w]:
+            delta[v] += sigma[v] * coefficient
+    return np.array(delta), dist
+
+
+def _run_batch(sources: List[int], weighted: bool,
+               csr: Optional[CSRGraph] = None) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Suma de dependencias y de distancias de un lote de pivotes, y la mayor excentricidad.
+
+    En serie se pasa csr; en el pool se usa el del proceso (_init_worker).
+    """
+    csr = csr if csr is not None else _csr
+    n = csr.number_of_nodes()
+    dependencies = np.zeros(n)
+    distances = np.zeros(n)
+    eccentricity = 0.0
+    search = _dijkstra_dependencies if weighted else _bfs_dependencies
+    for source in sources:
+        delta, dist = search(csr, source)
+        delta[source] = 0.0
+        dependencies += delta
+        reached = dist >= 0
+        distances[reached] += dist[reached]
+        eccentricity = max(eccentricity, float(dist.max()))
+    return dependencies, distances, eccentricity
+
+
+def _executor(csr: CSRGraph, version: int, workers: int) -> ProcessPoolExecutor:
+    """Pool para esta vista CSR y versión: el vigente si coincide, si no uno nuevo (con _pool_lock)."""
+    global _pool
+    if _pool is not None:
+        owner, pool_version, pool_workers, executor = _pool
+        if owner() is csr and pool_version == version and pool_workers == workers:
+            return executor
+        # Los lotes ya enviados al pool anterior terminan igualmente
+        executor.shutdown(wait=False)
+        _pool = None
+    executor = ProcessPoolExecutor(workers, multiprocessing.get_context(START_METHOD),
+                                   initializer=_init_worker, initargs=(csr,))
+    _pool = (weakref.ref(csr), version, workers, executor)
+    return executor
+
+
+def _parallel(csr: CSRGraph, version: int, pivots: List[int], weighted: bool,
+              workers: int) -> Optional[List[Tuple]]:
+    """Lotes repartidos en un pool de procesos; None si no se pueden crear procesos aquí."""
+    global _pool
+    # Un worker daemon (p. ej. del pool ASGI) no puede tener hijos
+    if workers < 2 or len(pivots) < PARALLEL_MIN_PIVOTS or multiprocessing.current_process().daemon:
+        return None
+    size = max(1, math.ceil(len(pivots) / (workers * BATCHES_PER_WORKER)))
+    batches = [pivots[i:i + size] for i in range(0, len(pivots), size)]
+    with _pool_lock:
+        try:
+            executor = _executor(csr, version, workers)
+        except OSError:
+            # Sin semáforos POSIX (p. ej. AWS Lambda, sin /dev/shm)
+            return None
+        # map envía todos los lotes ya: otro hilo no puede cerrar el pool antes
+        results = executor.map(_run_batch, batches, [weighted] * len(batches))
+    try:
+        return list(results)
+    except BrokenProcessPool:
+        # Un worker murió: se descarta el pool y este cálculo se hace en serie
+        with _pool_lock:
+            if _pool is not None and _pool[3] is executor:
+                _pool = None
+        return None
+
+
+def approximate_centrality(csr: CSRGraph, component_sizes: np.ndarray, k: int = DEFAULT_PIVOTS,
+                           weighted: bool = False, seed: int = 0,
+                           workers: Optional[int] = None, version: int = 0) -> Dict:
+    """Betweenness y closeness normalizadas (como NetworkX) estimadas con k pivotes.
+
+    component_sizes[v] es el tamaño de la componente de v y version la del
+    grafo (la vista CSR se parchea en sitio: sin ella el pool reutilizado
+    calcularía sobre datos viejos). error_bound es el
+    error absoluto de betweenness y, para closeness, de la distancia media
+    de cada aeropuerto al resto (su inversa en un grafo conexo).
+    """
+    n = csr.number_of_nodes()
+    pivots = random.Random(seed).sample(range(n), min(k, n))
+    workers = workers or int(os.environ.get('CENTRALITY_WORKERS', 0)) or os.cpu_count() or 1
+    partials = _parallel(csr, version, pivots, weighted, workers) or [_run_batch(pivots, weighted, csr)]
+    dependencies = sum(partial[0] for partial in partials)
+    distances = sum(partial[1] for partial in partials)
+    diameter = 2 * max(partial[2] for partial in partials)
+    # Extrapolación a todos los orígenes: cada pivote representa n/k
+    scale = n / len(pivots) if pivots else 0.0
+    betweenness = dependencies * scale / ((n - 1) * (n - 2)) if n > 2 else np.zeros(n)
+    farness = distances * scale
+    reach = component_sizes - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        closeness = np.where(farness > 0, reach / max(n - 1, 1) * reach / farness, 0.0)
+    exact = len(pivots) == n
+    epsilon = 0.0 if exact or not pivots else math.sqrt(math.log(2 * n / (1 - CONFIDENCE)) / (2 * len(pivots)))
+    stretch = n / (n - 1) if n > 1 else 1.0
+    return {
+        "pivots": len(pivots),
+        "exact": exact,
+        "betweenness": betweenness,
+        "closeness": closeness,
+        "error_bound": {"betweenness": epsilon * stretch, "closeness": epsilon * stretch * diameter}
+    }
@@ -0,0 +1,99 @@
+"""
+Componentes conexas mantenidas de forma incremental.
+Es un union-find por tamaño con compresión total: la etiqueta de cada nodo es
+directamente la raíz de su conjunto, así que find, same, el tamaño de una
+componente y el número de componentes son O(1). Un vuelo nuevo fusiona dos
+componentes reetiquetando la menor (cada nodo cambia de etiqueta O(log n)
+veces). Una baja no se puede deshacer en un union-find: se recorren a la vez
+ambos extremos y, si quedan separados, se reconstruye solo el lado que termina
+antes (el más pequeño) como componente nueva.
+"""
+from typing import Dict, List, Set
+
+import numpy as np
+
+from models.csr import CSRGraph
+
+
+class Components:
+    """Etiqueta de componente por nodo y miembros por etiqueta."""
+
+    def __init__(self, csr: CSRGraph):
+        self.csr = csr
+        self.labels: List[int] = [-1] * csr.number_of_nodes()
+        self.members: Dict[int, Set[int]] = {}
+        self._next = 0
+        for node in range(csr.number_of_nodes()):
+            if self.labels[node] == -1:
+                self._assign(np.flatnonzero(csr.component_mask(node)).tolist())
+
+    def _assign(self, nodes: List[int]) -> int:
+        label = self._next
+        self._next += 1
+        for node in nodes:
+            self.labels[node] = label
+        self.members[label] = set(nodes)
+        return label
+
+    def count(self) -> int:
+        return len(self.members)
+
+    def find(self, node: int) -> int:
+        """Etiqueta (raíz) de la componente de node."""
+        return self.labels[node]
+
+    def size(self, node: int) -> int:
+        return len(self.members[self.labels[node]])
+
+    def sizes(self) -> List[int]:
+        """Tamaño de cada componente, de mayor a menor."""
+        return sorted((len(members) for members in self.members.values()), reverse=True)
+
+    def is_connected(self) -> bool:
+        if not self.labels:
+            raise ValueError("Connectivity is undefined for the null graph.")
+        return self.count() == 1
+
+    def same(self, a: int, b: int) -> bool:
+        return self.labels[a] == self.labels[b]
+
+    def add_node(self) -> None:
+        self.labels.append(-1)
+        self._assign([len(self.labels) - 1])
+
+    def edge_added(self, a: int, b: int) -> None:
+        small, large = self.labels[a], self.labels[b]
+        if small == large:
+            return
+        if len(self.members[small]) > len(self.members[large]):
+            small, large = large, small
+        for node in self.members[small]:
+            self.labels[node] = large
+        self.members[large] |= self.members.pop(small)
+
+    def weight_changed(self, a: int, b: int, old: float, new: float) -> None:
+        pass
+
+    def edge_removed(self, a: int, b: int) -> None:
+        """Llamar con la arista ya eliminada del CSR."""
+        if a == b:
+            return
+        # BFS simultáneo desde ambos extremos hasta que se encuentran o uno se agota
+        seen = ({a}, {b})
+        frontiers = ([a], [b])
+        while frontiers[0] and frontiers[1]:
+            side = 0 if len(seen[0]) <= len(seen[1]) else 1
+            reached = []
+            for node in frontiers[side]:
+                neighbors, _ = self.csr.row(node)
+                for neighbor in neighbors.tolist():
+                    if neighbor in seen[1 - side]:
+                        return
+                    if neighbor not in seen[side]:
+                        seen[side].add(neighbor)
+                        reached.append(neighbor)
+            frontiers = (reached, frontiers[1]) if side == 0 else (frontiers[0], reached)
+        # El lado con la frontera agotada es una componente nueva
+        side = 0 if not frontiers[0] else 1
+        self.members[self.labels[a]] -= seen[side]
+        self._assign(sorted(seen[side]))
@@ -0,0 +1,238 @@
+"""
+Representación compacta del grafo en formato CSR (Compressed Sparse Row).
+Los códigos de aeropuerto se internan a enteros y la adyacencia y los pesos
+se guardan en arrays de NumPy (indptr/indices/weights).
+"""
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+def as_number(value: float):
+    """Devuelve un int si el valor es entero (mantiene el formato JSON de NetworkX)."""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+class CSRGraph:
+    """Grafo no dirigido con adyacencia en arrays CSR.
+
+    Los cambios puntuales (add_node, add_edge, remove_edge, set_weight) parchean
+    los arrays con np.insert/np.delete en lugar de reconstruir la vista.
+    """
+
+    def __init__(self, codes: List[str], indptr: np.ndarray, indices: np.ndarray,
+                 weights: np.ndarray, loops: Optional[np.ndarray] = None):
+        self.codes = codes
+        self.index: Dict[str, int] = {code: i for i, code in enumerate(codes)}
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        # Los bucles cuentan dos veces en el grado, igual que en NetworkX
+        if loops is None:
+            loops = np.zeros(len(codes), dtype=np.int32)
+        self.loops = loops
+        self.degrees = np.diff(indptr).astype(np.int64) + loops
+
+    @classmethod
+    def empty(cls) -> "CSRGraph":
+        return cls([], np.zeros(1, dtype=np.int64), np.empty(0, dtype=np.int32), np.empty(0))
+
+    @classmethod
+    def from_networkx(cls, graph) -> "CSRGraph":
+        """Construye la vista CSR respetando el orden de nodos y vecinos del grafo."""
+        codes = list(graph.nodes)
+        index = {code: i for i, code in enumerate(codes)}
+        indptr = np.zeros(len(codes) + 1, dtype=np.int64)
+        indices: List[int] = []
+        weights: List[float] = []
+        loops = np.zeros(len(codes), dtype=np.int32)
+        for i, code in enumerate(codes):
+            for neighbor, data in graph.adj[code].items():
+                indices.append(index[neighbor])
+                weights.append(data.get("weight", 1))
+                if neighbor == code:
+                    loops[i] = 1
+            indptr[i + 1] = len(indices)
+        return cls(
+            codes,
+            indptr,
+            np.asarray(indices, dtype=np.int32),
+            np.asarray(weights, dtype=np.float64),
+            loops
+        )
+
+    @classmethod
+    def from_edges(cls, codes: List[str], src: np.ndarray, dst: np.ndarray,
+                   weights: np.ndarray) -> "CSRGraph":
+        """Construye el CSR a partir de listas de aristas (sin duplicados)."""
+        n = len(codes)
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+        is_loop = src == dst
+        rows = np.concatenate([src, dst[~is_loop]])
+        cols = np.concatenate([dst, src[~is_loop]])
+        vals = np.concatenate([weights, weights[~is_loop]])
+        # El orden de inserción de las aristas decide el orden de los vecinos
+        seq = np.concatenate([np.arange(len(src)), np.flatnonzero(~is_loop)])
+        order = np.lexsort((seq, rows))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        loops = np.bincount(src[is_loop], minlength=n).astype(np.int32)
+        return cls(
+            list(codes),
+            indptr,
+            cols[order].astype(np.int32),
+            vals[order],
+            loops
+        )
+
+    def add_node(self, code: str) -> int:
+        """Añade un nodo aislado y devuelve su índice (o el existente)."""
+        if code in self.index:
+            return self.index[code]
+        i = len(self.codes)
+        self.codes.append(code)
+        self.index[code] = i
+        self.indptr = np.append(self.indptr, self.indptr[-1])
+        self.loops = np.append(self.loops, np.int32(0))
+        self.degrees = np.append(self.degrees, 0)
+        return i
+
+    def edge_position(self, a: int, b: int) -> Optional[int]:
+        """Posición de b en la fila de a; None si no hay arista."""
+        neighbors, _ = self.row(a)
+        found = np.flatnonzero(neighbors == b)
+        return int(self.indptr[a] + found[0]) if len(found) else None
+
+    def edge_weight(self, a: int, b: int) -> Optional[float]:
+        position = self.edge_position(a, b)
+        return None if position is None else float(self.weights[position])
+
+    def add_edge(self, a: int, b: int, weight: float) -> None:
+        """Añade la arista al final de ambas filas (orden de vecinos de NetworkX)."""
+        rows = [a] if a == b else [a, b]
+        values = [b] if a == b else [b, a]
+        # Con filas vacías entre a y b ambas posiciones coinciden: desempata la fila
+        order = np.argsort(rows)
+        positions = self.indptr[np.asarray(rows)[order] + 1]
+        self.indices = np.insert(self.indices, positions, np.asarray(values, dtype=self.indices.dtype)[order])
+        self.weights = np.insert(self.weights, positions, weight)
+        self.indptr = self.indptr.copy()
+        self.indptr[a + 1:] += 1
+        self.degrees = self.degrees.copy()
+        self.degrees[a] += 1
+        self.degrees[b] += 1
+        if a == b:
+            self.loops = self.loops.copy()
+            self.loops[a] += 1
+        else:
+            self.indptr[b + 1:] += 1
+
+    def remove_edge(self, a: int, b: int) -> None:
+        positions = {self.edge_position(a, b), self.edge_position(b, a)}
+        self.indices = np.delete(self.indices, list(positions))
+        self.weights = np.delete(self.weights, list(positions))
+        self.indptr = self.indptr.copy()
+        self.indptr[a + 1:] -= 1
+        self.degrees = self.degrees.copy()
+        self.degrees[a] -= 1
+        self.degrees[b] -= 1
+        if a == b:
+            self.loops = self.loops.copy()
+            self.loops[a] -= 1
+        else:
+            self.indptr[b + 1:] -= 1
+
+    def set_weight(self, a: int, b: int, weight: float) -> None:
+        # Copia al escribir: los enumeradores en curso conservan los arrays
+        # que tomaron (y los de un snapshot son de solo lectura)
+        weights = self.weights.copy()
+        weights[self.edge_position(a, b)] = weight
+        weights[self.edge_position(b, a)] = weight
+        self.weights = weights
+
+    def number_of_nodes(self) -> int:
+        return len(self.codes)
+
+    def number_of_edges(self) -> int:
+        return int((len(self.indices) + int(self.loops.sum())) // 2)
+
+    def density(self) -> float:
+        n = self.number_of_nodes()
+        if n <= 1:
+            return 0
+        return 2 * self.number_of_edges() / (n * (n - 1))
+
+    def row(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Devuelve los vecinos y pesos del nodo i."""
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.weights[start:end]
+
+    def gather(self, frontier: np.ndarray) -> np.ndarray:
+        """Concatena las filas de adyacencia de un conjunto de nodos (vectorizado)."""
+        starts = self.indptr[frontier]
+        lengths = self.indptr[frontier + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=self.indices.dtype)
+        offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        return self.indices[offsets + np.arange(total)]
+
+    def neighbors(self, code: str) -> List[str]:
+        if code not in self.index:
+            return []
+        neighbors, _ = self.row(self.index[code])
+        return [self.codes[j] for j in neighbors.tolist()]
+
+    def is_connected(self) -> bool:
+        n = self.number_of_nodes()
+        if n == 0:
+            raise ValueError("Connectivity is undefined for the null graph.")
+        return int(self.component_mask(0).sum()) == n
+
+    def component_mask(self, source: int) -> np.ndarray:
+        """BFS por fronteras: marca los nodos alcanzables desde source."""
+        seen = np.zeros(self.number_of_nodes(), dtype=bool)
+        seen[source] = True
+        frontier = np.array([source], dtype=np.int64)
+        while len(frontier):
+            reached = self.gather(frontier)
+            reached = np.unique(reached[~seen[reached]])
+            seen[reached] = True
+            frontier = reached.astype(np.int64)
+        return seen
+
+    def dijkstra(self, source: int, target: Optional[int] = None) -> Tuple[Dict[int, float], Dict[int, int]]:
+        """Dijkstra desde source; se detiene al asentar target si se indica."""
+        dist: Dict[int, float] = {}
+        pred: Dict[int, int] = {source: -1}
+        best = {source: 0.0}
+        heap = [(0.0, source)]
+        indptr, indices, weights = self.indptr, self.indices, self.weights
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u in dist:
+                continue
+            dist[u] = d
+            if u == target:
+                break
+            start, end = indptr[u], indptr[u + 1]
+            for v, w in zip(indices[start:end].tolist(), weights[start:end].tolist()):
+                nd = d + w
+                if v not in dist and nd < best.get(v, float("inf")):
+                    best[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return dist, pred
+
+    def path_to(self, pred: Dict[int, int], target: int) -> List[str]:
+        """Reconstruye el camino hasta target a partir de los predecesores."""
+        path = []
+        node = target
+        while node != -1:
+            path.append(self.codes[node])
+            node = pred[node]
+        return path[::-1]
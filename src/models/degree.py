@@ -0,0 +1,81 @@
+"""
+Índice de grados: cubetas por grado mantenidas de forma incremental.
+Permite /hubs en O(N) y /by-degree e /isolated como consultas a una cubeta.
+Los empates se ordenan por orden de alta del aeropuerto (determinista).
+"""
+import bisect
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+class DegreeIndex:
+    """Cubetas grado -> aeropuertos (ordenados por secuencia de alta)."""
+
+    def __init__(self):
+        self.codes: List[str] = []
+        self.seq: Dict[str, int] = {}
+        self.degree: List[int] = []
+        self.buckets: Dict[int, List[int]] = {}
+        # Grados distintos presentes, en orden ascendente
+        self.levels: List[int] = []
+
+    @classmethod
+    def from_degrees(cls, codes: List[str], degrees) -> "DegreeIndex":
+        """Construye el índice de golpe (carga masiva) agrupando con NumPy."""
+        index = cls()
+        index.codes = list(codes)
+        index.seq = {code: i for i, code in enumerate(index.codes)}
+        degrees = np.asarray(degrees, dtype=np.int64)
+        index.degree = degrees.tolist()
+        order = np.lexsort((np.arange(len(degrees)), degrees))
+        levels, starts = np.unique(degrees[order], return_index=True)
+        for level, group in zip(levels.tolist(), np.split(order, starts[1:])):
+            index.buckets[level] = group.tolist()
+        index.levels = levels.tolist()
+        return index
+
+    def add_node(self, code: str) -> None:
+        if code in self.seq:
+            return
+        seq = len(self.codes)
+        self.codes.append(code)
+        self.seq[code] = seq
+        self.degree.append(0)
+        self._insert(0, seq)
+
+    def change(self, code: str, delta: int) -> None:
+        """Ajusta el grado de un aeropuerto moviéndolo de cubeta."""
+        self.add_node(code)
+        seq = self.seq[code]
+        old = self.degree[seq]
+        self._remove(old, seq)
+        self.degree[seq] = old + delta
+        self._insert(old + delta, seq)
+
+    def _insert(self, level: int, seq: int) -> None:
+        bucket = self.buckets.get(level)
+        if bucket is None:
+            bucket = self.buckets[level] = []
+            bisect.insort(self.levels, level)
+        bisect.insort(bucket, seq)
+
+    def _remove(self, level: int, seq: int) -> None:
+        bucket = self.buckets[level]
+        del bucket[bisect.bisect_left(bucket, seq)]
+        if not bucket:
+            del self.buckets[level]
+            del self.levels[bisect.bisect_left(self.levels, level)]
+
+    def top(self, n: int) -> List[Tuple[str, int]]:
+        """Los n aeropuertos de mayor grado, recorriendo cubetas de mayor a menor."""
+        result: List[Tuple[str, int]] = []
+        for level in reversed(self.levels):
+            if len(result) >= n:
+                break
+            for seq in self.buckets[level][:n - len(result)]:
+                result.append((self.codes[seq], level))
+        return result
+
+    def nodes_with(self, degree: int) -> List[str]:
+        return [self.codes[seq] for seq in self.buckets.get(degree, [])]
@@ -1,99 +1,756 @@
 """
 Modelo del grafo de aeropuertos y vuelos.
-Usa NetworkX para operaciones sobre grafos.
+Usa NetworkX para operaciones sobre grafos y, opcionalmente, una vista
+compacta en arrays CSR (backend "csr") para los recorridos. Si el grafo se
+carga desde un snapshot binario, el grafo NetworkX solo se materializa cuando
+alguna operación lo necesita.
+
+NetworkX se importa de forma perezosa: cargar datos y responder rutas, hubs o
+conexiones no lo necesita, y su importación domina el arranque en frío.
 """
-import networkx as nx
-from typing import List, Dict, Optional
+import itertools
+import math
+import threading
+import numpy as np
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
+
+from models.cache import ResultCache, cached
+from models.centrality import CONFIDENCE, DEFAULT_PIVOTS, METRICS, approximate_centrality
+from models.components import Components
+from models.csr import CSRGraph, as_number
+from models.degree import DegreeIndex
+from models.ingest import DEFAULT_CHUNK_SIZE, IngestReport, ingest_files
+from models.kpaths import KShortestPaths
+from models.longest import DEFAULT_TIME_BUDGET, LongestPathSearch
+from models.matrix import distance_matrix, encode_array, sparse_matrix
+from models.oracle import DistanceOracle
+from models.paths import PathEnumerator
+from models.planner import Budget
+from models.reach import hop_matrix
+from models.routing import RouteEngine
+from models.snapshot import ATTRIBUTES, COORDINATES, StringColumn, read_snapshot
+from models.spatial import SpatialIndex, valid_coordinates
+from models.trees import ShortestPathTrees
+from utils.locks import ReadWriteLock, reads, writes
+from utils.metrics import (LONGEST_EXPANSIONS, LONGEST_SEARCHES, QUERIES_TRUNCATED, ROUTE_SEARCHES, ROUTE_SETTLED,
+                           UNREACHABLE_QUERIES)
+
+if TYPE_CHECKING:
+    import networkx as nx
+
+BACKENDS = ("networkx", "csr")
+
+
+def _finished_in_time(result: Optional[Dict]) -> bool:
+    """False si el resultado se cortó por el reloj: otra llamada podría terminar, no se cachea."""
+    return result is None or result.get("exhausted") != "time"
 
 
 class FlightGraph:
     """Clase que representa el grafo de vuelos entre aeropuertos."""
     
-    def __init__(self):
-        self.graph = nx.Graph()
+    def __init__(self, backend: str = "networkx", num_landmarks: int = 4,
+                 cache_entries: int = 1024, cache_bytes: int = 64 * 1024 * 1024):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        # Sin grafo NetworkX hasta que una operación lo necesite
+        self._graph: Optional["nx.Graph"] = None
+        # Columnas de atributos (listas o columnas del snapshot) mientras no exista
+        self._columns: Optional[Dict] = {attribute: [] for attribute in ATTRIBUTES + COORDINATES}
+        self.backend = backend
+        # Cada mutación incrementa la versión e invalida la vista CSR y la caché
+        self.version = 0
+        self.cache = ResultCache(cache_entries, cache_bytes)
+        # Consultas concurrentes; las mutaciones y cargas, en exclusiva
+        self.lock = ReadWriteLock()
+        # Construcción perezosa del grafo NetworkX, que puede darse en una lectura
+        self._graph_lock = threading.Lock()
+        # Índice de grados mantenido de forma incremental en add_airport/add_flight
+        self.degrees = DegreeIndex()
+        self._csr: Optional[CSRGraph] = CSRGraph.empty()
+        self._csr_version = self.version
+        self.num_landmarks = num_landmarks
+        self._routes: Optional[RouteEngine] = None
+        self._routes_version = -1
+        self._oracle: Optional[DistanceOracle] = None
+        self._oracle_version = -1
+        # Matriz SciPy de la vista CSR (si SciPy está instalado) y su versión
+        self._sparse = None
+        self._sparse_version = -1
+        # Estructuras ligadas a la vista CSR que las mutaciones reparan in situ
+        self._trees: Optional[ShortestPathTrees] = None
+        self._components: Optional[Components] = None
+        self._spatial: Optional[SpatialIndex] = None
+    
+    @property
+    def graph(self) -> "nx.Graph":
+        """Grafo NetworkX; tras cargar un snapshot se construye en el primer acceso.
+
+        Otros lectores pueden estar usando las columnas: no se descartan aquí
+        sino en la siguiente mutación (_commit), que va en exclusiva.
+        """
+        if self._graph is None:
+            with self._graph_lock:
+                if self._graph is None:
+                    self._graph = self._materialize()
+        return self._graph
+    
+    def _materialize(self) -> "nx.Graph":
+        import networkx as nx
+        csr = self._csr
+        graph = nx.Graph()
+        columns = self._column_values()
+        graph.add_nodes_from(
+            (code, dict(zip(ATTRIBUTES, values)))
+            for code, *values in zip(csr.codes, *columns)
+        )
+        lat, lon = self._coordinates()
+        for code, y, x in zip(csr.codes, lat.tolist(), lon.tolist()):
+            if not math.isnan(y):
+                graph.nodes[code].update(lat=y, lon=x)
+        rows = np.repeat(np.arange(csr.number_of_nodes()), np.diff(csr.indptr))
+        upper = rows <= csr.indices
+        graph.add_weighted_edges_from(
+            (csr.codes[a], csr.codes[b], as_number(w))
+            for a, b, w in zip(rows[upper].tolist(), csr.indices[upper].tolist(), csr.weights[upper].tolist())
+        )
+        return graph
+    
+    def _column_values(self) -> List[List[str]]:
+        """Valores de las columnas de atributos en el orden de ATTRIBUTES."""
+        return [
+            column.tolist() if isinstance(column, StringColumn) else column
+            for column in (self._columns[attribute] for attribute in ATTRIBUTES)
+        ]
+    
+    def _coordinates(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Latitudes y longitudes en el orden de la vista CSR (NaN si faltan)."""
+        if self._graph is None:
+            return tuple(np.asarray(self._columns[coordinate], dtype=np.float64) for coordinate in COORDINATES)
+        nodes = self._graph.nodes
+        return tuple(
+            np.array([nodes[code].get(coordinate, np.nan) for code in self.csr.codes], dtype=np.float64)
+            for coordinate in COORDINATES
+        )
+    
+    def _use_csr(self) -> bool:
+        """Las consultas van a la vista CSR si es el backend o si no hay grafo NetworkX."""
+        return self.backend == "csr" or self._graph is None
+    
+    def number_of_airports(self) -> int:
+        return self.csr.number_of_nodes() if self._graph is None else self._graph.number_of_nodes()
+    
+    def number_of_flights(self) -> int:
+        return self.csr.number_of_edges() if self._graph is None else self._graph.number_of_edges()
+    
+    @property
+    def csr(self) -> CSRGraph:
+        """Vista CSR del grafo, reconstruida solo si el grafo ha cambiado."""
+        if self._csr is None or self._csr_version != self.version:
+            self._csr = CSRGraph.from_networkx(self.graph)
+            self._csr_version = self.version
+        return self._csr
+    
+    @property
+    def routes(self) -> RouteEngine:
+        """Motor de rutas (con landmarks ALT) para la versión actual del grafo."""
+        if self._routes is None or self._routes_version != self.version:
+            self._routes = RouteEngine(self.csr, self.num_landmarks)
+            self._routes_version = self.version
+        return self._routes
+    
+    @writes
+    def warm(self) -> "FlightGraph":
+        """Construye las estructuras derivadas que se crean en el primer uso.
+
+        Antes de un fork (serve.py) así se construyen una vez en el padre y los
+        workers las comparten, en lugar de crear cada uno su propia copia.
+        """
+        self.routes
+        self.components
+        self.spatial
+        return self
     
-    def add_airport(self, code: str, name: str, city: str, country: str) -> None:
-        """Añade un aeropuerto (nodo) al grafo."""
-        self.graph.add_node(code, name=name, city=city, country=country)
+    @property
+    def trees(self) -> ShortestPathTrees:
+        """Árboles de caminos mínimos por origen, reparados en cada mutación."""
+        csr = self.csr
+        if self._trees is None or self._trees.csr is not csr:
+            self._trees = ShortestPathTrees(csr)
+        return self._trees
     
+    @property
+    def components(self) -> Components:
+        """Componentes conexas, mantenidas en cada mutación."""
+        csr = self.csr
+        if self._components is None or self._components.csr is not csr:
+            self._components = Components(csr)
+        return self._components
+    
+    @property
+    def spatial(self) -> SpatialIndex:
+        """Índice espacial de las coordenadas; se reconstruye si cambian."""
+        csr = self.csr
+        if self._spatial is None or self._spatial.csr is not csr:
+            self._spatial = SpatialIndex(csr, *self._coordinates())
+        return self._spatial
+    
+    def _patchable(self) -> Optional[CSRGraph]:
+        """Vista CSR vigente (se parchea); None si se reconstruirá desde NetworkX."""
+        if self._csr is not None and self._csr_version == self.version:
+            return self._csr
+        return None
+    
+    def _repair(self, csr: CSRGraph, change: str, *args) -> None:
+        """Aplica el cambio a las estructuras derivadas vigentes en lugar de descartarlas."""
+        routes = self._routes if self._routes_version == self.version else None
+        for structure in (routes, self._trees, self._components, self._spatial):
+            if structure is not None and structure.csr is csr:
+                getattr(structure, change)(*args)
+    
+    def _commit(self, csr: Optional[CSRGraph]) -> None:
+        """Nueva versión; si la vista CSR se ha parcheado, ella y el motor de rutas siguen vigentes."""
+        routes_current = self._routes is not None and self._routes_version == self.version
+        self.version += 1
+        if self._graph is not None:
+            # El grafo NetworkX ya es el contenido; las columnas quedarían desfasadas
+            self._columns = None
+        if csr is not None:
+            self._csr_version = self.version
+            if routes_current:
+                self._routes_version = self.version
+    
+    @writes
+    def add_airport(self, code: str, name: str, city: str, country: str,
+                    lat: Optional[float] = None, lon: Optional[float] = None) -> None:
+        """Añade un aeropuerto (nodo) al grafo, con coordenadas opcionales."""
+        located = lat is not None or lon is not None
+        if located and not valid_coordinates(lat, lon):
+            raise ValueError(f"Invalid coordinates: {lat}, {lon}")
+        csr = self._patchable()
+        if self._graph is not None:
+            self._graph.add_node(code, name=name, city=city, country=country)
+            if located:
+                self._graph.nodes[code].update(lat=float(lat), lon=float(lon))
+        else:
+            # Sin grafo NetworkX la vista CSR y las columnas son el grafo
+            for attribute, value in zip(ATTRIBUTES, (name, city, country)):
+                column = self._columns[attribute]
+                if isinstance(column, StringColumn):
+                    column = self._columns[attribute] = column.tolist()
+                if code in csr.index:
+                    column[csr.index[code]] = value
+                else:
+                    column.append(value)
+            for coordinate, value in zip(COORDINATES, (lat, lon)):
+                column = self._columns[coordinate]
+                if isinstance(column, np.ndarray):
+                    column = self._columns[coordinate] = column.tolist()
+                if code not in csr.index:
+                    column.append(math.nan)
+                if located:
+                    column[csr.index.get(code, -1)] = float(value)
+        if csr is not None and code not in csr.index:
+            csr.add_node(code)
+            self._repair(csr, "add_node")
+        if located:
+            # Un punto nuevo en la rejilla: se reconstruye en el siguiente uso
+            self._spatial = None
+        self.degrees.add_node(code)
+        self._commit(csr)
+    
+    @reads
+    def has_airport(self, code: str) -> bool:
+        if self._graph is not None:
+            return code in self._graph
+        return code in self.csr.index
+    
+    @reads
+    def has_flight(self, origin: str, destination: str) -> bool:
+        if self._graph is not None:
+            return self._graph.has_edge(origin, destination)
+        index = self.csr.index
+        if origin not in index or destination not in index:
+            return False
+        return self.csr.edge_position(index[origin], index[destination]) is not None
+    
+    @writes
     def add_flight(self, origin: str, destination: str, distance: int) -> None:
-        """Añade un vuelo (arista) entre dos aeropuertos."""
-        self.graph.add_edge(origin, destination, weight=distance)
+        """Añade un vuelo (arista) entre dos aeropuertos; si ya existe cambia su distancia."""
+        if self.has_flight(origin, destination):
+            self.update_flight(origin, destination, distance)
+            return
+        for code in (origin, destination):
+            if not self.has_airport(code):
+                self.add_airport(code, "", "", "")
+        csr = self._patchable()
+        if self._graph is not None:
+            self._graph.add_edge(origin, destination, weight=distance)
+        if csr is not None:
+            a, b = csr.index[origin], csr.index[destination]
+            csr.add_edge(a, b, distance)
+            self._repair(csr, "edge_added", a, b)
+        # Un bucle cuenta dos veces en el grado, como en NetworkX
+        self.degrees.change(origin, 1)
+        self.degrees.change(destination, 1)
+        self._commit(csr)
+    
+    @writes
+    def update_flight(self, origin: str, destination: str, distance: int) -> bool:
+        """Cambia la distancia de un vuelo; False si no existe."""
+        if not self.has_flight(origin, destination):
+            return False
+        csr = self._patchable()
+        if self._graph is not None:
+            old = self._graph[origin][destination].get("weight", 1)
+            self._graph[origin][destination]["weight"] = distance
+        if csr is not None:
+            a, b = csr.index[origin], csr.index[destination]
+            old = csr.edge_weight(a, b)
+            csr.set_weight(a, b, distance)
+            self._repair(csr, "weight_changed", a, b, old, distance)
+        self._commit(csr)
+        return True
     
+    @writes
+    def remove_flight(self, origin: str, destination: str) -> bool:
+        """Elimina un vuelo; False si no existe."""
+        if not self.has_flight(origin, destination):
+            return False
+        csr = self._patchable()
+        if self._graph is not None:
+            self._graph.remove_edge(origin, destination)
+        if csr is not None:
+            a, b = csr.index[origin], csr.index[destination]
+            csr.remove_edge(a, b)
+            self._repair(csr, "edge_removed", a, b)
+        self.degrees.change(origin, -1)
+        self.degrees.change(destination, -1)
+        self._commit(csr)
+        return True
+    
+    @writes
     def load_data(self, airports: List[Dict], flights: List[Dict]) -> None:
         """Carga los datos de aeropuertos y vuelos al grafo."""
+        self.cache.clear()
+        if self.number_of_airports() == 0:
+            self._load_columnar(airports, flights)
+            return
         for airport in airports:
-            self.add_airport(
+            self.graph.add_node(
                 airport["code"],
-                airport["name"],
-                airport["city"],
-                airport["country"]
+                name=airport["name"],
+                city=airport["city"],
+                country=airport["country"]
             )
+            if airport.get("lat") is not None:
+                self.graph.nodes[airport["code"]].update(lat=float(airport["lat"]), lon=float(airport["lon"]))
         for flight in flights:
-            self.add_flight(
-                flight["origin"],
-                flight["destination"],
-                flight["distance"]
-            )
+            self.graph.add_edge(flight["origin"], flight["destination"], weight=flight["distance"])
+        self.version += 1
+        # Carga masiva: el índice de grados se reconstruye de una vez
+        self.degrees = DegreeIndex.from_degrees(list(self.graph.nodes), [d for _, d in self.graph.degree()])
+        # Precalcular los landmarks de ALT y el índice espacial para que la primera consulta no los pague
+        self.routes
+        self.spatial
+    
+    def _load_columnar(self, airports: List[Dict], flights: List[Dict]) -> None:
+        """Carga masiva en un grafo vacío: columnas + CSR, sin pasar por NetworkX.
+
+        Mismo resultado que add_airport/add_flight: un vuelo repetido conserva
+        la posición de su primera aparición y la distancia de la última.
+        """
+        index: Dict[str, int] = {}
+        columns: Dict[str, List] = {attribute: [] for attribute in ATTRIBUTES + COORDINATES}
+        
+        def intern(code: str) -> int:
+            if code not in index:
+                index[code] = len(index)
+                for attribute in ATTRIBUTES:
+                    columns[attribute].append("")
+                for coordinate in COORDINATES:
+                    columns[coordinate].append(math.nan)
+            return index[code]
+        
+        for airport in airports:
+            i = intern(airport["code"])
+            for attribute in ATTRIBUTES:
+                columns[attribute][i] = airport[attribute]
+            if airport.get("lat") is not None:
+                for coordinate in COORDINATES:
+                    columns[coordinate][i] = float(airport[coordinate])
+        src = np.fromiter((intern(flight["origin"]) for flight in flights), dtype=np.int64, count=len(flights))
+        dst = np.fromiter((intern(flight["destination"]) for flight in flights), dtype=np.int64, count=len(flights))
+        weights = np.fromiter((flight["distance"] for flight in flights), dtype=np.float64, count=len(flights))
+        n = len(index)
+        keys = np.minimum(src, dst) * n + np.maximum(src, dst)
+        _, first = np.unique(keys, return_index=True)
+        _, last = np.unique(keys[::-1], return_index=True)
+        last = len(keys) - 1 - last
+        order = np.argsort(first)
+        csr = CSRGraph.from_edges(list(index), src[first][order], dst[first][order], weights[last][order])
+        self._set_arrays(csr, columns)
+        self.routes
+        self.spatial
+    
+    @writes
+    def load_stream(self, airports_path: str, flights_path: str,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> IngestReport:
+        """Sustituye el grafo leyendo los JSON en streaming (validados, por bloques).
+
+        A diferencia de load_data, un vuelo repetido conserva la distancia mínima.
+        """
+        csr, columns, report = ingest_files(airports_path, flights_path, chunk_size)
+        self.cache.clear()
+        self._set_arrays(csr, columns)
+        self.routes
+        self.spatial
+        return report
+    
+    @writes
+    def clear(self) -> None:
+        """Vacía el grafo (p. ej. antes de recargar datos nuevos)."""
+        self.cache.clear()
+        self._set_arrays(CSRGraph.empty(), {attribute: [] for attribute in ATTRIBUTES + COORDINATES})
     
+    def _set_arrays(self, csr: CSRGraph, columns: Dict) -> None:
+        """Sustituye el contenido del grafo por una vista CSR y sus columnas."""
+        self.version += 1
+        self._graph = None
+        self._columns = columns
+        self._csr = csr
+        self._csr_version = self.version
+        self.degrees = DegreeIndex.from_degrees(csr.codes, csr.degrees)
+    
+    @writes
+    def load_snapshot(self, path: str, checksum: Optional[str] = None) -> bool:
+        """Sustituye el grafo por un snapshot binario; False si no existe o está obsoleto."""
+        snapshot = read_snapshot(path, checksum)
+        if snapshot is None:
+            return False
+        self.cache.clear()
+        self._set_arrays(snapshot.csr, snapshot.columns)
+        if self.num_landmarks > 0 and snapshot.landmarks is not None:
+            self._routes = RouteEngine(snapshot.csr, landmarks=snapshot.landmarks,
+                                       landmark_dist=snapshot.landmark_dist)
+            self._routes_version = self.version
+        else:
+            self.routes
+        self.spatial
+        return True
+    
+    @writes
+    def load_oracle(self, path: str, checksum: Optional[str]) -> bool:
+        """Adjunta un oráculo de distancias si existe y corresponde a los datos cargados."""
+        self._oracle = DistanceOracle.load(path, checksum)
+        self._oracle_version = self.version
+        self.cache.clear()
+        return self._oracle is not None
+    
+    @reads
+    def reachable(self, origin: str, destination: str) -> bool:
+        """Si existe algún camino entre los dos aeropuertos (O(1) con las componentes)."""
+        index = self.csr.index
+        if origin not in index or destination not in index:
+            return False
+        return self.components.same(index[origin], index[destination])
+    
+    def _unreachable(self, origin: str, destination: str, operation: str) -> bool:
+        """True (y se cuenta) si ambos aeropuertos existen pero están en componentes distintas."""
+        index = self.csr.index
+        if origin not in index or destination not in index or self.reachable(origin, destination):
+            return False
+        UNREACHABLE_QUERIES.inc(operation=operation)
+        return True
+    
+    @reads
+    def get_components(self) -> Dict:
+        """Número de componentes conexas y sus tamaños, de mayor a menor."""
+        sizes = self.components.sizes()
+        return {"total_components": len(sizes), "is_connected": len(sizes) == 1, "sizes": sizes}
+    
+    @reads
+    def component_size(self, airport: str) -> Optional[int]:
+        """Aeropuertos de la componente de airport (él incluido); None si no existe."""
+        index = self.csr.index
+        return self.components.size(index[airport]) if airport in index else None
+    
+    @cached("route")
+    def route(self, origin: str, destination: str, algorithm: Optional[str] = None) -> Optional[Dict]:
+        """Camino, distancia, escalas y nodos asentados con una única búsqueda."""
+        # Componentes distintas: no hace falta buscar para saber que no hay camino
+        if self._unreachable(origin, destination, "route"):
+            return None
+        # El oráculo solo es válido mientras el grafo no cambie tras adjuntarlo
+        if algorithm is None and self._oracle is not None and self._oracle_version == self.version:
+            ROUTE_SEARCHES.inc(algorithm="oracle")
+            return self._oracle.route(origin, destination)
+        # Con coordenadas en todos los aeropuertos A* suma la cota geodésica a la de landmarks
+        bound = self.spatial.bound if self.spatial.available else None
+        if algorithm is None:
+            algorithm = "alt" if self.num_landmarks > 0 or bound is not None else "bidirectional"
+        return self.routes.query(origin, destination, algorithm, bound)
+    
+    @cached("routes_from")
+    def routes_from(self, origin: str, destinations: Tuple[str, ...]) -> Dict[str, Optional[Dict]]:
+        """Rutas desde un origen a varios destinos con una sola búsqueda."""
+        if self._oracle is not None and self._oracle_version == self.version:
+            ROUTE_SEARCHES.inc(len(destinations), algorithm="oracle")
+            return {destination: self._oracle.route(origin, destination) for destination in destinations}
+        index = self.csr.index
+        if origin not in index:
+            return {destination: None for destination in destinations}
+        found = self.trees.routes(index[origin], [index[d] for d in destinations if d in index])
+        return {destination: found.get(index.get(destination)) for destination in destinations}
+    
+    @cached("shortest_path")
     def shortest_path(self, origin: str, destination: str) -> Optional[List[str]]:
         """Devuelve el camino más corto entre dos aeropuertos."""
+        if self._use_csr():
+            result = self.route(origin, destination)
+            return result["path"] if result else None
+        if self._unreachable(origin, destination, "shortest_path"):
+            return None
+        import networkx as nx
         try:
             return nx.shortest_path(self.graph, origin, destination, weight="weight")
         except nx.NetworkXNoPath:
             return None
     
+    @cached("shortest_path_distance")
     def shortest_path_distance(self, origin: str, destination: str) -> Optional[int]:
         """Devuelve la distancia del camino más corto."""
+        if self._use_csr():
+            result = self.route(origin, destination)
+            return result["distance"] if result else None
+        if self._unreachable(origin, destination, "shortest_path"):
+            return None
+        import networkx as nx
         try:
             return nx.shortest_path_length(self.graph, origin, destination, weight="weight")
         except nx.NetworkXNoPath:
             return None
     
+    @cached("all_paths")
     def all_paths(self, origin: str, destination: str, max_length: int = 5) -> List[List[str]]:
         """Devuelve todos los caminos entre dos aeropuertos (limitado)."""
-        try:
-            paths = list(nx.all_simple_paths(self.graph, origin, destination, cutoff=max_length))
-            return paths
-        except nx.NetworkXNoPath:
+        return list(self.iter_paths(origin, destination, max_length))
+    
+    @cached("k_shortest_paths")
+    def k_shortest_paths(self, origin: str, destination: str, k: int = 3) -> List[Dict]:
+        """Los k caminos simples más cortos (path, distance, stops) en orden creciente de distancia."""
+        index = self.csr.index
+        if origin not in index or destination not in index or self._unreachable(origin, destination, "k_paths"):
             return []
+        # El árbol hacia el destino se reutiliza entre búsquedas y consultas (y se repara al mutar)
+        dist, pred = self.trees.get(index[destination])
+        search = KShortestPaths(self.csr, index[destination], dist, pred)
+        paths = search.run(index[origin], k)
+        ROUTE_SEARCHES.inc(search.searches, algorithm="spur")
+        ROUTE_SETTLED.inc(search.settled, algorithm="spur")
+        codes = self.csr.codes
+        return [
+            {"path": [codes[node] for node in path], "distance": as_number(distance), "stops": len(path) - 2}
+            for path, distance in paths
+        ]
+    
+    @cached("distance_matrix")
+    def distance_matrix(self, origins: Tuple[str, ...], destinations: Tuple[str, ...],
+                        predecessors: bool = False) -> Dict:
+        """Distancias mínimas de cada origen a cada destino (None si no hay camino).
+
+        Con predecessors añade airports (aeropuertos de los caminos) y predecessors:
+        matriz int32 little-endian (origen x airports) en base64 con la posición en
+        airports del predecesor en el camino mínimo desde el origen (-1 si no hay).
+        """
+        index = self.csr.index
+        unknown = [code for code in dict.fromkeys(origins + destinations) if code not in index]
+        if unknown:
+            raise ValueError(f"Unknown airports: {', '.join(unknown)}")
+        if self._sparse_version != self.version:
+            # Una conversión por versión del grafo, compartida por todas las consultas
+            self._sparse = sparse_matrix(self.csr)
+            self._sparse_version = self.version
+        found = distance_matrix(self.csr, [index[code] for code in origins],
+                                [index[code] for code in destinations], self._sparse, predecessors)
+        result = {
+            "origins": list(origins),
+            "destinations": list(destinations),
+            "distances": [[as_number(d) if math.isfinite(d) else None for d in row]
+                          for row in found["distances"].tolist()]
+        }
+        if predecessors:
+            codes = self.csr.codes
+            result["airports"] = [codes[i] for i in found["airports"].tolist()]
+            result["predecessors"] = encode_array(found["predecessors"])
+        return result
     
+    @reads
+    def iter_paths(self, origin: str, destination: str, max_length: int = 5,
+                   cursor: Optional[str] = None, budget: Optional[Budget] = None) -> PathEnumerator:
+        """Enumerador perezoso de caminos; su método cursor() permite reanudarlo.
+
+        Se recorre fuera del cerrojo: toma los arrays del CSR al crearse y las
+        mutaciones los sustituyen (set_weight copia al escribir), así que ve
+        una foto fija.
+        """
+        # Sin camino posible el DFS recorrería todo hasta max_length para no encontrar nada
+        reachable = not self._unreachable(origin, destination, "paths")
+        return PathEnumerator(self.csr, origin, destination, max_length, self.version, cursor, reachable, budget)
+    
+    @cached("paths_page", keep=_finished_in_time)
+    def paths_page(self, origin: str, destination: str, max_length: int = 5,
+                   limit: int = 100, cursor: Optional[str] = None,
+                   time_budget: Optional[float] = None, node_budget: Optional[int] = None) -> Dict:
+        """Devuelve una página de caminos y el cursor de la siguiente (None si no hay más).
+
+        Con presupuesto la página puede quedarse corta: truncated indica que se
+        paró por agotarlo (exhausted: "expansions" o "time") y next_cursor
+        continúa desde ese punto.
+        """
+        budget = Budget(time_budget, node_budget) if time_budget is not None or node_budget is not None else None
+        enumerator = self.iter_paths(origin, destination, max_length, cursor, budget)
+        paths = list(itertools.islice(enumerator, limit))
+        if enumerator.truncated:
+            QUERIES_TRUNCATED.inc(operation="paths", reason=budget.exhausted)
+        return {
+            "paths": paths,
+            "next_cursor": enumerator.cursor(),
+            "truncated": enumerator.truncated,
+            "exhausted": budget.exhausted if enumerator.truncated else None
+        }
+    
+    @cached("nearby")
+    def nearby(self, lat: float, lon: float, radius_km: float, limit: Optional[int] = None) -> List[Dict]:
+        """Aeropuertos a como mucho radius_km de un punto, del más cercano al más lejano."""
+        codes = self.csr.codes
+        return [
+            {"code": codes[i], "distance_km": round(distance, 1)}
+            for i, distance in self.spatial.nearby(lat, lon, radius_km, limit)
+        ]
+    
+    @cached("reachable_within")
+    def reachable_within(self, origins: Tuple[str, ...], max_stops: int) -> Dict[str, Optional[List[Dict]]]:
+        """Aeropuertos alcanzables desde cada origen con como mucho max_stops escalas.
+
+        Cada uno con sus escalas mínimas, de menos a más; None si el origen no existe.
+        Todos los orígenes se expanden a la vez (ver models.reach).
+        """
+        index = self.csr.index
+        known = [origin for origin in dict.fromkeys(origins) if origin in index]
+        hops = hop_matrix(self.csr, [index[origin] for origin in known], max_stops + 1)
+        codes = self.csr.codes
+        result: Dict[str, Optional[List[Dict]]] = {origin: None for origin in origins}
+        for origin, row in zip(known, hops):
+            reached = np.flatnonzero(row > 0)
+            reached = reached[np.argsort(row[reached], kind="stable")]
+            result[origin] = [{"airport": codes[i], "stops": int(row[i]) - 1} for i in reached.tolist()]
+        return result
+    
+    @reads
+    def reachability_matrix(self, max_stops: int, origins: Optional[List[str]] = None) -> np.ndarray:
+        """Vuelos mínimos de cada origen (todos por defecto) a cada aeropuerto, en el orden de csr.codes.
+
+        0 en el propio origen y -1 si no se llega con max_stops escalas.
+        """
+        index = self.csr.index
+        unknown = [origin for origin in origins or () if origin not in index]
+        if unknown:
+            raise ValueError(f"Unknown airports: {', '.join(unknown)}")
+        sources = range(self.csr.number_of_nodes()) if origins is None else [index[origin] for origin in origins]
+        return hop_matrix(self.csr, sources, max_stops + 1)
+    
+    @reads
     def get_hubs(self, top_n: int = 5) -> List[Dict]:
         """Devuelve los aeropuertos con más conexiones."""
-        degrees = sorted(self.graph.degree(), key=lambda x: x[1], reverse=True)
-        return [{"airport": code, "connections": degree} for code, degree in degrees[:top_n]]
+        return [{"airport": code, "connections": degree} for code, degree in self.degrees.top(top_n)]
     
+    @reads
     def get_isolated_nodes(self) -> List[str]:
         """Devuelve aeropuertos sin conexiones."""
-        return list(nx.isolates(self.graph))
+        return self.degrees.nodes_with(0)
     
+    @reads
     def get_connections(self, airport: str) -> List[str]:
         """Devuelve los aeropuertos conectados directamente."""
+        if self._use_csr():
+            return self.csr.neighbors(airport)
         if airport in self.graph:
             return list(self.graph.neighbors(airport))
         return []
     
+    @reads
     def get_nodes_by_degree(self, degree: int) -> List[str]:
         """Devuelve aeropuertos con un número específico de conexiones."""
-        return [node for node, deg in self.graph.degree() if deg == degree]
+        return self.degrees.nodes_with(degree)
+    
+    @cached("centrality_scores")
+    def centrality_scores(self, k: int = DEFAULT_PIVOTS, weighted: bool = False, seed: int = 0) -> Dict:
+        """Betweenness y closeness de todos los aeropuertos con k pivotes (ver models.centrality)."""
+        components = self.components
+        sizes = np.array([len(components.members[label]) for label in components.labels], dtype=np.float64)
+        return approximate_centrality(self.csr, sizes, k, weighted, seed, version=self.version)
+    
+    @cached("centrality")
+    def centrality(self, metric: str = "betweenness", k: int = DEFAULT_PIVOTS, top: int = 10,
+                   weighted: bool = False, seed: int = 0) -> Dict:
+        """Los top aeropuertos más centrales según metric, con la cota de error de la estimación."""
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        scores = self.centrality_scores(k, weighted, seed)
+        values = scores[metric]
+        # Mayor valor primero; empates por orden de alta del aeropuerto
+        order = np.lexsort((np.arange(len(values)), -values))[:top]
+        codes = self.csr.codes
+        return {
+            "metric": metric,
+            "pivots": scores["pivots"],
+            "exact": scores["exact"],
+            "error_bound": scores["error_bound"][metric],
+            "confidence": CONFIDENCE,
+            "ranking": [{"airport": codes[i], "value": float(values[i])} for i in order.tolist()]
+        }
     
+    @cached("clusters")
     def get_clusters(self) -> List[List[str]]:
         """Detecta comunidades/clusters en el grafo."""
+        # Import perezoso: solo /clusters paga la carga de community detection
+        import networkx as nx
         communities = nx.community.greedy_modularity_communities(self.graph)
         return [list(community) for community in communities]
     
+    @reads
     def longest_path(self, origin: str, destination: str) -> Optional[List[str]]:
-        """Devuelve el camino más largo sin ciclos (aproximado)."""
-        try:
-            all_paths = list(nx.all_simple_paths(self.graph, origin, destination, cutoff=10))
-            if not all_paths:
-                return None
-            return max(all_paths, key=len)
-        except nx.NetworkXNoPath:
-            return None
+        """Devuelve el camino más largo sin ciclos (aproximado si se agota el tiempo)."""
+        # Sin caché propia: longest_path_search ya cachea, salvo si se cortó por el reloj
+        result = self.longest_path_search(origin, destination)
+        return result["path"] if result else None
+    
+    @cached("longest_path_search", keep=_finished_in_time)
+    def longest_path_search(self, origin: str, destination: str, weighted: bool = False,
+                            time_budget: Optional[float] = DEFAULT_TIME_BUDGET,
+                            node_budget: Optional[int] = None) -> Optional[Dict]:
+        """Camino simple más largo (en vuelos o en distancia) con presupuesto de tiempo/nodos."""
+        search = LongestPathSearch(self.csr, weighted, time_budget, node_budget)
+        result = search.run(origin, destination)
+        LONGEST_EXPANSIONS.inc(search.expanded)
+        LONGEST_SEARCHES.inc(result="none" if result is None else "approximate" if result["approximate"] else "exact")
+        return result
     
+    @reads
     def get_all_airports(self) -> List[Dict]:
-        """Devuelve todos los aeropuertos con su información."""
+        """Devuelve todos los aeropuertos con su información (lat/lon si las tienen)."""
+        if self._graph is None:
+            columns = self._column_values()
+            airports = [
+                dict(code=code, **dict(zip(ATTRIBUTES, values)))
+                for code, *values in zip(self.csr.codes, *columns)
+            ]
+            lat, lon = self._coordinates()
+            for airport, y, x in zip(airports, lat.tolist(), lon.tolist()):
+                if not math.isnan(y):
+                    airport.update(lat=y, lon=x)
+            return airports
         airports = []
         for node in self.graph.nodes(data=True):
             airports.append({
@@ -102,13 +759,19 @@ class FlightGraph:
                 "city": node[1].get("city", ""),
                 "country": node[1].get("country", "")
             })
+            if "lat" in node[1]:
+                airports[-1].update(lat=node[1]["lat"], lon=node[1]["lon"])
         return airports
     
+    @cached("stats")
     def get_graph_stats(self) -> Dict:
         """Devuelve estadísticas generales del grafo."""
+        # Con ambos backends: la vista CSR y las componentes se mantienen en cada
+        # mutación, así que no hay que recorrer el grafo en cada consulta
+        csr = self.csr
         return {
-            "total_airports": self.graph.number_of_nodes(),
-            "total_flights": self.graph.number_of_edges(),
-            "density": nx.density(self.graph),
-            "is_connected": nx.is_connected(self.graph)
+            "total_airports": csr.number_of_nodes(),
+            "total_flights": csr.number_of_edges(),
+            "density": csr.density(),
+            "is_connected": self.components.is_connected()
         }
\ No newline at end of file
@@ -0,0 +1,186 @@
+"""
+Ingesta en streaming de aeropuertos y vuelos.
+Los JSON se leen elemento a elemento, cada registro se valida y los vuelos se
+acumulan en bloques que se fusionan con NumPy quedándose, para cada par de
+aeropuertos, con la distancia mínima. La memoria depende del grafo (aristas
+únicas), no del tamaño de los ficheros.
+"""
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.csr import CSRGraph
+from models.snapshot import ATTRIBUTES, COORDINATES
+from models.spatial import valid_coordinates
+from utils.helpers import iter_json_array
+
+DEFAULT_CHUNK_SIZE = 65536
+
+
+class IngestReport:
+    """Contadores de una ingesta: registros, rechazados por motivo y rendimiento."""
+
+    def __init__(self):
+        self.airports = 0
+        self.flights = 0
+        self.duplicates = 0
+        self.rejected: Dict[str, int] = {}
+        self.seconds = 0.0
+
+    def reject(self, reason: str) -> None:
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+
+    @property
+    def records(self) -> int:
+        return self.airports + self.flights + sum(self.rejected.values())
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds > 0 else 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            'records': self.records,
+            'airports': self.airports,
+            'flights': self.flights,
+            'duplicates': self.duplicates,
+            'rejected': dict(self.rejected),
+            'seconds': round(self.seconds, 3),
+            'records_per_second': round(self.records_per_second, 1)
+        }
+
+
+def validate_airport(record) -> Optional[str]:
+    """Motivo de rechazo de un aeropuerto; None si es válido."""
+    if not isinstance(record, dict):
+        return 'not_an_object'
+    code = record.get('code')
+    if not isinstance(code, str) or not code:
+        return 'invalid_code'
+    if not all(isinstance(record.get(attribute), str) for attribute in ATTRIBUTES):
+        return 'missing_attribute'
+    # Coordenadas opcionales, pero las dos juntas y en rango
+    coordinates = [record.get(coordinate) for coordinate in COORDINATES]
+    if coordinates != [None, None] and not valid_coordinates(*coordinates):
+        return 'invalid_coordinates'
+    return None
+
+
+def validate_flight(record, index: Dict[str, int]) -> Optional[str]:
+    """Motivo de rechazo de un vuelo; None si es válido."""
+    if not isinstance(record, dict):
+        return 'not_an_object'
+    origin, destination = record.get('origin'), record.get('destination')
+    if not isinstance(origin, str) or not isinstance(destination, str):
+        return 'missing_endpoint'
+    if origin not in index or destination not in index:
+        return 'unknown_airport'
+    distance = record.get('distance')
+    if isinstance(distance, bool) or not isinstance(distance, (int, float)):
+        return 'invalid_distance'
+    if not math.isfinite(distance) or distance < 0:
+        return 'invalid_distance'
+    return None
+
+
+class EdgeAccumulator:
+    """Aristas no dirigidas únicas con su distancia mínima, fusionadas por bloques.
+
+    Cada arista conserva la posición de su primera aparición, que decide el
+    orden de los vecinos en el CSR (igual que load_data).
+    """
+
+    def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.received = 0
+        self._keys = np.empty(0, dtype=np.int64)
+        self._seqs = np.empty(0, dtype=np.int64)
+        self._weights = np.empty(0, dtype=np.float64)
+        self._src: List[int] = []
+        self._dst: List[int] = []
+        self._pending: List[float] = []
+
+    def add(self, a: int, b: int, weight: float) -> None:
+        self._src.append(a)
+        self._dst.append(b)
+        self._pending.append(weight)
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        src = np.asarray(self._src, dtype=np.int64)
+        dst = np.asarray(self._dst, dtype=np.int64)
+        # Clave no dirigida: (menor << 32) | mayor
+        keys = (np.minimum(src, dst) << 32) | np.maximum(src, dst)
+        seqs = np.arange(self.received, self.received + len(keys), dtype=np.int64)
+        self.received += len(keys)
+        keys = np.concatenate([self._keys, keys])
+        seqs = np.concatenate([self._seqs, seqs])
+        weights = np.concatenate([self._weights, np.asarray(self._pending, dtype=np.float64)])
+        order = np.argsort(keys, kind='stable')
+        keys, seqs, weights = keys[order], seqs[order], weights[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        self._keys = keys[starts]
+        self._seqs = np.minimum.reduceat(seqs, starts)
+        self._weights = np.minimum.reduceat(weights, starts)
+        self._src, self._dst, self._pending = [], [], []
+
+    def __len__(self) -> int:
+        self.flush()
+        return len(self._keys)
+
+    def edges(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(origen, destino, distancia) en orden de primera aparición."""
+        self.flush()
+        order = np.argsort(self._seqs)
+        keys = self._keys[order]
+        return keys >> 32, keys & 0xFFFFFFFF, self._weights[order]
+
+
+def ingest_files(airports_path: str, flights_path: str,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[CSRGraph, Dict[str, List], IngestReport]:
+    """Lee y valida los JSON en streaming; devuelve el CSR, las columnas y el informe."""
+    report = IngestReport()
+    start = time.perf_counter()
+    index: Dict[str, int] = {}
+    columns: Dict[str, List] = {attribute: [] for attribute in ATTRIBUTES + COORDINATES}
+    for record in iter_json_array(airports_path):
+        reason = validate_airport(record)
+        if reason is not None:
+            report.reject(reason)
+            continue
+        code = record['code']
+        values = [record[attribute] for attribute in ATTRIBUTES]
+        values += [math.nan if record.get(coordinate) is None else float(record[coordinate])
+                   for coordinate in COORDINATES]
+        if code not in index:
+            index[code] = len(index)
+            for attribute, value in zip(ATTRIBUTES + COORDINATES, values):
+                columns[attribute].append(value)
+        else:
+            # Un código repetido actualiza sus atributos, como add_airport
+            for attribute, value in zip(ATTRIBUTES + COORDINATES, values):
+                columns[attribute][index[code]] = value
+        report.airports += 1
+    edges = EdgeAccumulator(chunk_size)
+    for record in iter_json_array(flights_path):
+        # Camino rápido para registros bien formados; validate_flight da el motivo si no
+        try:
+            a, b, distance = index[record['origin']], index[record['destination']], record['distance']
+            valid = type(distance) in (int, float) and 0 <= distance < math.inf
+        except (KeyError, TypeError):
+            valid = False
+        if not valid:
+            report.reject(validate_flight(record, index) or 'invalid_distance')
+            continue
+        edges.add(a, b, distance)
+        report.flights += 1
+    src, dst, weights = edges.edges()
+    report.duplicates = edges.received - len(src)
+    csr = CSRGraph.from_edges(list(index), src, dst, weights)
+    report.seconds = time.perf_counter() - start
+    return csr, columns, report
@@ -0,0 +1,147 @@
+"""
+Los k caminos simples más cortos entre dos aeropuertos (algoritmo de Yen).
+Cada camino nuevo se obtiene desviando uno anterior en un nodo "spur": se
+prohíben los nodos de la raíz y los vuelos ya usados desde ese spur y se busca
+el resto del camino. Las búsquedas de spur usan el árbol de caminos mínimos
+hacia el destino: si la rama del árbol no toca nada prohibido es directamente
+la óptima y, si no, sirve de heurística exacta para un A* muy dirigido (quitar
+nodos o vuelos solo alarga distancias, así que sigue siendo admisible).
+Con la mejora de Lawler solo se desvía cada camino a partir del nodo donde se
+separó de su padre, así que el coste crece con k y no con el número de caminos.
+"""
+import heapq
+import math
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from models.csr import CSRGraph
+
+# Número máximo de caminos por consulta de /k-shortest-paths
+MAX_K = 100
+# Nodos explorados alrededor del destino para descartar un spur sin camino
+POCKET_LIMIT = 256
+
+
+class KShortestPaths:
+    """Caminos simples hacia target en orden creciente de distancia."""
+
+    def __init__(self, csr: CSRGraph, target: int, dist: np.ndarray, pred: np.ndarray):
+        # dist/pred: árbol de caminos mínimos con raíz en target (grafo no dirigido)
+        self.csr = csr
+        self.target = target
+        self._h = dist.tolist()
+        self._pred = pred.tolist()
+        self.searches = 0
+        self.settled = 0
+        # Spurs resueltos con la rama del árbol, sin expandir ningún nodo
+        self.reused = 0
+
+    def run(self, source: int, k: int) -> List[Tuple[List[int], float]]:
+        """Hasta k caminos (nodos, distancia) de source a target, del más corto al más largo."""
+        if k < 1 or not math.isfinite(self._h[source]):
+            return []
+        first = self._tree_path(source, set(), set())
+        paths = [(first, self._h[source])]
+        deviations = [0]
+        candidates: List[Tuple[float, int, List[int], int]] = []
+        seen = {tuple(first)}
+        while len(paths) < k:
+            last, deviation = paths[-1][0], deviations[-1]
+            prefix = sum(self.csr.edge_weight(a, b) for a, b in zip(last[:deviation], last[1:deviation + 1]))
+            for i in range(deviation, len(last) - 1):
+                spur, root = last[i], last[:i + 1]
+                # Vuelos desde el spur de los caminos que comparten esta raíz
+                blocked = {path[i + 1] for path, _ in paths if len(path) > i + 1 and path[:i + 1] == root}
+                found = self._spur(spur, set(root[:-1]), blocked)
+                if found is not None:
+                    spur_path, spur_distance = found
+                    candidate = root[:-1] + spur_path
+                    if tuple(candidate) not in seen:
+                        seen.add(tuple(candidate))
+                        heapq.heappush(candidates, (prefix + spur_distance, len(candidate), candidate, i))
+                prefix += self.csr.edge_weight(spur, last[i + 1])
+            if not candidates:
+                break
+            distance, _, path, deviation = heapq.heappop(candidates)
+            paths.append((path, distance))
+            deviations.append(deviation)
+        return paths
+
+    def _tree_path(self, node: int, banned: Set[int], blocked: Set[int],
+                   avoid: int = -1) -> Optional[List[int]]:
+        """Rama del árbol desde node hasta target; None si pasa por algo prohibido."""
+        path = [node]
+        step = self._pred[node]
+        if step in blocked:
+            return None
+        while step != -1:
+            if step in banned or step == avoid:
+                return None
+            path.append(step)
+            step = self._pred[step]
+        return path
+
+    def _enclosed(self, spur: int, banned: Set[int], blocked: Set[int]) -> bool:
+        """True si target queda en una bolsa pequeña sin salida hacia el spur.
+
+        Sin esta comprobación, un spur sin camino (p. ej. el único vuelo del
+        destino ya está usado) haría que el A* recorriera toda la componente.
+        """
+        indptr, indices = self.csr.indptr, self.csr.indices
+        reached = {self.target}
+        frontier = [self.target]
+        while frontier:
+            u = frontier.pop()
+            for v in indices[indptr[u]:indptr[u + 1]].tolist():
+                if v == spur:
+                    if u not in blocked:
+                        return False
+                elif v not in reached and v not in banned:
+                    if len(reached) >= POCKET_LIMIT:
+                        return False
+                    reached.add(v)
+                    frontier.append(v)
+        return True
+
+    def _spur(self, spur: int, banned: Set[int], blocked: Set[int]) -> Optional[Tuple[List[int], float]]:
+        """Mejor camino spur -> target sin los nodos banned ni los vuelos spur -> blocked."""
+        h = self._h
+        if not math.isfinite(h[spur]):
+            return None
+        if self._enclosed(spur, banned, blocked):
+            return None
+        self.searches += 1
+        indptr, indices, weights = self.csr.indptr, self.csr.indices, self.csr.weights
+        best = {spur: 0.0}
+        pred = {spur: -1}
+        closed = set(banned)
+        heap = [(h[spur], spur)]
+        inf = float("inf")
+        while heap:
+            _, u = heapq.heappop(heap)
+            if u in closed:
+                continue
+            closed.add(u)
+            self.settled += 1
+            # Con h exacta y consistente, si la rama del árbol desde u está libre
+            # (y no vuelve al spur) completa un camino de coste f(u), que es mínimo
+            branch = (self._tree_path(u, banned, blocked) if u == spur
+                      else self._tree_path(u, banned, set(), spur))
+            if branch is not None:
+                self.reused += u == spur
+                path = [u]
+                while pred[path[-1]] != -1:
+                    path.append(pred[path[-1]])
+                return path[::-1] + branch[1:], best[u] + h[u]
+            d = best[u]
+            start, end = indptr[u], indptr[u + 1]
+            for v, w in zip(indices[start:end].tolist(), weights[start:end].tolist()):
+                if u == spur and v in blocked:
+                    continue
+                nd = d + w
+                if v not in closed and h[v] != inf and nd < best.get(v, inf):
+                    best[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd + h[v], v))
+        return None
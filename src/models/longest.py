@@ -0,0 +1,209 @@
+"""
+Búsqueda del camino simple más largo entre dos aeropuertos.
+Componentes pequeñas: DP exacta sobre subconjuntos (bitmask). Resto: DFS con
+ramificación y poda usando una cota superior por alcanzabilidad, limitada por
+tiempo y por número de expansiones; si el presupuesto se agota se devuelve el
+mejor camino encontrado marcado como aproximado.
+"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.csr import CSRGraph, as_number
+
+# Tamaño máximo de componente para la DP exacta (2^k * k estados)
+EXACT_LIMIT = 12
+DEFAULT_TIME_BUDGET = 5.0
+
+
+class BudgetExceeded(Exception):
+    """Se ha agotado el presupuesto de tiempo o de expansiones."""
+
+
+class LongestPathSearch:
+    """Camino simple más largo por número de vuelos o por distancia total."""
+
+    def __init__(self, csr: CSRGraph, weighted: bool = False,
+                 time_budget: Optional[float] = DEFAULT_TIME_BUDGET,
+                 node_budget: Optional[int] = None, exact_limit: int = EXACT_LIMIT):
+        self.csr = csr
+        self.weighted = weighted
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+        self.exact_limit = exact_limit
+        self.expanded = 0
+        # Motivo por el que se agotó el presupuesto ("expansions" o "time"); None si no se agotó
+        self.exhausted: Optional[str] = None
+        self._deadline = None
+
+    def run(self, origin: str, destination: str) -> Optional[Dict]:
+        """Devuelve path, hops, distance, approximate, exhausted y expanded; None si no hay ruta."""
+        index = self.csr.index
+        if origin not in index or destination not in index or origin == destination:
+            return None
+        source, target = index[origin], index[destination]
+        component = np.flatnonzero(self.csr.component_mask(source))
+        if target not in set(component.tolist()):
+            return None
+        self._prepare(component)
+        if self.time_budget is not None:
+            self._deadline = time.perf_counter() + self.time_budget
+        if len(component) <= self.exact_limit:
+            path, approximate = self._bitmask_dp(source, target), False
+        else:
+            path, approximate = self._branch_and_bound(source, target)
+        return self._result(path, approximate)
+
+    def _prepare(self, component: np.ndarray) -> None:
+        """Listas de adyacencia locales a la componente (con pesos)."""
+        self._adj: Dict[int, List[Tuple[int, float]]] = {}
+        for node in component.tolist():
+            neighbors, weights = self.csr.row(node)
+            self._adj[node] = [
+                (neighbor, weight if self.weighted else 1)
+                for neighbor, weight in zip(neighbors.tolist(), weights.tolist())
+                if neighbor != node
+            ]
+        # Ganancia máxima al entrar en un nodo: cota de lo que puede aportar
+        self._gain = {
+            node: max((weight for _, weight in edges), default=0)
+            for node, edges in self._adj.items()
+        }
+
+    def _tick(self) -> None:
+        self.expanded += 1
+        if self.node_budget is not None and self.expanded > self.node_budget:
+            self.exhausted = "expansions"
+            raise BudgetExceeded()
+        if self._deadline is not None and self.expanded % 256 == 0 and time.perf_counter() > self._deadline:
+            self.exhausted = "time"
+            raise BudgetExceeded()
+
+    def _bound(self, start: int, visited: set, target: int) -> Optional[float]:
+        """Cota superior de lo que queda desde start; None si target es inalcanzable."""
+        seen = {start}
+        queue = [start]
+        extra = 0.0
+        reachable = False
+        for node in queue:
+            for neighbor, _ in self._adj[node]:
+                if neighbor in seen or neighbor in visited:
+                    continue
+                seen.add(neighbor)
+                extra += self._gain[neighbor]
+                if neighbor == target:
+                    # El destino cierra el camino: no se sigue explorando a través de él
+                    reachable = True
+                    continue
+                queue.append(neighbor)
+        return extra if reachable else None
+
+    def _branch_and_bound(self, source: int, target: int) -> Tuple[Optional[List[int]], bool]:
+        best_value = -1.0
+        best_path: Optional[List[int]] = None
+        path = [source]
+        values = [0.0]
+        visited = {source}
+        stack = [iter(self._adj[source])]
+        try:
+            while stack:
+                try:
+                    neighbor, weight = next(stack[-1])
+                except StopIteration:
+                    stack.pop()
+                    visited.discard(path.pop())
+                    values.pop()
+                    continue
+                if neighbor in visited:
+                    continue
+                value = values[-1] + weight
+                if neighbor == target:
+                    if value > best_value:
+                        best_value, best_path = value, path + [target]
+                    continue
+                self._tick()
+                visited.add(neighbor)
+                bound = self._bound(neighbor, visited, target)
+                if bound is None or value + bound <= best_value:
+                    visited.discard(neighbor)
+                    continue
+                path.append(neighbor)
+                values.append(value)
+                stack.append(iter(self._adj[neighbor]))
+        except BudgetExceeded:
+            return best_path or self._fallback(source, target), True
+        return best_path, False
+
+    def _bitmask_dp(self, source: int, target: int) -> Optional[List[int]]:
+        nodes = list(self._adj)
+        local = {node: i for i, node in enumerate(nodes)}
+        k = len(nodes)
+        s, t = local[source], local[target]
+        adj = [[(local[n], w) for n, w in self._adj[node]] for node in nodes]
+        # best[mask][v]: mejor valor de un camino desde s que usa mask y acaba en v
+        best: List[Dict[int, float]] = [dict() for _ in range(1 << k)]
+        parent: List[Dict[int, int]] = [dict() for _ in range(1 << k)]
+        best[1 << s][s] = 0.0
+        answer, answer_mask = -1.0, 0
+        for mask in range(1 << k):
+            for v, value in best[mask].items():
+                if v == t:
+                    if value > answer:
+                        answer, answer_mask = value, mask
+                    continue
+                for u, w in adj[v]:
+                    bit = 1 << u
+                    if mask & bit:
+                        continue
+                    candidate = value + w
+                    if candidate > best[mask | bit].get(u, -1.0):
+                        best[mask | bit][u] = candidate
+                        parent[mask | bit][u] = v
+            self.expanded += 1
+        if answer < 0:
+            return None
+        path = []
+        mask, v = answer_mask, t
+        while True:
+            path.append(nodes[v])
+            if v == s:
+                break
+            previous = parent[mask][v]
+            mask ^= 1 << v
+            v = previous
+        return path[::-1]
+
+    def _fallback(self, source: int, target: int) -> Optional[List[int]]:
+        """Sin ningún camino completo: se devuelve el camino mínimo en saltos."""
+        pred = {source: -1}
+        queue = [source]
+        for node in queue:
+            if node == target:
+                break
+            for neighbor, _ in self._adj[node]:
+                if neighbor not in pred:
+                    pred[neighbor] = node
+                    queue.append(neighbor)
+        path = []
+        node = target
+        while node != -1:
+            path.append(node)
+            node = pred[node]
+        return path[::-1]
+
+    def _result(self, path: Optional[List[int]], approximate: bool) -> Optional[Dict]:
+        if path is None:
+            return None
+        distance = 0.0
+        for a, b in zip(path, path[1:]):
+            neighbors, weights = self.csr.row(a)
+            distance += float(weights[np.flatnonzero(neighbors == b)[0]])
+        return {
+            "path": [self.csr.codes[node] for node in path],
+            "hops": len(path) - 1,
+            "distance": as_number(distance),
+            "approximate": approximate,
+            "exhausted": self.exhausted,
+            "expanded": self.expanded
+        }
@@ -0,0 +1,170 @@
+"""
+Matriz de distancias muchos-a-muchos (/distance-matrix).
+Con SciPy instalado la vista CSR se convierte a una scipy.sparse.csr_matrix
+una vez por versión del grafo y scipy.sparse.csgraph.dijkstra resuelve todos
+los orígenes en código compilado. SciPy es opcional: sin él se hace un
+Bellman-Ford síncrono con NumPy sobre un bloque de orígenes a la vez (cada
+ronda relaja, para todos los orígenes, los vuelos de los aeropuertos que
+cambiaron en la anterior). El grafo es no dirigido, así que sin predecesores
+se busca desde el lado con menos aeropuertos distintos y se traspone.
+Los predecesores se devuelven compactos: solo los aeropuertos que aparecen en
+algún camino pedido, como una matriz int32 (origen x aeropuerto) en base64.
+"""
+import base64
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models.csr import CSRGraph
+from utils.metrics import ROUTE_SEARCHES
+
+# Orígenes y destinos distintos por consulta
+MAX_MATRIX_AIRPORTS = 1000
+# Celdas (vuelos x orígenes) de cada bloque de la búsqueda sin SciPy
+BLOCK_CELLS = 1 << 22
+
+
+def parse_codes(value) -> Optional[Tuple[str, ...]]:
+    """Lista JSON o texto separado por comas a códigos en mayúsculas; None si no es válido."""
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, list) or not value or not all(isinstance(code, str) and code.strip() for code in value):
+        return None
+    return tuple(code.strip().upper() for code in value)
+
+
+def sparse_matrix(csr: CSRGraph):
+    """scipy.sparse.csr_matrix de la vista CSR; None si SciPy no está instalado."""
+    try:
+        from scipy.sparse import csr_matrix
+    except ImportError:
+        return None
+    n = csr.number_of_nodes()
+    # Los ceros explícitos de una matriz dispersa son vuelos de distancia 0 para csgraph
+    return csr_matrix((csr.weights, csr.indices, csr.indptr), shape=(n, n))
+
+
+def _scipy_search(sparse, sources: np.ndarray, predecessors: bool) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    from scipy.sparse.csgraph import dijkstra
+    found = dijkstra(sparse, directed=True, indices=sources, return_predecessors=predecessors)
+    if not predecessors:
+        return found, None
+    dist, pred = found
+    # csgraph marca "sin predecesor" con -9999
+    return dist, np.where(pred < 0, -1, pred)
+
+
+def _relax_block(csr: CSRGraph, sources: np.ndarray,
+                 predecessors: bool) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """Bellman-Ford síncrono de un bloque de orígenes: distancias y predecesores (n x orígenes)."""
+    n, k = csr.number_of_nodes(), len(sources)
+    columns = np.arange(k)
+    dist = np.full((n, k), np.inf)
+    dist[sources, columns] = 0.0
+    # Ronda en la que bajó por última vez cada distancia (para elegir predecesores)
+    level = np.full((n, k), np.iinfo(np.int32).max, dtype=np.int32)
+    level[sources, columns] = 0
+    degree = np.diff(csr.indptr)
+    weights = csr.weights[:, None]
+    changed = np.zeros(n, dtype=bool)
+    changed[sources] = True
+    rounds = 0
+    while changed.any():
+        rounds += 1
+        # Solo pueden mejorar los vecinos de los aeropuertos que cambiaron en la ronda anterior
+        nodes = np.unique(csr.gather(np.flatnonzero(changed)))
+        if not len(nodes):
+            break
+        lengths = degree[nodes]
+        offsets = np.cumsum(lengths) - lengths
+        edges = np.repeat(csr.indptr[nodes] - offsets, lengths) + np.arange(lengths.sum())
+        candidates = np.minimum.reduceat(dist[csr.indices[edges]] + weights[edges], offsets, axis=0)
+        better = candidates < dist[nodes]
+        dist[nodes] = np.where(better, candidates, dist[nodes])
+        level[nodes] = np.where(better, rounds, level[nodes])
+        changed[:] = False
+        changed[nodes[better.any(axis=1)]] = True
+    if not predecessors:
+        return dist, None
+    # Predecesor: el primer vecino con arista ajustada que se fijó en una ronda anterior
+    # (con vuelos de distancia 0 dos vecinos pueden empatar; la ronda evita ciclos)
+    rows = np.repeat(np.arange(n), degree)
+    tight = ((dist[csr.indices] + weights == dist[rows]) & (level[csr.indices] < level[rows]))
+    positions = np.where(tight, np.arange(len(csr.indices))[:, None], len(csr.indices))
+    pred = np.full((n, k), -1, dtype=np.int64)
+    nonempty = np.flatnonzero(degree)
+    if len(nonempty):
+        first = np.minimum.reduceat(positions, csr.indptr[nonempty], axis=0)
+        found = first < len(csr.indices)
+        pred[nonempty] = np.where(found, csr.indices[np.minimum(first, len(csr.indices) - 1)], -1)
+    return dist, pred
+
+
+def _numpy_search(csr: CSRGraph, sources: np.ndarray,
+                  predecessors: bool) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    n = csr.number_of_nodes()
+    dist = np.empty((len(sources), n))
+    pred = np.empty((len(sources), n), dtype=np.int64) if predecessors else None
+    block = max(1, BLOCK_CELLS // max(len(csr.indices), 1))
+    for start in range(0, len(sources), block):
+        found, parents = _relax_block(csr, sources[start:start + block], predecessors)
+        dist[start:start + block] = found.T
+        if predecessors:
+            pred[start:start + block] = parents.T
+    return dist, pred
+
+
+def _compact_predecessors(pred: np.ndarray, sources: np.ndarray,
+                          targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Aeropuertos de los caminos pedidos y sus predecesores como posiciones en esa tabla."""
+    rows = np.arange(len(sources))[:, None]
+    used = np.zeros(pred.shape, dtype=bool)
+    used[rows, targets[None, :]] = True
+    used[np.arange(len(sources)), sources] = True
+    # Se sube por los árboles desde todos los destinos a la vez hasta los orígenes
+    current = np.broadcast_to(targets, (len(sources), len(targets))).copy()
+    while True:
+        current = np.where(current >= 0, pred[rows, np.maximum(current, 0)], -1)
+        row, column = np.nonzero(current >= 0)
+        if not len(row):
+            break
+        used[row, current[row, column]] = True
+    table = np.flatnonzero(used.any(axis=0))
+    local = pred[:, table]
+    valid = used[:, table] & (local >= 0)
+    compact = np.where(valid, np.searchsorted(table, np.maximum(local, 0)), -1).astype("<i4")
+    return table, compact
+
+
+def distance_matrix(csr: CSRGraph, sources: Sequence[int], targets: Sequence[int],
+                    sparse=None, predecessors: bool = False) -> Dict:
+    """Distancias (len(sources) x len(targets), inf si no hay camino) y, si se piden, predecesores.
+
+    sparse es la matriz de sparse_matrix (None para la búsqueda con NumPy).
+    """
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    origins, rows = np.unique(sources, return_inverse=True)
+    destinations, columns = np.unique(targets, return_inverse=True)
+    # Sin predecesores basta con buscar desde el lado más pequeño (distancias simétricas)
+    swap = not predecessors and len(destinations) < len(origins)
+    starts, ends = (destinations, origins) if swap else (origins, destinations)
+    if sparse is not None:
+        dist, pred = _scipy_search(sparse, starts, predecessors)
+    else:
+        dist, pred = _numpy_search(csr, starts, predecessors)
+    ROUTE_SEARCHES.inc(len(starts), algorithm="matrix")
+    block = dist[:, ends]
+    if swap:
+        block = block.T
+    result = {"distances": block[rows][:, columns]}
+    if predecessors:
+        table, compact = _compact_predecessors(pred, origins, destinations)
+        result["airports"] = table
+        result["predecessors"] = compact[rows]
+    return result
+
+
+def encode_array(array: np.ndarray) -> str:
+    """Array little-endian en base64 (se decodifica con np.frombuffer y la forma)."""
+    return base64.b64encode(np.ascontiguousarray(array).tobytes()).decode()
@@ -0,0 +1,83 @@
+"""
+Oráculo de distancias precalculado (all-pairs shortest paths).
+Se construye offline y se abre con np.memmap, de modo que todos los procesos
+comparten las mismas páginas. Los caminos se reconstruyen con la matriz de
+siguiente salto en O(longitud del camino).
+"""
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models.csr import CSRGraph, as_number
+from utils.binfile import create_arrays, open_arrays
+
+KIND = "distance-oracle"
+
+
+class DistanceOracle:
+    """Tablas de distancias y siguientes saltos entre todos los aeropuertos."""
+
+    def __init__(self, codes: List[str], dist: np.ndarray, next_hop: np.ndarray, checksum: str):
+        self.codes = codes
+        self.index: Dict[str, int] = {code: i for i, code in enumerate(codes)}
+        # Fila j: distancias hacia j y siguiente salto desde cada nodo hacia j
+        self.dist = dist
+        self.next_hop = next_hop
+        self.checksum = checksum
+
+    @staticmethod
+    def build(csr: CSRGraph, path: str, checksum: str) -> None:
+        """Ejecuta un Dijkstra por nodo y escribe las tablas directamente en disco."""
+        n = csr.number_of_nodes()
+        tmp_path = path + ".tmp"
+        arrays = create_arrays(tmp_path, KIND, {"codes": csr.codes, "checksum": checksum}, {
+            "dist": ("<f8", (n, n)),
+            "next_hop": ("<i4", (n, n))
+        })
+        for target in range(n):
+            # En un grafo no dirigido el predecesor desde target es el siguiente salto hacia target
+            dist, pred = csr.dijkstra(target)
+            row = np.full(n, np.inf)
+            hops = np.full(n, -1, dtype=np.int32)
+            row[list(dist.keys())] = list(dist.values())
+            hops[list(pred.keys())] = list(pred.values())
+            arrays["dist"][target] = row
+            arrays["next_hop"][target] = hops
+        for array in arrays.values():
+            if isinstance(array, np.memmap):
+                array.flush()
+        del arrays
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, checksum: Optional[str] = None) -> Optional["DistanceOracle"]:
+        """Abre el oráculo; None si no existe o si los datos de origen han cambiado."""
+        opened = open_arrays(path, KIND)
+        if opened is None:
+            return None
+        header, arrays = opened
+        if checksum is not None and header["checksum"] != checksum:
+            return None
+        return cls(header["codes"], arrays["dist"], arrays["next_hop"], header["checksum"])
+
+    def route(self, origin: str, destination: str) -> Optional[Dict]:
+        """Consulta en tabla con el mismo formato que RouteEngine.query."""
+        if origin not in self.index or destination not in self.index:
+            return None
+        source, target = self.index[origin], self.index[destination]
+        distance = float(self.dist[target, source])
+        if np.isinf(distance):
+            return None
+        hops = self.next_hop[target]
+        path = [origin]
+        node = source
+        while node != target:
+            node = int(hops[node])
+            path.append(self.codes[node])
+        return {
+            "path": path,
+            "distance": as_number(distance),
+            "stops": len(path) - 2,
+            "settled": 0
+        }
@@ -0,0 +1,127 @@
+"""
+Enumeración perezosa de caminos simples sobre la vista CSR.
+La búsqueda es un DFS iterativo cuya pila (posiciones en el array de
+adyacencia) se puede serializar como cursor opaco para reanudarla. Con un
+Budget cada vecino examinado gasta una expansión; si se agota la búsqueda se
+detiene marcada como truncada y el cursor sigue siendo válido.
+"""
+import base64
+import json
+from typing import Iterator, List, Optional
+
+from models.csr import CSRGraph
+from models.planner import Budget
+from utils.metrics import PATHS_ENUMERATED
+
+# Tamaño de página de /all-paths: por defecto y máximo permitido
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+
+class InvalidCursor(ValueError):
+    """El cursor no es válido para esta consulta o versión del grafo."""
+
+
+class PathEnumerator:
+    """Genera caminos simples origen-destino con como mucho max_length vuelos."""
+
+    def __init__(self, csr: CSRGraph, origin: str, destination: str, max_length: int,
+                 version: int = 0, cursor: Optional[str] = None, reachable: bool = True,
+                 budget: Optional[Budget] = None):
+        self.csr = csr
+        self.origin = origin
+        self.destination = destination
+        self.max_length = max_length
+        self.version = version
+        self.budget = budget
+        self.found = 0
+        # True si la búsqueda se detuvo por agotar el presupuesto
+        self.truncated = False
+        self._path: List[int] = []
+        self._positions: List[int] = []
+        # Arrays vigentes al crearlo: las mutaciones los sustituyen, no los modifican
+        self._indptr, self._indices, self._codes = csr.indptr, csr.indices, csr.codes
+        self._done = (
+            origin not in csr.index or destination not in csr.index
+            or origin == destination or max_length < 1 or not reachable
+        )
+        if cursor is not None:
+            self._restore(cursor)
+        elif not self._done:
+            source = csr.index[origin]
+            self._path = [source]
+            self._positions = [int(self._indptr[source])]
+        self._target = csr.index.get(destination)
+
+    def __iter__(self) -> Iterator[List[str]]:
+        if self._done:
+            return
+        indptr, indices, codes = self._indptr, self._indices, self._codes
+        target = self._target
+        path, positions = self._path, self._positions
+        on_path = set(path)
+        budget = self.budget
+        while path:
+            # Antes de tocar la pila: al parar, el cursor reanuda justo aquí
+            if budget is not None and not budget.spend():
+                self.truncated = True
+                return
+            top = path[-1]
+            position = positions[-1]
+            if position >= indptr[top + 1]:
+                on_path.discard(path.pop())
+                positions.pop()
+                continue
+            positions[-1] = position + 1
+            neighbor = int(indices[position])
+            if neighbor in on_path:
+                continue
+            if neighbor == target:
+                self.found += 1
+                PATHS_ENUMERATED.inc()
+                yield [codes[node] for node in path] + [codes[target]]
+            elif len(path) < self.max_length:
+                path.append(neighbor)
+                positions.append(int(indptr[neighbor]))
+                on_path.add(neighbor)
+        self._done = True
+
+    def cursor(self) -> Optional[str]:
+        """Cursor para continuar tras el último camino devuelto; None si no quedan."""
+        if self._done or not self._path:
+            return None
+        state = {
+            "v": self.version,
+            "q": [self.origin, self.destination, self.max_length],
+            "p": self._positions
+        }
+        return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode()
+
+    def _restore(self, cursor: str) -> None:
+        try:
+            state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            positions = [int(position) for position in state["p"]]
+            query = state["q"]
+            version = state["v"]
+        except (ValueError, KeyError, TypeError):
+            raise InvalidCursor("Malformed cursor")
+        if version != self.version:
+            raise InvalidCursor("Cursor belongs to another graph version")
+        if query != [self.origin, self.destination, self.max_length] or self._done or not positions:
+            raise InvalidCursor("Cursor belongs to another query")
+        indptr, indices = self._indptr, self._indices
+        # El nodo de cada nivel es el último vecino probado en el nivel anterior
+        path = [self.csr.index[self.origin]]
+        last = len(positions) - 1
+        for level, position in enumerate(positions):
+            node = path[-1]
+            lower = indptr[node] if level == last else indptr[node] + 1
+            if not lower <= position <= indptr[node + 1]:
+                raise InvalidCursor("Cursor out of range")
+            if level < last:
+                path.append(int(indices[position - 1]))
+        target = self.csr.index[self.destination]
+        if len(set(path)) != len(path) or len(path) > self.max_length or target in path:
+            raise InvalidCursor("Cursor out of range")
+        self._path = path
+        self._positions = positions
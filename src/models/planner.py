@@ -0,0 +1,200 @@
+"""
+Planificador de consultas: control de admisión por coste estimado.
+Antes de llamar a FlightGraph se estima el trabajo de las consultas caras con
+estadísticas locales del grafo (grado del origen, ramificación media de sus
+vecinos y de un vecino cualquiera, límite de saltos) y se compara con un
+presupuesto en tiempo. Si no cabe se rebaja (menos saltos, menos pivotes,
+presupuesto de búsqueda recortado) o, con la política "reject", se rechaza.
+Lo que se ejecuta lleva además un presupuesto cooperativo (Budget) de tiempo y
+expansiones que los enumeradores comprueban; si se agota, la respuesta sale
+marcada como truncada.
+"""
+import importlib.util
+import math
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from models.csr import CSRGraph
+from utils.metrics import QUERY_ADMISSIONS
+
+DEFAULT_BUDGET_MS = 5000.0
+POLICIES = ("downgrade", "reject")
+# Segundos por unidad de trabajo (medidos con 50 000 aeropuertos sintéticos)
+SECONDS_PER_EXPANSION = 9e-7  # vecino examinado por el DFS de all-paths
+# Por vuelo (en cada sentido) y búsqueda completa: BFS o Dijkstra de la centralidad,
+# Bellman-Ford con NumPy o Dijkstra de SciPy de la matriz de distancias
+SECONDS_PER_EDGE = {"bfs": 1.3e-7, "dijkstra": 3e-6, "relax": 3.4e-7, "scipy": 2e-8}
+# Comprobar el reloj cada tantas expansiones (perf_counter no es gratis)
+CLOCK_INTERVAL = 256
+
+
+class Budget:
+    """Presupuesto cooperativo: los algoritmos llaman a spend() y paran cuando devuelve False."""
+
+    def __init__(self, seconds: Optional[float] = None, expansions: Optional[int] = None):
+        self.deadline = time.perf_counter() + seconds if seconds is not None else None
+        self.expansions = expansions
+        self.spent = 0
+        self._next_check = CLOCK_INTERVAL
+        # Motivo por el que se agotó ("expansions" o "time"); None mientras quede
+        self.exhausted: Optional[str] = None
+
+    def spend(self, count: int = 1) -> bool:
+        if self.exhausted is not None:
+            return False
+        self.spent += count
+        if self.expansions is not None and self.spent > self.expansions:
+            self.exhausted = "expansions"
+        elif self.deadline is not None and self.spent >= self._next_check:
+            self._next_check = self.spent + CLOCK_INTERVAL
+            if time.perf_counter() > self.deadline:
+                self.exhausted = "time"
+        return self.exhausted is None
+
+
+class Plan:
+    """Decisión para una consulta: ejecutar, ejecutar rebajada o rechazar."""
+
+    def __init__(self, operation: str, estimated: float, budget: float):
+        self.operation = operation
+        self.estimated = estimated
+        self.budget = budget
+        self.action = "run"
+        # Parámetro -> (pedido, valor que cabe): usado al rebajar, sugerido al rechazar
+        self.changes: Dict[str, Tuple] = {}
+
+    @property
+    def rejected(self) -> bool:
+        return self.action == "reject"
+
+    def used(self, name: str, requested):
+        """Valor con el que se ejecuta el parámetro name (el rebajado si lo hay)."""
+        return self.changes[name][1] if name in self.changes else requested
+
+    def as_dict(self) -> Dict:
+        plan = {
+            "action": self.action,
+            # Sin límite (camino más largo sin presupuesto) no hay estimación
+            "estimated_ms": round(self.estimated * 1000, 3) if math.isfinite(self.estimated) else None,
+            "budget_ms": round(self.budget * 1000, 3)
+        }
+        if self.changes:
+            key = "suggested" if self.rejected else "downgraded"
+            plan[key] = {name: {"requested": requested, "used" if key == "downgraded" else "fits": fits}
+                         for name, (requested, fits) in self.changes.items()}
+        return plan
+
+
+def branching(csr: CSRGraph, source: int) -> Tuple[int, float, float]:
+    """Grado de source, ramificación media de sus vecinos y de un vecino cualquiera del grafo.
+
+    La ramificación es el grado menos el vuelo por el que se llega. La de un
+    vecino cualquiera pondera por grado (sum d(d-1) / sum d): los hubs pesan más.
+    """
+    degrees = np.diff(csr.indptr)
+    degree = int(degrees[source])
+    neighbors = csr.indices[csr.indptr[source]:csr.indptr[source + 1]]
+    local = float(np.mean(degrees[neighbors] - 1)) if degree else 0.0
+    total = int(degrees.sum())
+    excess = float((degrees * (degrees - 1)).sum() / total) if total else 0.0
+    return degree, local, excess
+
+
+def _expansions(degree: int, local: float, excess: float, max_length: int) -> float:
+    """Suma de las fronteras d, d * local, d * local * excess^(h - 2)... en forma cerrada."""
+    if max_length < 2:
+        return float(degree) if max_length == 1 else 0.0
+    hops = max_length - 1
+    if excess == 1.0:
+        series = float(hops)
+    else:
+        try:
+            series = (excess ** hops - 1) / (excess - 1)
+        except OverflowError:
+            return math.inf
+    return degree + degree * local * series
+
+
+def path_expansions(csr: CSRGraph, source: int, max_length: int) -> float:
+    """Vecinos que examinará el DFS de caminos simples de hasta max_length vuelos desde source."""
+    return _expansions(*branching(csr, source), max_length)
+
+
+class QueryPlanner:
+    """Estima el coste de las consultas caras y decide si se ejecutan, se rebajan o se rechazan."""
+
+    def __init__(self, budget_ms: float = DEFAULT_BUDGET_MS, policy: str = "downgrade"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown policy: {policy}")
+        self.budget = budget_ms / 1000
+        self.policy = policy
+
+    @classmethod
+    def from_env(cls) -> "QueryPlanner":
+        """QUERY_BUDGET_MS (5000 por defecto) y QUERY_POLICY (downgrade o reject)."""
+        return cls(float(os.environ.get("QUERY_BUDGET_MS", DEFAULT_BUDGET_MS)),
+                   os.environ.get("QUERY_POLICY", "downgrade"))
+
+    @property
+    def max_expansions(self) -> int:
+        """Expansiones que caben en el presupuesto (límite determinista de los enumeradores)."""
+        return max(1, int(self.budget / SECONDS_PER_EXPANSION))
+
+    def budget_for(self) -> Budget:
+        """Presupuesto cooperativo de una consulta admitida."""
+        return Budget(self.budget, self.max_expansions)
+
+    def _decide(self, plan: Plan, fits: Optional[Dict[str, Tuple]] = None) -> Plan:
+        """Si no cabe: rechaza o rebaja a fits (parámetro -> (pedido, valor que cabe)).
+
+        Sin forma de rebajar (fits None) se rechaza siempre.
+        """
+        if plan.estimated > self.budget:
+            plan.changes = fits or {}
+            plan.action = "reject" if self.policy == "reject" or fits is None else "downgrade"
+        QUERY_ADMISSIONS.inc(operation=plan.operation, action=plan.action)
+        return plan
+
+    def plan_paths(self, csr: CSRGraph, origin: str, max_length: int) -> Plan:
+        """all-paths: se rebaja max_length al mayor que cabe (al menos 1)."""
+        source = csr.index.get(origin)
+        if source is None or max_length < 1:
+            return self._decide(Plan("paths", 0.0, self.budget))
+
+        # Un camino simple no pasa de n - 1 vuelos: pedir más no cuesta más
+        length = min(max_length, max(1, csr.number_of_nodes() - 1))
+        stats = branching(csr, source)
+
+        def cost(hops: int) -> float:
+            return _expansions(*stats, hops) * SECONDS_PER_EXPANSION
+
+        # El coste crece con la longitud: búsqueda binaria del mayor que cabe
+        low, high = 1, length
+        while low < high:
+            middle = (low + high + 1) // 2
+            if cost(middle) <= self.budget:
+                low = middle
+            else:
+                high = middle - 1
+        return self._decide(Plan("paths", cost(length), self.budget), {"max_length": (max_length, low)})
+
+    def plan_longest(self, time_budget: Optional[float]) -> Plan:
+        """Camino más largo: su coste es su propio presupuesto de tiempo, que se recorta al global."""
+        plan = Plan("longest", time_budget if time_budget is not None else math.inf, self.budget)
+        requested = None if time_budget is None else time_budget * 1000
+        return self._decide(plan, {"time_budget_ms": (requested, self.budget * 1000)})
+
+    def plan_centrality(self, csr: CSRGraph, k: int, weighted: bool) -> Plan:
+        """Centralidad: una búsqueda completa por pivote; se rebajan los pivotes."""
+        per_pivot = len(csr.indices) * SECONDS_PER_EDGE["dijkstra" if weighted else "bfs"]
+        plan = Plan("centrality", min(k, csr.number_of_nodes()) * per_pivot, self.budget)
+        return self._decide(plan, {"k": (k, max(1, int(self.budget / per_pivot)) if per_pivot else k)})
+
+    def plan_matrix(self, csr: CSRGraph, searches: int) -> Plan:
+        """Matriz de distancias: una búsqueda por origen (o destino); no se rebaja, se rechaza."""
+        compiled = importlib.util.find_spec("scipy") is not None
+        per_search = len(csr.indices) * SECONDS_PER_EDGE["scipy" if compiled else "relax"]
+        return self._decide(Plan("matrix", searches * per_search, self.budget))
@@ -0,0 +1,55 @@
+"""
+Aeropuertos alcanzables con un número máximo de escalas, por bitsets.
+Cada aeropuerto guarda un bitset empaquetado con un bit por origen consultado
+(64 orígenes por palabra). Un salto es, para cada aeropuerto, el OR de los
+bitsets de sus vecinos: un gather sobre el CSR y un np.bitwise_or.reduceat por
+filas, así que todos los orígenes avanzan a la vez sin trabajo Python por
+nodo. Los bits que aparecen por primera vez en el salto h tienen h vuelos como
+mínimo (h - 1 escalas).
+"""
+from typing import Sequence
+
+import numpy as np
+
+from models.csr import CSRGraph
+
+# Escalas máximas de /reachable (los vuelos se guardan en int8)
+MAX_STOPS = 20
+# Orígenes por pasada: el gather ocupa (2 x vuelos) x BLOCK_ORIGINS / 8 bytes
+BLOCK_ORIGINS = 1024
+
+
+def hop_matrix(csr: CSRGraph, sources: Sequence[int], max_hops: int) -> np.ndarray:
+    """Vuelos mínimos (len(sources) x n, int8) con como mucho max_hops; 0 el origen, -1 si no llega."""
+    sources = np.asarray(sources, dtype=np.int64)
+    hops = np.full((len(sources), csr.number_of_nodes()), -1, dtype=np.int8)
+    for start in range(0, len(sources), BLOCK_ORIGINS):
+        block = sources[start:start + BLOCK_ORIGINS]
+        hops[start:start + len(block)] = _block_hops(csr, block, max_hops).T
+    return hops
+
+
+def _block_hops(csr: CSRGraph, block: np.ndarray, max_hops: int) -> np.ndarray:
+    """Vuelos mínimos por aeropuerto (filas) y origen del bloque (columnas)."""
+    n, m = csr.number_of_nodes(), len(block)
+    columns = np.arange(m)
+    frontier = np.zeros((n, (m + 63) // 64), dtype="<u8")
+    np.bitwise_or.at(frontier, (block, columns // 64), np.left_shift(np.uint64(1), (columns % 64).astype(np.uint64)))
+    seen = frontier.copy()
+    hops = np.full((n, m), -1, dtype=np.int8)
+    hops[block, columns] = 0
+    # reduceat no admite filas vacías: solo se reducen los aeropuertos con vuelos
+    rows = np.flatnonzero(np.diff(csr.indptr))
+    starts = csr.indptr[rows]
+    for hop in range(1, max_hops + 1):
+        reached = np.zeros_like(frontier)
+        if len(rows):
+            reached[rows] = np.bitwise_or.reduceat(frontier[csr.indices], starts, axis=0)
+        reached &= ~seen
+        if not reached.any():
+            break
+        seen |= reached
+        # Palabras little-endian: el bit j del bitset es la columna j
+        hops[np.unpackbits(reached.view(np.uint8), axis=1, count=m, bitorder="little").view(bool)] = hop
+        frontier = reached
+    return hops
@@ -0,0 +1,196 @@
+"""
+Motor de rutas punto a punto sobre la vista CSR.
+Una única búsqueda devuelve camino, distancia y escalas usando Dijkstra
+bidireccional o A* con landmarks (ALT, desigualdad triangular) y, si los
+aeropuertos tienen coordenadas, la cota geodésica del índice espacial.
+"""
+import heapq
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from models.csr import CSRGraph, as_number
+from models.trees import propagate_decrease
+from utils.metrics import ROUTE_SEARCHES, ROUTE_SETTLED
+
+ALGORITHMS = ("dijkstra", "bidirectional", "alt")
+
+# Cota inferior adicional de la distancia de cada nodo al destino (None si no hay)
+Bound = Callable[[int], Optional[np.ndarray]]
+
+
+class RouteEngine:
+    """Resuelve consultas origen-destino con una sola búsqueda."""
+
+    def __init__(self, csr: CSRGraph, num_landmarks: int = 0,
+                 landmarks: Optional[np.ndarray] = None, landmark_dist: Optional[np.ndarray] = None):
+        self.csr = csr
+        self.landmarks: List[int] = []
+        # Matriz (landmarks x nodos) con distancias (cotas inferiores tras mutaciones); inf si no hay ruta
+        self.landmark_dist = np.empty((0, csr.number_of_nodes()))
+        if landmarks is not None and landmark_dist is not None:
+            # Landmarks precalculados (p. ej. leídos de un snapshot)
+            self.landmarks = [int(landmark) for landmark in landmarks]
+            self.landmark_dist = landmark_dist
+        elif num_landmarks > 0 and csr.number_of_nodes() > 0:
+            self._select_landmarks(num_landmarks)
+
+    def add_node(self) -> None:
+        column = np.full((len(self.landmarks), 1), np.inf)
+        self.landmark_dist = np.hstack([self.landmark_dist, column])
+
+    def edge_added(self, a: int, b: int) -> None:
+        """Vuelo nuevo: se propaga la mejora en cada fila de landmarks.
+
+        Quitar vuelos o alargarlos no requiere nada: las distancias guardadas
+        siguen siendo cotas inferiores consistentes y ALT sigue siendo exacto.
+        """
+        if not self.landmarks:
+            return
+        # Las filas de un snapshot son de solo lectura: se copian al primer cambio
+        if not self.landmark_dist.flags.writeable:
+            self.landmark_dist = np.array(self.landmark_dist)
+        for row in self.landmark_dist:
+            propagate_decrease(self.csr, row, None, a, b)
+
+    def edge_removed(self, a: int, b: int) -> None:
+        pass
+
+    def weight_changed(self, a: int, b: int, old: float, new: float) -> None:
+        if new < old:
+            self.edge_added(a, b)
+
+    def _distances_from(self, source: int) -> np.ndarray:
+        dist, _ = self.csr.dijkstra(source)
+        row = np.full(self.csr.number_of_nodes(), np.inf)
+        row[list(dist.keys())] = list(dist.values())
+        return row
+
+    def _select_landmarks(self, k: int) -> None:
+        """Selección 'farthest': cada landmark maximiza la distancia a los anteriores."""
+        n = self.csr.number_of_nodes()
+        rows = []
+        current = int(np.argmax(self.csr.degrees))
+        closest = np.full(n, np.inf)
+        for _ in range(min(k, n)):
+            row = self._distances_from(current)
+            self.landmarks.append(current)
+            rows.append(row)
+            closest = np.minimum(closest, row)
+            # Los nodos de otras componentes (inf) tienen prioridad para cubrirlas
+            candidates = np.where(np.isinf(closest), np.finfo(float).max, closest)
+            candidates[self.landmarks] = -1
+            current = int(np.argmax(candidates))
+            if candidates[current] <= 0:
+                break
+        self.landmark_dist = np.vstack(rows)
+
+    def _potential(self, target: int, bound: Optional[Bound] = None) -> List[float]:
+        """Cota inferior |d(l,t) - d(l,v)| para todos los nodos (admisible).
+
+        bound añade otra cota consistente (p. ej. la geodésica); el máximo de
+        ambas también lo es y poda más.
+        """
+        potential = np.zeros(self.csr.number_of_nodes())
+        if self.landmarks:
+            with np.errstate(invalid="ignore"):
+                bounds = np.abs(self.landmark_dist - self.landmark_dist[:, target][:, None])
+            bounds[np.isnan(bounds)] = 0.0
+            potential = bounds.max(axis=0)
+        extra = bound(target) if bound is not None else None
+        if extra is not None:
+            potential = np.maximum(potential, extra)
+        return potential.tolist()
+
+    def query(self, origin: str, destination: str, algorithm: str = "bidirectional",
+              bound: Optional[Bound] = None) -> Optional[Dict]:
+        """Devuelve path, distance, stops y settled (nodos asentados) o None."""
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        index = self.csr.index
+        if origin not in index or destination not in index:
+            return None
+        source, target = index[origin], index[destination]
+        if algorithm == "dijkstra":
+            dist, pred = self.csr.dijkstra(source, target)
+            found = (self.csr.path_to(pred, target), dist[target]) if target in dist else None
+            settled = len(dist)
+        elif algorithm == "alt":
+            found, settled = self._astar(source, target, bound)
+        else:
+            found, settled = self._bidirectional(source, target)
+        ROUTE_SEARCHES.inc(algorithm=algorithm)
+        ROUTE_SETTLED.inc(settled, algorithm=algorithm)
+        if found is None:
+            return None
+        path, distance = found
+        return {
+            "path": path,
+            "distance": as_number(distance),
+            "stops": len(path) - 2,
+            "settled": settled
+        }
+
+    def _astar(self, source: int, target: int, bound: Optional[Bound] = None):
+        h = self._potential(target, bound)
+        if np.isinf(h[source]):
+            return None, 0
+        indptr, indices, weights = self.csr.indptr, self.csr.indices, self.csr.weights
+        best = {source: 0.0}
+        pred = {source: -1}
+        closed = set()
+        heap = [(h[source], source)]
+        while heap:
+            _, u = heapq.heappop(heap)
+            if u in closed:
+                continue
+            closed.add(u)
+            if u == target:
+                return (self.csr.path_to(pred, target), best[target]), len(closed)
+            d = best[u]
+            start, end = indptr[u], indptr[u + 1]
+            for v, w in zip(indices[start:end].tolist(), weights[start:end].tolist()):
+                nd = d + w
+                if v not in closed and nd < best.get(v, float("inf")):
+                    best[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd + h[v], v))
+        return None, len(closed)
+
+    def _bidirectional(self, source: int, target: int):
+        if source == target:
+            return ([self.csr.codes[source]], 0.0), 1
+        indptr, indices, weights = self.csr.indptr, self.csr.indices, self.csr.weights
+        # Índice 0: búsqueda hacia delante, 1: hacia atrás (grafo no dirigido)
+        best = ({source: 0.0}, {target: 0.0})
+        pred = ({source: -1}, {target: -1})
+        settled = (set(), set())
+        heaps = ([(0.0, source)], [(0.0, target)])
+        mu = float("inf")
+        meeting = -1
+        while heaps[0] and heaps[1]:
+            if heaps[0][0][0] + heaps[1][0][0] >= mu:
+                break
+            side = 0 if heaps[0][0][0] <= heaps[1][0][0] else 1
+            d, u = heapq.heappop(heaps[side])
+            if u in settled[side]:
+                continue
+            settled[side].add(u)
+            other = 1 - side
+            start, end = indptr[u], indptr[u + 1]
+            for v, w in zip(indices[start:end].tolist(), weights[start:end].tolist()):
+                nd = d + w
+                if v not in settled[side] and nd < best[side].get(v, float("inf")):
+                    best[side][v] = nd
+                    pred[side][v] = u
+                    heapq.heappush(heaps[side], (nd, v))
+                # Candidato a camino completo a través de v
+                if v in best[other] and best[side][v] + best[other][v] < mu:
+                    mu = best[side][v] + best[other][v]
+                    meeting = v
+        total = len(settled[0]) + len(settled[1])
+        if meeting == -1:
+            return None, total
+        forward = self.csr.path_to(pred[0], meeting)
+        backward = self.csr.path_to(pred[1], meeting)[::-1]
+        return (forward + backward[1:], mu), total
@@ -0,0 +1,110 @@
+"""
+Snapshot binario del grafo para arranques en frío rápidos.
+Un único fichero con los códigos internados, las columnas de atributos y
+coordenadas de los aeropuertos, los arrays CSR y (opcionalmente) los
+landmarks de ALT. El cargador lo abre con np.memmap sin trabajo Python por arista.
+"""
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from models.csr import CSRGraph
+from utils.binfile import open_arrays, write_arrays
+
+KIND = "graph-snapshot"
+ATTRIBUTES = ("name", "city", "country")
+# Coordenadas opcionales (NaN si el aeropuerto no las tiene)
+COORDINATES = ("lat", "lon")
+
+
+class StringColumn:
+    """Columna de strings UTF-8 concatenados con offsets (n + 1)."""
+
+    def __init__(self, blob: np.ndarray, offsets: np.ndarray):
+        self.blob = blob
+        self.offsets = offsets
+
+    @staticmethod
+    def encode(values: List[str]) -> Dict[str, np.ndarray]:
+        parts = [value.encode("utf-8") for value in values]
+        offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+        np.cumsum([len(part) for part in parts], out=offsets[1:])
+        return {"blob": np.frombuffer(b"".join(parts), dtype=np.uint8), "offsets": offsets}
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def tolist(self) -> List[str]:
+        data = self.blob.tobytes()
+        offsets = self.offsets.tolist()
+        return [data[a:b].decode("utf-8") for a, b in zip(offsets, offsets[1:])]
+
+
+class Snapshot:
+    """Contenido de un snapshot abierto."""
+
+    def __init__(self, csr: CSRGraph, columns: Dict, header: Dict,
+                 landmarks: Optional[np.ndarray], landmark_dist: Optional[np.ndarray]):
+        self.csr = csr
+        self.columns = columns
+        self.header = header
+        self.landmarks = landmarks
+        self.landmark_dist = landmark_dist
+
+
+def write_snapshot(graph, path: str, checksum: Optional[str] = None) -> None:
+    """Escribe el snapshot de un FlightGraph (incluye landmarks si los tiene)."""
+    csr = graph.csr
+    airports = {airport["code"]: airport for airport in graph.get_all_airports()}
+    arrays = {
+        "indptr": csr.indptr,
+        "indices": csr.indices,
+        "weights": csr.weights,
+        "loops": csr.loops
+    }
+    columns = {"code": csr.codes}
+    for attribute in ATTRIBUTES:
+        columns[attribute] = [airports[code][attribute] for code in csr.codes]
+    for column, values in columns.items():
+        for part, array in StringColumn.encode(values).items():
+            arrays[f"{column}.{part}"] = array
+    for coordinate in COORDINATES:
+        arrays[coordinate] = np.array([airports[code].get(coordinate, np.nan) for code in csr.codes], dtype=np.float64)
+    if graph.num_landmarks > 0:
+        routes = graph.routes
+        arrays["landmarks"] = np.asarray(routes.landmarks, dtype=np.int32)
+        arrays["landmark_dist"] = routes.landmark_dist
+    header = {
+        "checksum": checksum,
+        "airports": csr.number_of_nodes(),
+        "flights": csr.number_of_edges()
+    }
+    write_arrays(path, KIND, header, {name: np.ascontiguousarray(a) for name, a in arrays.items()})
+
+
+def read_snapshot(path: str, checksum: Optional[str] = None) -> Optional[Snapshot]:
+    """Abre un snapshot; None si no existe o no corresponde a los datos (checksum)."""
+    opened = open_arrays(path, KIND)
+    if opened is None:
+        return None
+    header, arrays = opened
+    if checksum is not None and header.get("checksum") != checksum:
+        return None
+    columns = {
+        column: StringColumn(arrays[f"{column}.blob"], arrays[f"{column}.offsets"])
+        for column in ("code",) + ATTRIBUTES
+    }
+    for coordinate in COORDINATES:
+        # Snapshots anteriores a las coordenadas: todas ausentes
+        columns[coordinate] = arrays.get(coordinate, np.full(len(columns["code"]), np.nan))
+    csr = CSRGraph(
+        columns["code"].tolist(),
+        arrays["indptr"],
+        arrays["indices"],
+        arrays["weights"],
+        arrays["loops"]
+    )
+    return Snapshot(csr, columns, header, arrays.get("landmarks"), arrays.get("landmark_dist"))
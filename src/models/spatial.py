@@ -0,0 +1,136 @@
+"""
+Índice espacial sobre las coordenadas (opcionales) de los aeropuertos.
+Las coordenadas se pasan a vectores unitarios y se reparten en una rejilla 3D
+uniforme: una consulta por radio solo mira las celdas que corta la esfera de
+búsqueda, así que no recorre todos los aeropuertos. El mismo índice da una cota
+inferior de la distancia por vuelos (distancia ortodrómica por el menor
+cociente distancia/ortodrómica de los vuelos) que A* usa como heurística.
+"""
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from models.csr import CSRGraph
+
+EARTH_RADIUS_KM = 6371.0
+# Aeropuertos por celda ocupada (en media) al dimensionar la rejilla
+POINTS_PER_CELL = 4
+# Margen para que los errores de redondeo no hagan la cota inconsistente
+SCALE_MARGIN = 1e-9
+
+
+def valid_coordinates(lat, lon) -> bool:
+    """Latitud y longitud numéricas, finitas y dentro de rango."""
+    for value, limit in ((lat, 90), (lon, 180)):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return False
+        if not math.isfinite(value) or abs(value) > limit:
+            return False
+    return True
+
+
+def unit_vectors(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Vectores unitarios (n x 3) de coordenadas en grados (NaN si faltan)."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.column_stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)))
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """Distancia ortodrómica a partir de la cuerda entre vectores unitarios."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(chord / 2, 1.0))
+
+
+class SpatialIndex:
+    """Rejilla 3D de vectores unitarios y cota geodésica de las distancias del grafo."""
+
+    def __init__(self, csr: CSRGraph, lat: np.ndarray, lon: np.ndarray):
+        self.csr = csr
+        self.xyz = unit_vectors(np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64))
+        located = np.isfinite(self.xyz[:, 0])
+        # La cota solo es consistente si todos los aeropuertos tienen coordenadas
+        self.complete = bool(located.all())
+        self._build_grid(np.flatnonzero(located))
+        self.scale = self._edge_scale()
+
+    def _build_grid(self, points: np.ndarray) -> None:
+        # Celdas de lado s: ~4π/s² celdas ocupadas sobre la esfera
+        self.size = min(2.0, math.sqrt(4 * math.pi * POINTS_PER_CELL / max(len(points), 1)))
+        self.side = int(2 / self.size) + 1
+        keys = self._cell_keys(self._cells(self.xyz[points]))
+        order = np.argsort(keys, kind="stable")
+        self._points = points[order]
+        self._keys, self._starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+        self._ends = self._starts + counts
+
+    def _cells(self, xyz: np.ndarray) -> np.ndarray:
+        return np.clip(np.floor((xyz + 1) / self.size).astype(np.int64), 0, self.side - 1)
+
+    def _cell_keys(self, cells: np.ndarray) -> np.ndarray:
+        return (cells[..., 0] * self.side + cells[..., 1]) * self.side + cells[..., 2]
+
+    def _edge_scale(self) -> float:
+        """Menor cociente distancia / ortodrómica de los vuelos con coordenadas en ambos extremos."""
+        csr = self.csr
+        rows = np.repeat(np.arange(csr.number_of_nodes()), np.diff(csr.indptr))
+        great_circle = chord_to_km(np.linalg.norm(self.xyz[rows] - self.xyz[csr.indices], axis=1))
+        usable = great_circle > 0
+        if not usable.any():
+            # Sin vuelos que acoten el cociente todavía; la cota queda desactivada
+            return math.inf
+        return float((csr.weights[usable] / great_circle[usable]).min()) * (1 - SCALE_MARGIN)
+
+    def nearby(self, lat: float, lon: float, radius_km: float,
+               limit: Optional[int] = None) -> List[Tuple[int, float]]:
+        """Aeropuertos (índice, km) a como mucho radius_km, del más cercano al más lejano."""
+        center = unit_vectors(np.array([lat]), np.array([lon]))[0]
+        angle = min(radius_km / EARTH_RADIUS_KM, math.pi)
+        chord = 2 * math.sin(angle / 2)
+        low, high = self._cells(center - chord), self._cells(center + chord)
+        spans = high - low + 1
+        if int(np.prod(spans)) >= len(self._keys):
+            # Radio que cubre casi toda la rejilla: más barato mirar todos los puntos
+            candidates = self._points
+        else:
+            cells = np.stack(np.meshgrid(*(np.arange(a, b + 1) for a, b in zip(low, high)), indexing="ij"), -1)
+            keys = self._cell_keys(cells.reshape(-1, 3))
+            found = np.searchsorted(self._keys, keys)
+            found = found[(found < len(self._keys)) & (self._keys[np.minimum(found, len(self._keys) - 1)] == keys)]
+            starts, counts = self._starts[found], self._ends[found] - self._starts[found]
+            # Concatena los tramos [start, end) de cada celda sin bucle Python
+            offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+            candidates = self._points[offsets + np.arange(counts.sum())]
+        distances = chord_to_km(np.linalg.norm(self.xyz[candidates] - center, axis=1))
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+        order = np.lexsort((candidates, distances))[:limit]
+        return list(zip(candidates[order].tolist(), distances[order].tolist()))
+
+    @property
+    def available(self) -> bool:
+        """Hay cota geodésica: todos los aeropuertos con coordenadas y cociente conocido y positivo."""
+        return self.complete and 0 < self.scale < math.inf
+
+    def bound(self, target: int) -> Optional[np.ndarray]:
+        """Cota inferior de la distancia por vuelos de cada aeropuerto a target; None si no hay."""
+        if not self.available:
+            return None
+        return self.scale * chord_to_km(np.linalg.norm(self.xyz - self.xyz[target], axis=1))
+
+    def add_node(self) -> None:
+        """Aeropuerto sin coordenadas: queda fuera de la rejilla y desactiva la cota."""
+        self.xyz = np.vstack([self.xyz, np.full((1, 3), np.nan)])
+        self.complete = False
+
+    def edge_added(self, a: int, b: int) -> None:
+        """Un vuelo más corto que su ortodrómica (escalada) rebaja el cociente."""
+        great_circle = float(chord_to_km(np.linalg.norm(self.xyz[a] - self.xyz[b])))
+        if great_circle > 0:
+            self.scale = min(self.scale, self.csr.edge_weight(a, b) / great_circle * (1 - SCALE_MARGIN))
+
+    def edge_removed(self, a: int, b: int) -> None:
+        pass
+
+    def weight_changed(self, a: int, b: int, old: float, new: float) -> None:
+        if new < old:
+            self.edge_added(a, b)
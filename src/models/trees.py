@@ -0,0 +1,156 @@
+"""
+Árboles de caminos mínimos por origen reparados de forma incremental.
+Tras un cambio en una arista solo se recalcula la parte afectada: si una
+distancia baja (vuelo nuevo o más corto) se propaga la mejora desde sus
+extremos; si sube o desaparece un vuelo del árbol, se invalida el subárbol que
+colgaba de él y se recalcula desde su frontera con el resto del árbol.
+"""
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from models.csr import CSRGraph, as_number
+from utils.metrics import ROUTE_SEARCHES, ROUTE_SETTLED
+
+DEFAULT_MAX_TREES = 32
+
+
+def propagate_decrease(csr: CSRGraph, dist: np.ndarray, pred: Optional[np.ndarray],
+                       a: int, b: int) -> int:
+    """Propaga la mejora que permite la arista (a, b); devuelve los nodos actualizados."""
+    w = csr.edge_weight(a, b)
+    heap = []
+    for u, v in ((a, b), (b, a)):
+        if dist[u] + w < dist[v]:
+            dist[v] = dist[u] + w
+            if pred is not None:
+                pred[v] = u
+            heapq.heappush(heap, (dist[v], v))
+    return _relax(csr, dist, pred, heap)
+
+
+def _relax(csr: CSRGraph, dist: np.ndarray, pred: Optional[np.ndarray], heap: List) -> int:
+    """Dijkstra a partir de un heap inicial, solo a través de nodos que mejoran."""
+    indptr, indices, weights = csr.indptr, csr.indices, csr.weights
+    updated = 0
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        updated += 1
+        start, end = indptr[u], indptr[u + 1]
+        for v, w in zip(indices[start:end].tolist(), weights[start:end].tolist()):
+            if d + w < dist[v]:
+                dist[v] = d + w
+                if pred is not None:
+                    pred[v] = u
+                heapq.heappush(heap, (d + w, v))
+    return updated
+
+
+def repair_subtree(csr: CSRGraph, dist: np.ndarray, pred: np.ndarray, root: int) -> int:
+    """Recalcula el subárbol que cuelga de root (su arista al padre ha subido o desaparecido)."""
+    # Descendientes de root agrupando los nodos por predecesor
+    order = np.argsort(pred, kind="stable")
+    starts = np.searchsorted(pred[order], np.arange(len(pred)), side="left")
+    ends = np.searchsorted(pred[order], np.arange(len(pred)), side="right")
+    subtree = [root]
+    for node in subtree:
+        subtree.extend(order[starts[node]:ends[node]].tolist())
+    members = np.asarray(subtree)
+    dist[members] = np.inf
+    pred[members] = -1
+    # Cada nodo del subárbol arranca con su mejor vecino fuera de él
+    heap = []
+    for node in subtree:
+        neighbors, weights = csr.row(node)
+        candidates = dist[neighbors] + weights
+        if len(candidates) and np.isfinite(candidates.min()):
+            best = int(np.argmin(candidates))
+            heap.append((float(candidates[best]), node, int(neighbors[best])))
+    for d, node, parent in heap:
+        dist[node] = d
+        pred[node] = parent
+    heap = [(d, node) for d, node, _ in heap]
+    heapq.heapify(heap)
+    _relax(csr, dist, pred, heap)
+    return len(subtree)
+
+
+class ShortestPathTrees:
+    """Árboles completos (dist, pred) de los últimos orígenes consultados (LRU)."""
+
+    def __init__(self, csr: CSRGraph, max_trees: int = DEFAULT_MAX_TREES):
+        self.csr = csr
+        self.max_trees = max_trees
+        self._trees: "OrderedDict[int, Tuple[np.ndarray, np.ndarray]]" = OrderedDict()
+        # Nodos recalculados por reparaciones (para medir el ahorro frente a reconstruir)
+        self.repaired = 0
+        # Las consultas concurrentes comparten la LRU; las reparaciones van en exclusiva
+        self._lock = threading.Lock()
+
+    def __contains__(self, source: int) -> bool:
+        return source in self._trees
+
+    def get(self, source: int) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            if source in self._trees:
+                self._trees.move_to_end(source)
+                return self._trees[source]
+        n = self.csr.number_of_nodes()
+        dist = np.full(n, np.inf)
+        pred = np.full(n, -1, dtype=np.int64)
+        found, parents = self.csr.dijkstra(source)
+        ROUTE_SEARCHES.inc(algorithm="tree")
+        ROUTE_SETTLED.inc(len(found), algorithm="tree")
+        dist[list(found)] = list(found.values())
+        pred[list(parents)] = list(parents.values())
+        with self._lock:
+            self._trees[source] = (dist, pred)
+            if len(self._trees) > self.max_trees:
+                self._trees.popitem(last=False)
+        return dist, pred
+
+    def routes(self, source: int, targets: List[int]) -> Dict[int, Optional[Dict]]:
+        """Camino, distancia y escalas hacia cada target desde el árbol de source."""
+        dist, pred = self.get(source)
+        settled = int(np.isfinite(dist).sum())
+        results: Dict[int, Optional[Dict]] = {}
+        for target in targets:
+            if not np.isfinite(dist[target]):
+                results[target] = None
+                continue
+            path = self.csr.path_to(pred, target)
+            results[target] = {
+                "path": path,
+                "distance": as_number(dist[target]),
+                "stops": len(path) - 2,
+                "settled": settled
+            }
+        return results
+
+    def add_node(self) -> None:
+        for source, (dist, pred) in list(self._trees.items()):
+            self._trees[source] = (np.append(dist, np.inf), np.append(pred, -1))
+
+    def edge_added(self, a: int, b: int) -> None:
+        """Vuelo nuevo: las distancias solo pueden bajar."""
+        for dist, pred in self._trees.values():
+            self.repaired += propagate_decrease(self.csr, dist, pred, a, b)
+
+    def edge_removed(self, a: int, b: int) -> None:
+        """Vuelo eliminado: solo cambia el subárbol que colgaba de él (si estaba en el árbol)."""
+        for dist, pred in self._trees.values():
+            for parent, child in ((a, b), (b, a)):
+                if pred[child] == parent:
+                    self.repaired += repair_subtree(self.csr, dist, pred, child)
+                    break
+
+    def weight_changed(self, a: int, b: int, old: float, new: float) -> None:
+        if new < old:
+            self.edge_added(a, b)
+        elif new > old:
+            self.edge_removed(a, b)
@@ -0,0 +1,87 @@
+"""
+Contenedor binario para arrays de NumPy que se abren con np.memmap.
+Formato: magic + longitud de cabecera + cabecera JSON + arrays alineados.
+"""
+import json
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+MAGIC = b"FLGRAPH1"
+ALIGNMENT = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def create_arrays(path: str, kind: str, header: Dict,
+                  specs: Dict[str, Tuple[str, tuple]]) -> Dict[str, np.ndarray]:
+    """Crea el fichero y devuelve memmaps escribibles para rellenar los arrays."""
+    layout = {}
+    meta = dict(header, kind=kind, arrays=layout)
+    # La cabecera incluye los offsets, así que se calcula hasta que se estabiliza
+    offset = 0
+    while True:
+        position = offset
+        for name, (dtype, shape) in specs.items():
+            position = _align(position)
+            layout[name] = {"dtype": dtype, "shape": list(shape), "offset": position}
+            position += int(np.dtype(dtype).itemsize * int(np.prod(shape)))
+        encoded = json.dumps(meta).encode("utf-8")
+        start = _align(len(MAGIC) + 8 + len(encoded))
+        if start == offset:
+            break
+        offset = start
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(encoded)))
+        f.write(encoded)
+        f.truncate(max(position, start))
+    return {name: _map(path, layout[name], "r+") for name in specs}
+
+
+def write_arrays(path: str, kind: str, header: Dict, arrays: Dict[str, np.ndarray]) -> None:
+    """Escribe arrays ya calculados de forma atómica (fichero temporal + rename)."""
+    tmp_path = path + ".tmp"
+    specs = {name: (array.dtype.str, array.shape) for name, array in arrays.items()}
+    targets = create_arrays(tmp_path, kind, header, specs)
+    for name, array in arrays.items():
+        if array.size:
+            targets[name][...] = array
+            targets[name].flush()
+    del targets
+    os.replace(tmp_path, path)
+
+
+def read_header(path: str, kind: str) -> Optional[Dict]:
+    """Lee solo la cabecera; None si el fichero no existe o no es del tipo esperado."""
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            return None
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length).decode("utf-8"))
+    if header.get("kind") != kind:
+        return None
+    return header
+
+
+def open_arrays(path: str, kind: str) -> Optional[Tuple[Dict, Dict[str, np.ndarray]]]:
+    """Abre el fichero en solo lectura; los arrays se comparten vía page cache."""
+    header = read_header(path, kind)
+    if header is None:
+        return None
+    arrays = {name: _map(path, spec, "r") for name, spec in header["arrays"].items()}
+    return header, arrays
+
+
+def _map(path: str, spec: Dict, mode: str) -> np.ndarray:
+    shape = tuple(spec["shape"])
+    if int(np.prod(shape)) == 0:
+        # np.memmap no admite regiones vacías
+        return np.empty(shape, dtype=spec["dtype"])
+    return np.memmap(path, dtype=spec["dtype"], mode=mode, offset=spec["offset"], shape=shape)
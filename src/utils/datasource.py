@@ -0,0 +1,147 @@
+"""
+Origen de los datos del grafo: ficheros empaquetados en data/ o un bucket S3.
+Con S3 los JSON se descargan con GET condicionales (If-None-Match) a una caché
+local (/tmp en Lambda) que sobrevive entre invocaciones en caliente; el grafo
+solo se reconstruye cuando cambia algún ETag.
+"""
+import json
+import os
+import time
+from typing import Dict, Optional
+
+from utils.helpers import SNAPSHOT_FILE, get_data_path, get_snapshot_path
+
+DATA_FILES = ('airports.json', 'flights.json')
+DEFAULT_CACHE_DIR = '/tmp/flight-data'
+DEFAULT_REVALIDATE_SECONDS = 60.0
+ETAGS_FILE = 'etags.json'
+
+
+class LocalDataSource:
+    """Ficheros del directorio data/ o de otro directorio local (DATA_DIR)."""
+
+    # El snapshot empaquetado lo genera scripts/build_snapshot.py, no el servidor
+    cache_snapshot = False
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+
+    def path(self, filename: str) -> str:
+        if self.directory:
+            return os.path.join(self.directory, filename)
+        return get_data_path(filename)
+
+    def snapshot_path(self) -> Optional[str]:
+        if self.directory:
+            path = os.path.join(self.directory, SNAPSHOT_FILE)
+            return path if os.path.exists(path) else None
+        return get_snapshot_path()
+
+    def sync(self) -> bool:
+        return False
+
+    def refresh(self) -> bool:
+        return False
+
+
+class S3DataSource:
+    """JSON en S3 revalidados por ETag contra una copia en disco local."""
+
+    # Tras parsear los JSON se guarda un snapshot en la caché para los siguientes arranques
+    cache_snapshot = True
+
+    def __init__(self, bucket: str, prefix: str = '', cache_dir: str = DEFAULT_CACHE_DIR,
+                 revalidate_seconds: float = DEFAULT_REVALIDATE_SECONDS, client=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.cache_dir = cache_dir
+        self.revalidate_seconds = revalidate_seconds
+        self._client = client
+        self._checked_at: Optional[float] = None
+        os.makedirs(cache_dir, exist_ok=True)
+        self.etags = self._read_etags()
+
+    @property
+    def client(self):
+        # boto3 se importa solo si se usa S3: su importación pesa en el arranque
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('s3')
+        return self._client
+
+    def path(self, filename: str) -> str:
+        return os.path.join(self.cache_dir, filename)
+
+    def snapshot_path(self) -> Optional[str]:
+        return self.path(SNAPSHOT_FILE)
+
+    def _read_etags(self) -> Dict[str, str]:
+        try:
+            with open(self.path(ETAGS_FILE), 'r', encoding='utf-8') as f:
+                etags = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        # Un ETag sin su fichero no sirve para revalidar
+        return {name: etag for name, etag in etags.items() if os.path.exists(self.path(name))}
+
+    def _write_etags(self) -> None:
+        tmp = self.path(ETAGS_FILE) + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.etags, f)
+        os.replace(tmp, self.path(ETAGS_FILE))
+
+    def _fetch(self, filename: str) -> bool:
+        """GET condicional de un fichero; True si se ha descargado una versión nueva."""
+        from botocore.exceptions import ClientError
+        params = {'Bucket': self.bucket, 'Key': self.prefix + filename}
+        if filename in self.etags:
+            params['IfNoneMatch'] = self.etags[filename]
+        try:
+            response = self.client.get_object(**params)
+        except ClientError as e:
+            if e.response.get('ResponseMetadata', {}).get('HTTPStatusCode') == 304:
+                return False
+            raise
+        tmp = self.path(filename) + '.tmp'
+        with open(tmp, 'wb') as f:
+            for chunk in iter(lambda: response['Body'].read(1 << 20), b''):
+                f.write(chunk)
+        os.replace(tmp, self.path(filename))
+        self.etags[filename] = response['ETag']
+        return True
+
+    def sync(self) -> bool:
+        """Revalida todos los ficheros contra S3; True si alguno ha cambiado."""
+        changed = [self._fetch(filename) for filename in DATA_FILES]
+        self._checked_at = time.monotonic()
+        if any(changed):
+            self._write_etags()
+            return True
+        return False
+
+    def refresh(self) -> bool:
+        """Como sync, pero como mucho una vez cada revalidate_seconds."""
+        from botocore.exceptions import BotoCoreError, ClientError
+        if self._checked_at is not None and time.monotonic() - self._checked_at < self.revalidate_seconds:
+            return False
+        try:
+            return self.sync()
+        except (BotoCoreError, ClientError):
+            # S3 no disponible: se sigue sirviendo la copia local si está completa
+            if all(filename in self.etags for filename in DATA_FILES):
+                self._checked_at = time.monotonic()
+                return False
+            raise
+
+
+def get_data_source():
+    """S3DataSource si DATA_BUCKET está definido; si no, los ficheros locales (data/ o DATA_DIR)."""
+    bucket = os.environ.get('DATA_BUCKET')
+    if not bucket:
+        return LocalDataSource(os.environ.get('DATA_DIR'))
+    return S3DataSource(
+        bucket,
+        prefix=os.environ.get('DATA_PREFIX', ''),
+        cache_dir=os.environ.get('DATA_CACHE_DIR', DEFAULT_CACHE_DIR),
+        revalidate_seconds=float(os.environ.get('DATA_REVALIDATE_SECONDS', DEFAULT_REVALIDATE_SECONDS))
+    )
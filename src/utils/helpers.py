@@ -1,9 +1,12 @@
 """
 Funciones auxiliares para el proyecto.
 """
+import base64
+import hashlib
 import json
 import os
-from typing import List, Dict
+import re
+from typing import Any, Dict, Iterator, List, Optional
 
 
 def load_json_file(file_path: str) -> List[Dict]:
@@ -12,12 +15,96 @@ def load_json_file(file_path: str) -> List[Dict]:
         return json.load(f)
 
 
+_WHITESPACE = re.compile(r'\s*')
+_SEPARATOR = re.compile(r'\s*,\s*')
+
+
+def iter_json_array(file_path: str, chunk_size: int = 1 << 16) -> Iterator[Any]:
+    """Itera los elementos de un array JSON leyendo el fichero por bloques.
+
+    La memoria depende del tamaño de un elemento, no del fichero completo.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'r', encoding='utf-8') as f:
+        buffer, pos, eof = '', 0, False
+
+        def fill() -> None:
+            nonlocal buffer, pos, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+
+        def peek() -> str:
+            nonlocal pos
+            while True:
+                pos = _WHITESPACE.match(buffer, pos).end()
+                if pos < len(buffer) or eof:
+                    return buffer[pos] if pos < len(buffer) else ''
+                fill()
+
+        if peek() != '[':
+            raise ValueError(f'{file_path}: se esperaba un array JSON')
+        pos += 1
+        if peek() == ']':
+            return
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # Un número al final del bloque puede continuar en el siguiente
+            if end == len(buffer) and not eof:
+                fill()
+                continue
+            pos = end
+            yield item
+            # Caso habitual: separador y siguiente elemento ya en el buffer
+            match = _SEPARATOR.match(buffer, pos)
+            if match is not None and match.end() < len(buffer):
+                pos = match.end()
+                continue
+            separator = peek()
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f'{file_path}: JSON inválido en la posición {pos}')
+            pos += 1
+            peek()
+
+
+SNAPSHOT_FILE = 'graph.snapshot'
+
+
 def get_data_path(filename: str) -> str:
     """Obtiene la ruta absoluta a un archivo de datos."""
     base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     return os.path.join(base_dir, 'data', filename)
 
 
+def get_snapshot_path() -> Optional[str]:
+    """Ruta al snapshot binario del grafo si existe; se prefiere a los JSON."""
+    path = get_data_path(SNAPSHOT_FILE)
+    return path if os.path.exists(path) else None
+
+
+def data_checksum(file_paths: List[str]) -> Optional[str]:
+    """Calcula un SHA-256 conjunto de los ficheros de datos (detecta datos obsoletos).
+
+    Devuelve None si falta alguno (p. ej. un despliegue que solo incluye el snapshot).
+    """
+    if not all(os.path.exists(file_path) for file_path in file_paths):
+        return None
+    digest = hashlib.sha256()
+    for file_path in file_paths:
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
 def format_response(status_code: int, body: dict) -> dict:
     """Formatea la respuesta para API Gateway."""
     return {
@@ -30,6 +117,38 @@ def format_response(status_code: int, body: dict) -> dict:
     }
 
 
+def format_rendered(rendered, headers: Optional[dict]) -> dict:
+    """Respuesta de API Gateway para un cuerpo pre-serializado (304 si el ETag coincide)."""
+    if_none_match = get_header(headers, 'If-None-Match')
+    body, etag, encoding = rendered.select(get_header(headers, 'Accept-Encoding'))
+    response_headers = {
+        'Content-Type': 'application/json',
+        'Access-Control-Allow-Origin': '*',
+        'ETag': etag,
+        'Vary': 'Accept-Encoding'
+    }
+    if rendered.not_modified(if_none_match):
+        return {'statusCode': 304, 'headers': response_headers, 'body': ''}
+    if encoding is None:
+        return {'statusCode': 200, 'headers': response_headers, 'body': body.decode('utf-8')}
+    response_headers['Content-Encoding'] = encoding
+    return {
+        'statusCode': 200,
+        'headers': response_headers,
+        'body': base64.b64encode(body).decode('ascii'),
+        'isBase64Encoded': True
+    }
+
+
+def get_header(headers: Optional[dict], name: str) -> Optional[str]:
+    """Cabecera de una petición sin distinguir mayúsculas (API Gateway no las normaliza)."""
+    name = name.lower()
+    for key, value in (headers or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
 def parse_request_body(event: dict) -> dict:
     """Parsea el body de una petición de API Gateway."""
     body = event.get('body', '{}')
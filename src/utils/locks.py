@@ -0,0 +1,109 @@
+"""
+Cerrojo de lectura/escritura para el grafo.
+Muchas consultas a la vez, o una sola mutación: una mutación parchea la vista
+CSR y repara las estructuras derivadas en varios pasos, y ningún lector debe
+ver el estado intermedio ni cachear bajo la versión nueva datos viejos.
+Es reentrante por hilo (una mutación puede llamar a otras y leer, y una
+consulta cacheada a otras) y sin preferencia de escritores: con preferencia,
+una lectura anidada esperaría a un escritor que a su vez espera a la externa.
+"""
+import functools
+import threading
+from typing import Callable, Optional
+
+
+class _Side:
+    """Lado (lectura o escritura) del cerrojo, usable con with; el estado por hilo va en el cerrojo."""
+
+    __slots__ = ("_acquire", "_release")
+
+    def __init__(self, acquire: Callable[[], None], release: Callable[[], None]):
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self) -> None:
+        self._acquire()
+
+    def __exit__(self, *exc) -> None:
+        self._release()
+
+
+class ReadWriteLock:
+    """Lectores concurrentes o un único escritor."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers = 0
+        self._writer: Optional[int] = None
+        self._writes = 0
+        self._local = threading.local()
+        self._read = _Side(self._acquire_read, self._release_read)
+        self._write = _Side(self._acquire_write, self._release_write)
+
+    def read(self) -> _Side:
+        return self._read
+
+    def write(self) -> _Side:
+        return self._write
+
+    def _acquire_read(self) -> None:
+        local = self._local
+        depth = getattr(local, "reads", 0)
+        # Lectura anidada o dentro de la propia escritura: ya se tiene acceso
+        if depth or self._writer == threading.get_ident():
+            local.reads = depth + 1
+            local.shared = getattr(local, "shared", False)
+            return
+        with self._condition:
+            while self._writer is not None:
+                self._condition.wait()
+            self._readers += 1
+        local.reads, local.shared = 1, True
+
+    def _release_read(self) -> None:
+        local = self._local
+        local.reads -= 1
+        if not local.reads and local.shared:
+            local.shared = False
+            with self._condition:
+                self._readers -= 1
+                if not self._readers:
+                    self._condition.notify_all()
+
+    def _acquire_write(self) -> None:
+        me = threading.get_ident()
+        with self._condition:
+            if self._writer == me:
+                self._writes += 1
+                return
+            if getattr(self._local, "reads", 0):
+                # Esperaría a su propia lectura
+                raise RuntimeError("Cannot write while holding a read lock")
+            while self._writer is not None or self._readers:
+                self._condition.wait()
+            self._writer, self._writes = me, 1
+
+    def _release_write(self) -> None:
+        with self._condition:
+            self._writes -= 1
+            if not self._writes:
+                self._writer = None
+                self._condition.notify_all()
+
+
+def reads(method):
+    """Decorador de métodos de un objeto con atributo lock: se ejecutan como lectura."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.read():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def writes(method):
+    """Como reads, pero en exclusiva (mutaciones)."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock.write():
+            return method(self, *args, **kwargs)
+    return wrapper
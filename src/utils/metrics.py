@@ -0,0 +1,204 @@
+"""
+Métricas internas del servicio: contadores e histogramas con etiquetas.
+Flask los expone en formato texto de Prometheus (/metrics); la Lambda los
+emite como líneas de log en formato EMF (CloudWatch Embedded Metric Format).
+"""
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Segundos: de 0,5 ms a 10 s
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EMF_NAMESPACE = 'FlightGraph'
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Counter:
+    """Contador monótono por combinación de etiquetas."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def total(self) -> float:
+        with self._lock:
+            return sum(self._values.values())
+
+    def samples(self) -> List[Tuple[str, Labels, float]]:
+        with self._lock:
+            return [(self.name, labels, value) for labels, value in sorted(self._values.items())]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """Histograma acumulativo (buckets 'le') por combinación de etiquetas."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Labels, List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            # [cuentas por bucket..., suma, total]
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(_labels(labels))
+            return state[-1] if state else 0
+
+    def samples(self) -> List[Tuple[str, Labels, float]]:
+        samples = []
+        with self._lock:
+            for labels, state in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, state):
+                    samples.append((f'{self.name}_bucket', labels + (('le', _format_value(bound)),), count))
+                samples.append((f'{self.name}_bucket', labels + (('le', '+Inf'),), state[-1]))
+                samples.append((f'{self.name}_sum', labels, state[-2]))
+                samples.append((f'{self.name}_count', labels, state[-1]))
+        return samples
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Gauge:
+    """Valor instantáneo (se fija justo antes de exportar)."""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[Labels, float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        self._values[_labels(labels)] = value
+
+    def samples(self) -> List[Tuple[str, Labels, float]]:
+        return [(self.name, labels, value) for labels, value in sorted(self._values.items())]
+
+    def reset(self) -> None:
+        self._values.clear()
+
+
+REQUEST_DURATION = Histogram('flightgraph_request_duration_seconds', 'Latencia de las peticiones por ruta.')
+GRAPH_LOAD = Histogram('flightgraph_graph_load_seconds', 'Duración de la carga del grafo por origen (json, snapshot).',
+                       buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+ROUTE_SEARCHES = Counter('flightgraph_route_searches_total', 'Búsquedas de caminos mínimos por algoritmo.')
+ROUTE_SETTLED = Counter('flightgraph_route_settled_nodes_total', 'Nodos asentados en búsquedas de caminos mínimos.')
+UNREACHABLE_QUERIES = Counter('flightgraph_unreachable_queries_total',
+                              'Consultas descartadas sin búsqueda: origen y destino en componentes distintas.')
+PATHS_ENUMERATED = Counter('flightgraph_paths_enumerated_total', 'Caminos generados por el enumerador de all-paths.')
+LONGEST_SEARCHES = Counter('flightgraph_longest_path_searches_total', 'Búsquedas del camino más largo por resultado.')
+LONGEST_EXPANSIONS = Counter('flightgraph_longest_path_expansions_total', 'Nodos expandidos por el camino más largo.')
+QUERY_ADMISSIONS = Counter('flightgraph_query_admissions_total',
+                           'Decisiones del planificador por operación (run, downgrade, reject).')
+QUERIES_TRUNCATED = Counter('flightgraph_queries_truncated_total',
+                            'Consultas cortadas al agotar su presupuesto, por operación y motivo.')
+CACHE_REQUESTS = Gauge('flightgraph_cache_requests_total', 'Consultas a la caché de resultados (hit, miss).')
+CACHE_EVICTIONS = Gauge('flightgraph_cache_evictions_total', 'Entradas desalojadas de la caché de resultados.')
+CACHE_BYTES = Gauge('flightgraph_cache_bytes', 'Tamaño aproximado de la caché de resultados.')
+GRAPH_SIZE = Gauge('flightgraph_graph_size', 'Aeropuertos y vuelos cargados.')
+GRAPH_VERSION = Gauge('flightgraph_graph_version', 'Versión del grafo (sube con cada cambio).')
+
+METRICS = (REQUEST_DURATION, GRAPH_LOAD, ROUTE_SEARCHES, ROUTE_SETTLED, UNREACHABLE_QUERIES, PATHS_ENUMERATED,
+           LONGEST_SEARCHES, LONGEST_EXPANSIONS, QUERY_ADMISSIONS, QUERIES_TRUNCATED, CACHE_REQUESTS,
+           CACHE_EVICTIONS, CACHE_BYTES, GRAPH_SIZE, GRAPH_VERSION)
+# Contadores de trabajo de los algoritmos: su incremento por petición va en cada línea EMF
+WORK_COUNTERS = (ROUTE_SEARCHES, ROUTE_SETTLED, PATHS_ENUMERATED, LONGEST_SEARCHES, LONGEST_EXPANSIONS)
+
+
+def update_graph_gauges(graph) -> None:
+    """Copia el estado del grafo y de su caché a los gauges."""
+    stats = graph.cache.stats()
+    # La caché lleva sus propios contadores: se exportan tal cual (tipo counter)
+    CACHE_REQUESTS.set(stats['hits'], result='hit')
+    CACHE_REQUESTS.set(stats['misses'], result='miss')
+    CACHE_EVICTIONS.set(stats['evictions'])
+    CACHE_BYTES.set(stats['bytes'])
+    GRAPH_SIZE.set(graph.number_of_airports(), kind='airports')
+    GRAPH_SIZE.set(graph.number_of_flights(), kind='flights')
+    GRAPH_VERSION.set(graph.version)
+
+
+def render_prometheus() -> str:
+    """Todas las métricas en formato de exposición de texto de Prometheus 0.0.4."""
+    lines = []
+    for metric in METRICS:
+        kind = 'counter' if metric.name.endswith('_total') else metric.kind
+        lines.append(f'# HELP {metric.name} {metric.help}')
+        lines.append(f'# TYPE {metric.name} {kind}')
+        for name, labels, value in metric.samples():
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def work_totals() -> Dict[str, float]:
+    """Totales de los contadores de trabajo (para calcular incrementos por petición)."""
+    return {counter.name: counter.total() for counter in WORK_COUNTERS}
+
+
+def emf_record(dimensions: Dict[str, str], values: Dict[str, Tuple[float, str]],
+               properties: Optional[Dict] = None) -> Dict:
+    """Registro EMF: una línea de log que CloudWatch convierte en métricas.
+
+    values: {nombre: (valor, unidad)} con unidades de CloudWatch (Milliseconds, Count...).
+    """
+    record = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': EMF_NAMESPACE,
+                'Dimensions': [sorted(dimensions)],
+                'Metrics': [{'Name': name, 'Unit': unit} for name, (_, unit) in values.items()]
+            }]
+        }
+    }
+    record.update(properties or {})
+    record.update(dimensions)
+    record.update({name: value for name, (value, _) in values.items()})
+    return record
@@ -0,0 +1,77 @@
+"""
+Profiler de muestreo para peticiones concretas.
+Un hilo auxiliar captura la pila del hilo de la petición cada pocos
+milisegundos (sys._current_frames) y agrega las pilas en formato "folded"
+(compatible con flamegraph.pl / speedscope). Solo se activa si la petición
+trae la cabecera X-Profile-Token con el valor de la variable PROFILE_TOKEN.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+PROFILE_HEADER = 'X-Profile-Token'
+DEFAULT_INTERVAL = 0.002
+MAX_DEPTH = 64
+TOP_STACKS = 25
+
+
+def profiling_requested(token: Optional[str]) -> bool:
+    """True si la cabecera coincide con PROFILE_TOKEN (sin token configurado nunca se activa)."""
+    expected = os.environ.get('PROFILE_TOKEN')
+    if not expected or not token:
+        return False
+    import hmac
+    return hmac.compare_digest(expected, token)
+
+
+def _folded(frame) -> str:
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        code = frame.f_code
+        names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+class SamplingProfiler:
+    """Muestrea la pila de un hilo mientras está activo (usar con 'with')."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.seconds = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start = 0.0
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_folded(frame)] += 1
+                self.samples += 1
+
+    def __enter__(self) -> "SamplingProfiler":
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.seconds = time.perf_counter() - self._start
+
+    def report(self, top: int = TOP_STACKS) -> Dict:
+        """Pilas más frecuentes con su número de muestras."""
+        return {
+            'samples': self.samples,
+            'interval_ms': self.interval * 1000,
+            'duration_ms': round(self.seconds * 1000, 3),
+            'stacks': [{'stack': stack, 'samples': count} for stack, count in self.stacks.most_common(top)]
+        }
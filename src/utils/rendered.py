@@ -0,0 +1,69 @@
+"""
+Respuestas pre-serializadas para endpoints que solo cambian con el grafo.
+El cuerpo JSON se codifica una vez por versión del grafo (y se comprime con
+gzip si merece la pena) y se sirve con un ETag fuerte; las peticiones con
+If-None-Match coincidente reciben un 304 sin cuerpo.
+"""
+import gzip
+import hashlib
+import json
+import sys
+from typing import Callable, Optional
+
+GZIP_MIN_BYTES = 1024
+
+
+class RenderedBody:
+    """Cuerpo JSON en bytes, su variante gzip y sus ETag."""
+
+    def __init__(self, payload):
+        self.body = json.dumps(payload).encode('utf-8')
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        # Cada codificación es una representación distinta: su ETag fuerte también
+        self.gzip_etag = f'"{digest}-gzip"'
+        self.gzipped: Optional[bytes] = None
+        if len(self.body) >= GZIP_MIN_BYTES:
+            self.gzipped = gzip.compress(self.body, mtime=0)
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sys.getsizeof(self.body) + sys.getsizeof(self.gzipped)
+
+    def not_modified(self, if_none_match: Optional[str]) -> bool:
+        """True si If-None-Match contiene alguno de los ETag (comparación débil, RFC 9110)."""
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        if '*' in tags:
+            return True
+        tags = {tag[2:] if tag.startswith('W/') else tag for tag in tags}
+        return self.etag in tags or self.gzip_etag in tags
+
+    def select(self, accept_encoding: Optional[str]):
+        """(cuerpo, ETag, codificación) según Accept-Encoding; codificación None si va sin comprimir."""
+        if self.gzipped is not None and accepts_gzip(accept_encoding):
+            return self.gzipped, self.gzip_etag, 'gzip'
+        return self.body, self.etag, None
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """True si Accept-Encoding admite gzip (q > 0)."""
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        if coding.strip().lower() not in ('gzip', '*'):
+            continue
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def rendered(graph, name: str, build: Callable[[], dict]) -> RenderedBody:
+    """Cuerpo pre-serializado de un endpoint para la versión actual del grafo."""
+    # Versión y cuerpo con el cerrojo de lectura: una mutación no se cuela entre ambos
+    with graph.lock.read():
+        return graph.cache.get_or_compute(('rendered', name, graph.version), lambda: RenderedBody(build()))
@@ -0,0 +1,138 @@
+"""
+Pool acotado de procesos para consultas costosas desde un bucle asyncio.
+Cada worker es un fork del proceso servidor, así que hereda el grafo ya
+cargado (también las mutaciones hechas hasta ese momento); si el grafo cambia
+después, el worker se recicla antes de su siguiente tarea. Una tarea que supera
+su tiempo máximo o se cancela (p. ej. el cliente se desconecta) mata a su
+worker, que se sustituye por uno nuevo: la CPU queda libre de inmediato.
+"""
+import asyncio
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+# fork comparte el grafo del padre; donde no existe (Windows) cada worker llama a init()
+START_METHOD = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class PoolSaturated(Exception):
+    """Todos los workers están ocupados y la cola de espera está llena."""
+
+
+class PoolTimeout(Exception):
+    """La tarea ha superado su tiempo máximo y su worker se ha terminado."""
+
+
+def _worker_loop(conn, run: Callable[[Any], Any], init: Optional[Callable[[], None]]) -> None:
+    # Ctrl+C en el servidor no debe dejar trazas de cada worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if init is not None:
+        init()
+    while True:
+        try:
+            payload = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send((True, run(payload)))
+        except Exception as e:
+            conn.send((False, f'{type(e).__name__}: {e}'))
+
+
+class _Worker:
+    def __init__(self, context, run, init, version: int):
+        self.conn, child = context.Pipe()
+        # Con fork el worker ya tiene el grafo del padre: init solo hace falta con spawn
+        init = init if context.get_start_method() != 'fork' else None
+        self.process = context.Process(target=_worker_loop, args=(child, run, init), daemon=True)
+        self.process.start()
+        child.close()
+        self.version = version
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class WorkerPool:
+    """size procesos que ejecutan run(payload); como mucho max_pending tareas esperando."""
+
+    def __init__(self, run: Callable[[Any], Any], size: Optional[int] = None, max_pending: int = 16,
+                 version: Callable[[], int] = lambda: 0, init: Optional[Callable[[], None]] = None):
+        self.run_task = run
+        self.size = size or os.cpu_count() or 1
+        self.max_pending = max_pending
+        self.version = version
+        self.init = init
+        self.recycled = 0
+        self.killed = 0
+        self._context = multiprocessing.get_context(START_METHOD)
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: List[_Worker] = []
+        self._waiting = 0
+        self._readers: Optional[ThreadPoolExecutor] = None
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self._context, self.run_task, self.init, self.version())
+        self._workers.append(worker)
+        return worker
+
+    def _discard(self, worker: _Worker) -> None:
+        worker.kill()
+        self._workers.remove(worker)
+
+    async def start(self) -> None:
+        # Un hilo por worker espera su respuesta sin bloquear el bucle
+        self._readers = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='pool-reader')
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            self._idle.put_nowait(self._spawn())
+
+    async def close(self) -> None:
+        for worker in list(self._workers):
+            self._discard(worker)
+        if self._readers is not None:
+            self._readers.shutdown(wait=False)
+        self._idle = None
+
+    async def _acquire(self) -> _Worker:
+        if self._idle is None:
+            # Servidores sin eventos lifespan: se arranca con la primera tarea
+            await self.start()
+        if self._idle.empty() and self._waiting >= self.max_pending:
+            raise PoolSaturated()
+        self._waiting += 1
+        try:
+            worker = await self._idle.get()
+        finally:
+            self._waiting -= 1
+        if worker.version != self.version() or not worker.process.is_alive():
+            # El grafo ha cambiado desde el fork: un worker nuevo hereda el estado actual
+            self._discard(worker)
+            self.recycled += 1
+            worker = self._spawn()
+        return worker
+
+    async def run(self, payload: Any, timeout: Optional[float] = None) -> Any:
+        """Ejecuta la tarea en un worker; PoolTimeout si tarda más de timeout segundos."""
+        worker = await self._acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            worker.conn.send(payload)
+            ok, result = await asyncio.wait_for(loop.run_in_executor(self._readers, worker.conn.recv), timeout)
+        except BaseException as e:
+            # Timeout, cancelación o worker muerto: se termina y se repone
+            self._discard(worker)
+            self.killed += 1
+            self._idle.put_nowait(self._spawn())
+            if isinstance(e, asyncio.TimeoutError):
+                raise PoolTimeout() from None
+            raise
+        self._idle.put_nowait(worker)
+        if not ok:
+            raise RuntimeError(result)
+        return result
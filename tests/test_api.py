@@ -113,4 +113,329 @@ def test_endpoint_not_found():
     event = {'path': '/invalid', 'httpMethod': 'GET'}
     response = lambda_handler(event, None)
     
-    assert response['statusCode'] == 404
\ No newline at end of file
+    assert response['statusCode'] == 404
+
+
+def test_batch():
+    """Test endpoint POST /batch."""
+    operations = [
+        {'op': 'shortest-path', 'origin': 'MAD', 'destination': 'JFK'},
+        {'op': 'shortest-path', 'origin': 'MAD', 'destination': 'CDG'}
+    ]
+    event = {'path': '/batch', 'httpMethod': 'POST', 'body': json.dumps({'operations': operations})}
+    response = lambda_handler(event, None)
+    
+    assert response['statusCode'] == 200
+    results = json.loads(response['body'])['results']
+    assert len(results) == 2
+    assert results[0]['body']['path'][0] == 'MAD'
+    
+    # Campos que no son texto: 400 en su operación, no en todo el lote
+    invalid = [
+        {'op': 'shortest-path', 'origin': 5, 'destination': 'JFK'},
+        {'op': 'connections', 'airport': ['MAD']},
+        {'op': 'reachable', 'origin': {'code': 'MAD'}}
+    ]
+    event['body'] = json.dumps({'operations': invalid + operations[:1]})
+    response = lambda_handler(event, None)
+    assert response['statusCode'] == 200
+    assert [result['status'] for result in json.loads(response['body'])['results']] == [400, 400, 400, 200]
+    
+    event['body'] = json.dumps({})
+    assert lambda_handler(event, None)['statusCode'] == 400
+    
+    # Sin body, body null, JSON mal formado o que no es un objeto: 400, no 500
+    for body in (None, 'null', '', '{"operations": [', '[]', '"x"', '[1]'):
+        event['body'] = body
+        response = lambda_handler(event, None)
+        assert response['statusCode'] == 400
+    assert json.loads(response['body'])['error'] == 'Invalid JSON body'
+
+
+def test_reachable():
+    """Test endpoint /reachable y la operación reachable de /batch."""
+    event = {'path': '/reachable', 'httpMethod': 'GET', 'queryStringParameters': {'origin': 'mad', 'max_stops': '0'}}
+    response = lambda_handler(event, None)
+    
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert sorted(row['airport'] for row in body['airports']) == sorted(graph.get_connections('MAD'))
+    assert {row['stops'] for row in body['airports']} == {0}
+    
+    for max_stops in ('99', 'abc'):
+        event['queryStringParameters']['max_stops'] = max_stops
+        assert lambda_handler(event, None)['statusCode'] == 400
+    
+    operations = [
+        {'op': 'reachable', 'origin': 'MAD', 'max_stops': 1},
+        {'op': 'reachable', 'origin': 'XXX', 'max_stops': 1},
+        {'op': 'reachable', 'origin': 'MAD', 'max_stops': -1}
+    ]
+    event = {'path': '/batch', 'httpMethod': 'POST', 'body': json.dumps({'operations': operations})}
+    results = json.loads(lambda_handler(event, None)['body'])['results']
+    assert [result['status'] for result in results] == [200, 404, 400]
+    assert results[0]['body']['total'] >= body['total']
+
+
+def test_distance_matrix():
+    """Test endpoint /distance-matrix por GET y POST."""
+    params = {'origins': 'mad,bcn', 'destinations': 'JFK,MAD,CDG'}
+    event = {'path': '/distance-matrix', 'httpMethod': 'GET', 'queryStringParameters': params}
+    response = lambda_handler(event, None)
+    
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert body['origins'] == ['MAD', 'BCN']
+    assert body['distances'][0][0] == graph.shortest_path_distance('MAD', 'JFK')
+    assert body['distances'][0][1] == 0
+    
+    payload = {'origins': ['MAD'], 'destinations': ['JFK'], 'predecessors': True}
+    event = {'path': '/distance-matrix', 'httpMethod': 'POST', 'body': json.dumps(payload)}
+    body = json.loads(lambda_handler(event, None)['body'])
+    assert set(graph.shortest_path('MAD', 'JFK')) <= set(body['airports'])
+    
+    event['body'] = json.dumps({'origins': ['MAD'], 'destinations': ['XXX']})
+    assert lambda_handler(event, None)['statusCode'] == 404
+    event['body'] = json.dumps({'origins': 'MAD'})
+    assert lambda_handler(event, None)['statusCode'] == 400
+    for body in ('[1]', '"x"'):
+        event['body'] = body
+        assert lambda_handler(event, None)['statusCode'] == 400
+
+
+def test_flights_mutations():
+    """Test endpoints POST/PATCH/DELETE /flights."""
+    def call(method, body):
+        return lambda_handler({'path': '/flights', 'httpMethod': method, 'body': json.dumps(body)}, None)
+    
+    assert call('POST', {'origin': 'LPA', 'destination': 'JFK', 'distance': 5770})['statusCode'] == 201
+    assert call('POST', {'origin': 'LPA', 'destination': 'JFK', 'distance': 5770})['statusCode'] == 409
+    assert call('POST', {'origin': 'LPA', 'destination': 'XXX', 'distance': 1})['statusCode'] == 404
+    assert call('POST', {'origin': 'LPA', 'destination': 'JFK', 'distance': 'far'})['statusCode'] == 400
+    assert call('POST', {'origin': 5, 'destination': 'JFK', 'distance': 1})['statusCode'] == 400
+    for body in ('[1]', '"x"'):
+        event = {'path': '/flights', 'httpMethod': 'POST', 'body': body}
+        assert lambda_handler(event, None)['statusCode'] == 400
+    for distance in (float('nan'), float('inf'), -float('inf'), True):
+        assert call('POST', {'origin': 'LPA', 'destination': 'JFK', 'distance': distance})['statusCode'] == 400
+    
+    event = {'path': '/shortest-path', 'httpMethod': 'GET', 'queryStringParameters': {'origin': 'LPA', 'destination': 'JFK'}}
+    assert json.loads(lambda_handler(event, None)['body'])['path'] == ['LPA', 'JFK']
+    
+    assert call('PATCH', {'origin': 'lpa', 'destination': 'jfk', 'distance': 99999})['statusCode'] == 200
+    assert json.loads(lambda_handler(event, None)['body'])['path'] != ['LPA', 'JFK']
+    for distance in (float('nan'), float('inf')):
+        assert call('PATCH', {'origin': 'LPA', 'destination': 'JFK', 'distance': distance})['statusCode'] == 400
+    
+    assert call('DELETE', {'origin': 'LPA', 'destination': 'JFK'})['statusCode'] == 200
+    assert call('DELETE', {'origin': 'LPA', 'destination': 'JFK'})['statusCode'] == 404
+    assert call('PATCH', {'origin': 'LPA', 'destination': 'JFK', 'distance': 1})['statusCode'] == 404
+
+
+def test_all_paths_pagination():
+    """Test endpoint /all-paths con limit y cursor."""
+    params = {'origin': 'MAD', 'destination': 'JFK', 'max_length': '3', 'limit': '2'}
+    event = {'path': '/all-paths', 'httpMethod': 'GET', 'queryStringParameters': params}
+    body = json.loads(lambda_handler(event, None)['body'])
+    
+    assert body['total_paths'] == 2
+    assert body['next_cursor'] is not None
+    
+    params['cursor'] = body['next_cursor']
+    second = json.loads(lambda_handler(event, None)['body'])
+    assert second['paths'][0] not in body['paths']
+    
+    params['cursor'] = 'broken'
+    assert lambda_handler(event, None)['statusCode'] == 400
+
+
+def test_k_shortest_paths():
+    """Test endpoint /k-shortest-paths: caminos en orden creciente de distancia."""
+    params = {'origin': 'MAD', 'destination': 'JFK', 'k': '4'}
+    event = {'path': '/k-shortest-paths', 'httpMethod': 'GET', 'queryStringParameters': params}
+    response = lambda_handler(event, None)
+    
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    distances = [p['distance'] for p in body['paths']]
+    assert body['total_paths'] == 4
+    assert distances == sorted(distances)
+    assert body['paths'][0]['path'] == graph.shortest_path('MAD', 'JFK')
+    
+    for k in ('0', 'abc'):
+        params['k'] = k
+        assert lambda_handler(event, None)['statusCode'] == 400
+
+
+def test_nearby():
+    """Test endpoint /nearby: aeropuertos por distancia a un punto."""
+    params = {'lat': '40.4', 'lon': '-3.7', 'radius_km': '600'}
+    event = {'path': '/nearby', 'httpMethod': 'GET', 'queryStringParameters': params}
+    response = lambda_handler(event, None)
+    
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert [a['code'] for a in body['airports']] == ['MAD', 'BCN']
+    
+    params['lat'] = '123'
+    assert lambda_handler(event, None)['statusCode'] == 400
+    
+    params['lat'] = '40.4'
+    for limit in ('-1', '0', 'two'):
+        params['limit'] = limit
+        assert lambda_handler(event, None)['statusCode'] == 400
+    params['limit'] = '1'
+    assert [a['code'] for a in json.loads(lambda_handler(event, None)['body'])['airports']] == ['MAD']
+
+
+def test_centrality():
+    """Test endpoint /centrality: ranking ordenado con su cota de error."""
+    params = {'metric': 'closeness', 'top': '3'}
+    event = {'path': '/centrality', 'httpMethod': 'GET', 'queryStringParameters': params}
+    response = lambda_handler(event, None)
+    
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    values = [row['value'] for row in body['ranking']]
+    assert len(values) == 3 and values == sorted(values, reverse=True)
+    assert body['confidence'] == 0.95
+    
+    params['metric'] = 'pagerank'
+    assert lambda_handler(event, None)['statusCode'] == 400
+
+
+def test_components():
+    """Test endpoint /components: tamaños de las componentes y la de un aeropuerto."""
+    event = {'path': '/components', 'httpMethod': 'GET', 'queryStringParameters': None}
+    response = lambda_handler(event, None)
+    
+    assert response['statusCode'] == 200
+    body = json.loads(response['body'])
+    assert body['total_components'] == len(body['sizes'])
+    assert sum(body['sizes']) == len(graph.get_all_airports())
+    
+    event['queryStringParameters'] = {'airport': 'mad'}
+    body = json.loads(lambda_handler(event, None)['body'])
+    assert body['airport'] == 'MAD' and body['component_size'] == graph.get_components()['sizes'][0]
+    
+    event['queryStringParameters'] = {'airport': 'XXX'}
+    assert lambda_handler(event, None)['statusCode'] == 404
+
+
+def test_longest_path_budget_validation():
+    """Test time_budget_ms y max_expansions deben ser positivos y finitos (400, no 500)."""
+    params = {'origin': 'BCN', 'destination': 'JFK'}
+    event = {'path': '/longest-path', 'httpMethod': 'GET', 'queryStringParameters': params}
+    assert lambda_handler(event, None)['statusCode'] == 200
+    for value in ('0', '-5', 'nan', 'inf', 'fast'):
+        params['time_budget_ms'] = value
+        assert lambda_handler(event, None)['statusCode'] == 400
+    params['time_budget_ms'] = '1000'
+    for value in ('0', 'many'):
+        params['max_expansions'] = value
+        assert lambda_handler(event, None)['statusCode'] == 400
+
+
+def test_admission_control(monkeypatch):
+    """Test el planificador rebaja o rechaza (422) las consultas que no caben en el presupuesto."""
+    from lambdas import graph_operations
+    from models.planner import QueryPlanner
+    monkeypatch.setattr(graph_operations, 'planner', QueryPlanner(budget_ms=0.001))
+    params = {'origin': 'MAD', 'destination': 'JFK', 'max_length': '4'}
+    event = {'path': '/all-paths', 'httpMethod': 'GET', 'queryStringParameters': params}
+    body = json.loads(lambda_handler(event, None)['body'])
+    assert body['plan']['action'] == 'downgrade'
+    assert body['plan']['downgraded']['max_length'] == {'requested': 4, 'used': 1}
+    assert all(len(path) == 2 for path in body['paths'])
+    
+    params = {'origin': 'MAD', 'destination': 'JFK', 'time_budget_ms': '60000'}
+    event = {'path': '/longest-path', 'httpMethod': 'GET', 'queryStringParameters': params}
+    body = json.loads(lambda_handler(event, None)['body'])
+    assert body['plan']['downgraded']['time_budget_ms']['used'] == 0.001
+    
+    monkeypatch.setattr(graph_operations, 'planner', QueryPlanner(budget_ms=0.001, policy='reject'))
+    response = lambda_handler(event, None)
+    assert response['statusCode'] == 422
+    assert json.loads(response['body'])['plan']['action'] == 'reject'
+    params = {'origins': 'MAD,BCN', 'destinations': 'JFK'}
+    event = {'path': '/distance-matrix', 'httpMethod': 'GET', 'queryStringParameters': params}
+    assert lambda_handler(event, None)['statusCode'] == 422
+
+
+def test_template_exposes_every_route():
+    """Test cada ruta del handler tiene un evento Api en la plantilla SAM."""
+    import re
+    from lambdas.graph_operations import ROUTES
+    template = os.path.join(os.path.dirname(__file__), '..', 'infrastructure', 'aws', 'template.yaml')
+    with open(template, encoding='utf-8') as f:
+        paths = set(re.findall(r'Path: (\S+)', f.read()))
+    assert ROUTES <= paths
+
+
+def test_handler_import_is_lazy():
+    """Test el init de la Lambda construye el grafo sin importar NetworkX."""
+    import subprocess
+    src = os.path.join(os.path.dirname(__file__), '..', 'src')
+    code = (
+        "import sys; import lambdas.graph_operations as ops; "
+        "print(ops.graph.number_of_airports() > 0, 'networkx' in sys.modules); "
+        "ops.lambda_handler({'path': '/clusters', 'httpMethod': 'GET'}, None); "
+        "print('networkx' in sys.modules)"
+    )
+    output = subprocess.run([sys.executable, '-c', code], cwd=src, capture_output=True, text=True, check=True)
+    assert output.stdout.split() == ['True', 'False', 'True']
+
+
+def test_rendered_endpoints_etag_and_gzip():
+    """Test /airports pre-serializado: ETag, 304 con If-None-Match y gzip."""
+    import base64
+    import gzip
+    event = {'path': '/airports', 'httpMethod': 'GET', 'headers': {}}
+    first = lambda_handler(event, None)
+    etag = first['headers']['ETag']
+    assert first['statusCode'] == 200 and etag.startswith('"')
+    
+    event['headers'] = {'if-none-match': etag}
+    assert lambda_handler(event, None)['statusCode'] == 304
+    
+    event['headers'] = {'Accept-Encoding': 'gzip, deflate'}
+    compressed = lambda_handler(event, None)
+    assert compressed['isBase64Encoded'] and compressed['headers']['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(base64.b64decode(compressed['body']))) == json.loads(first['body'])
+    
+    # Un cambio en el grafo produce otro ETag
+    graph.add_airport('NEW', 'New', 'New', 'Test')
+    event['headers'] = {'If-None-Match': etag}
+    changed = lambda_handler(event, None)
+    assert changed['statusCode'] == 200 and changed['headers']['ETag'] != etag
+
+
+def test_request_metrics_emf_and_profiler(capsys, monkeypatch):
+    """Test cada petición deja una línea EMF con latencia y contadores de trabajo; /metrics en Prometheus."""
+    from utils.metrics import render_prometheus
+    event = {'path': '/shortest-path', 'httpMethod': 'GET',
+             'queryStringParameters': {'origin': 'MAD', 'destination': 'JFK', 'algorithm': 'dijkstra'}}
+    assert lambda_handler(event, None)['statusCode'] == 200
+    records = [json.loads(line) for line in capsys.readouterr().err.splitlines() if '"_aws"' in line]
+    record = records[-1]
+    definition = record['_aws']['CloudWatchMetrics'][0]
+    assert definition['Dimensions'] == [['Method', 'Route']]
+    assert {metric['Name'] for metric in definition['Metrics']} >= {'Latency', 'CacheMisses'}
+    assert record['Route'] == '/shortest-path' and record['StatusCode'] == 200
+    assert record['flightgraph_route_searches_total'] == 1
+    assert record['flightgraph_route_settled_nodes_total'] > 0
+    
+    exposition = render_prometheus()
+    assert '# TYPE flightgraph_request_duration_seconds histogram' in exposition
+    assert 'flightgraph_request_duration_seconds_count{method="GET",route="/shortest-path",status="200"}' in exposition
+    assert 'flightgraph_route_searches_total{algorithm="dijkstra"}' in exposition
+    
+    # Profiler: solo con el token configurado en PROFILE_TOKEN
+    event['headers'] = {'x-profile-token': 'secret'}
+    lambda_handler(event, None)
+    assert '"profile"' not in capsys.readouterr().err
+    monkeypatch.setenv('PROFILE_TOKEN', 'secret')
+    lambda_handler(event, None)
+    profiles = [json.loads(line) for line in capsys.readouterr().err.splitlines() if '"profile"' in line]
+    assert profiles[0]['route'] == '/shortest-path'
+    assert set(profiles[0]['profile']) == {'samples', 'interval_ms', 'duration_ms', 'stacks'}
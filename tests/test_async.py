@@ -0,0 +1,95 @@
+"""
+Tests para el pool de procesos y el servidor ASGI.
+"""
+import asyncio
+import json
+import sys
+import os
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from utils.workers import PoolSaturated, PoolTimeout, WorkerPool
+
+
+def test_pool_timeout_cancellation_and_saturation():
+    """Test un timeout o una cancelación terminan el worker y el pool sigue sirviendo."""
+    async def scenario():
+        pool = WorkerPool(time.sleep, size=1, max_pending=0)
+        await pool.start()
+        try:
+            start = time.perf_counter()
+            with pytest.raises(PoolTimeout):
+                await pool.run(5, timeout=0.2)
+            assert time.perf_counter() - start < 2
+            assert pool.killed == 1
+            assert await pool.run(0, timeout=5) is None
+
+            busy = asyncio.ensure_future(pool.run(5))
+            await asyncio.sleep(0.1)
+            with pytest.raises(PoolSaturated):
+                await pool.run(0)
+            busy.cancel()
+            await asyncio.gather(busy, return_exceptions=True)
+            assert pool.killed == 2
+
+            with pytest.raises(RuntimeError):
+                await pool.run('not a number', timeout=5)
+        finally:
+            await pool.close()
+    asyncio.run(scenario())
+
+
+def test_asgi_offloads_heavy_routes():
+    """Test ASGI: rutas baratas en el bucle, pesadas en el pool, workers reciclados tras mutaciones."""
+    import asgi
+    from lambdas.graph_operations import handle, init_graph
+    init_graph()
+
+    async def call(path, query=b'', method='GET', body=b''):
+        messages = []
+        requested = []
+
+        async def receive():
+            if not requested:
+                requested.append(True)
+                return {'type': 'http.request', 'body': body}
+            await asyncio.sleep(3600)
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {'type': 'http', 'path': path, 'method': method, 'query_string': query, 'headers': []}
+        await asgi.app(scope, receive, send)
+        return messages[0]['status'], messages[1]['body']
+
+    async def scenario():
+        await asgi.pool.close()
+        asgi.pool.size = 1
+        await asgi.pool.start()
+        try:
+            status, body = await call('/all-paths', b'origin=MAD&destination=JFK&max_length=3')
+            event = {'path': '/all-paths', 'httpMethod': 'GET',
+                     'queryStringParameters': {'origin': 'MAD', 'destination': 'JFK', 'max_length': '3'}}
+            assert status == 200 and json.loads(body) == json.loads(handle(event)['body'])
+
+            status, body = await call('/connections', b'airport=MAD')
+            assert status == 200 and json.loads(body)['airport'] == 'MAD'
+
+            # La mutación se hace en el proceso servidor; el worker se recicla y la ve
+            status, _ = await call('/flights', method='POST',
+                                   body=json.dumps({'origin': 'LPA', 'destination': 'JFK', 'distance': 1}).encode())
+            assert status == 201
+            status, body = await call('/all-paths', b'origin=LPA&destination=JFK&max_length=1')
+            assert json.loads(body)['paths'] == [['LPA', 'JFK']]
+            assert asgi.pool.recycled >= 1
+
+            status, body = await call('/metrics')
+            assert status == 200 and b'flightgraph_request_duration_seconds' in body
+        finally:
+            await asgi.pool.close()
+    asyncio.run(scenario())
+    init_graph()
@@ -0,0 +1,57 @@
+"""
+Tests para el generador sintético y la comparación con la línea base del benchmark.
+"""
+import copy
+import sys
+import os
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from generator import generate_network, write_dataset
+from models.graph import FlightGraph
+from suite import compare
+
+
+def test_generator_is_seeded_hub_and_spoke(tmp_path):
+    """La misma semilla da la misma red; pocos hubs concentran muchas rutas."""
+    airports, flights = generate_network(2000, seed=7)
+    assert (airports, flights) == generate_network(2000, seed=7)
+    assert flights != generate_network(2000, seed=8)[1]
+
+    degrees = Counter()
+    for flight in flights:
+        assert flight['origin'] != flight['destination']
+        assert flight['distance'] > 0
+        degrees[flight['origin']] += 1
+        degrees[flight['destination']] += 1
+    ordered = sorted(degrees.values(), reverse=True)
+    assert ordered[0] > 10 * (2 * len(flights) / len(airports))
+    assert sum(1 for degree in ordered if degree <= 2) > len(airports) / 3
+
+    graph = FlightGraph()
+    report = graph.load_stream(*write_dataset(str(tmp_path), airports, flights))
+    assert report.duplicates == 0 and not report.rejected
+    assert graph.number_of_airports() == 2000
+    assert len(graph.get_isolated_nodes()) == 10
+
+
+def test_compare_flags_regressions_only():
+    baseline = {'sizes': {'1000': {
+        'cold_start': {'json': {'ms': 100.0, 'peak_rss_mb': 40.0}},
+        'methods': {'route[alt]': {'median_ms': 2.0}, 'get_hubs': {'median_ms': 0.01}},
+        'endpoints': {'/stats': {'median_ms': 5.0}}
+    }}}
+    results = copy.deepcopy(baseline)
+    assert compare(results, baseline, 0.5) == []
+
+    entry = results['sizes']['1000']
+    entry['methods']['route[alt]']['median_ms'] = 4.0
+    entry['methods']['get_hubs']['median_ms'] = 0.1      # x10 pero por debajo del ruido
+    entry['cold_start']['json']['peak_rss_mb'] = 80.0
+    entry['endpoints']['/stats']['median_ms'] = 1.0      # mejora
+    entry['methods']['new_method'] = {'median_ms': 50.0}  # sin línea base
+    assert [name for _, name, _, _ in compare(results, baseline, 0.5)] == [
+        'cold_start[json].peak_rss_mb', 'methods.route[alt]'
+    ]
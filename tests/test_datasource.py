@@ -0,0 +1,70 @@
+"""
+Tests para el origen de datos en S3 (con moto como sustituto local de S3).
+"""
+import pytest
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+moto = pytest.importorskip('moto')
+boto3 = pytest.importorskip('boto3')
+
+from utils.datasource import S3DataSource
+from utils.helpers import get_data_path
+
+BUCKET = 'flight-data'
+
+
+@pytest.fixture
+def s3():
+    """Bucket S3 simulado con los datos del repositorio."""
+    with moto.mock_aws():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=BUCKET)
+        for filename in ('airports.json', 'flights.json'):
+            with open(get_data_path(filename), 'rb') as f:
+                client.put_object(Bucket=BUCKET, Key=filename, Body=f.read())
+        yield client
+
+
+def test_sync_revalidates_with_etag(s3, tmp_path):
+    """Test la primera sincronización descarga y las siguientes reciben 304."""
+    source = S3DataSource(BUCKET, cache_dir=str(tmp_path), client=s3)
+    assert source.sync() is True
+    with open(source.path('airports.json'), 'rb') as f, open(get_data_path('airports.json'), 'rb') as g:
+        assert f.read() == g.read()
+    assert source.sync() is False
+
+    # Los ETag persisten en la caché: otra instancia (nuevo proceso) no descarga de nuevo
+    assert S3DataSource(BUCKET, cache_dir=str(tmp_path), client=s3).sync() is False
+
+    flights = [{'origin': 'MAD', 'destination': 'BCN', 'distance': 500}]
+    s3.put_object(Bucket=BUCKET, Key='flights.json', Body=json.dumps(flights).encode())
+    assert source.sync() is True
+    with open(source.path('flights.json'), 'r', encoding='utf-8') as f:
+        assert json.load(f) == flights
+
+
+def test_refresh_is_throttled(s3, tmp_path):
+    """Test refresh revalida como mucho una vez por intervalo."""
+    source = S3DataSource(BUCKET, cache_dir=str(tmp_path), revalidate_seconds=3600, client=s3)
+    source.sync()
+    s3.put_object(Bucket=BUCKET, Key='flights.json', Body=b'[]')
+    assert source.refresh() is False
+
+    source.revalidate_seconds = 0
+    assert source.refresh() is True
+
+
+def test_refresh_keeps_cached_copy_when_s3_fails(s3, tmp_path):
+    """Test si S3 falla se sigue usando la copia local completa."""
+    source = S3DataSource(BUCKET, cache_dir=str(tmp_path), revalidate_seconds=0, client=s3)
+    source.sync()
+    s3.delete_object(Bucket=BUCKET, Key='flights.json')
+    assert source.refresh() is False
+
+    empty = S3DataSource(BUCKET, cache_dir=str(tmp_path / 'empty'), revalidate_seconds=0, client=s3)
+    with pytest.raises(Exception):
+        empty.refresh()
@@ -1,6 +1,9 @@
 """
 Tests para el modelo del grafo.
 """
+import itertools
+import math
+import numpy as np
 import pytest
 import sys
 import os
@@ -10,10 +13,10 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 from models.graph import FlightGraph
 
 
-@pytest.fixture
-def sample_graph():
-    """Crea un grafo de ejemplo para tests."""
-    graph = FlightGraph()
+@pytest.fixture(params=["networkx", "csr"])
+def sample_graph(request):
+    """Crea un grafo de ejemplo para tests (con ambos backends)."""
+    graph = FlightGraph(backend=request.param)
     
     # Añadir aeropuertos
     graph.add_airport("MAD", "Madrid", "Madrid", "Spain")
@@ -91,4 +94,793 @@ def test_graph_stats(sample_graph):
     stats = sample_graph.get_graph_stats()
     assert stats["total_airports"] == 5
     assert stats["total_flights"] == 3
-    assert stats["is_connected"] == False  # ISO está aislado
\ No newline at end of file
+    assert stats["is_connected"] == False  # ISO está aislado
+
+
+def test_shortest_path_distance(sample_graph):
+    """Test distancia del camino más corto."""
+    assert sample_graph.shortest_path_distance("MAD", "JFK") == 6700
+    assert sample_graph.shortest_path_distance("MAD", "ISO") is None
+
+
+def test_csr_view_tracks_mutations():
+    """Test la vista CSR se reconstruye tras añadir vuelos."""
+    graph = FlightGraph(backend="csr")
+    graph.add_flight("MAD", "BCN", 500)
+    assert graph.get_connections("MAD") == ["BCN"]
+    graph.add_flight("MAD", "LHR", 1200)
+    assert graph.get_connections("MAD") == ["BCN", "LHR"]
+    assert graph.get_hubs(1) == [{"airport": "MAD", "connections": 2}]
+
+
+def test_unknown_backend():
+    """Test backend no soportado."""
+    with pytest.raises(ValueError):
+        FlightGraph(backend="igraph")
+
+
+@pytest.mark.parametrize("algorithm", ["dijkstra", "bidirectional", "alt"])
+def test_route_single_search(sample_graph, algorithm):
+    """Test una sola búsqueda devuelve camino, distancia y escalas."""
+    route = sample_graph.route("MAD", "JFK", algorithm)
+    assert route["path"] == ["MAD", "LHR", "JFK"]
+    assert route["distance"] == 6700
+    assert route["stops"] == 1
+    assert route["settled"] > 0
+    assert sample_graph.route("MAD", "ISO", algorithm) is None
+    assert sample_graph.route("MAD", "XXX", algorithm) is None
+
+
+def test_routes_from_shares_one_search(sample_graph):
+    """Test varias rutas desde un origen con un único Dijkstra."""
+    routes = sample_graph.routes_from("MAD", ("BCN", "ISO", "JFK", "XXX"))
+    assert routes["JFK"]["path"] == ["MAD", "LHR", "JFK"]
+    assert routes["JFK"]["distance"] == 6700
+    assert routes["BCN"]["stops"] == 0
+    assert routes["ISO"] is None and routes["XXX"] is None
+    assert routes["JFK"]["settled"] == routes["BCN"]["settled"]
+
+
+def test_run_batch_groups_by_origin(sample_graph, monkeypatch):
+    """Test el lote agrupa rutas por origen y conserva el orden de las respuestas."""
+    from models.batch import run_batch
+    calls = []
+    original = sample_graph.routes_from
+    monkeypatch.setattr(sample_graph, "routes_from", lambda o, d: calls.append(o) or original(o, d))
+    results = run_batch(sample_graph, [
+        {"op": "shortest-path", "origin": "mad", "destination": "jfk"},
+        {"op": "connections", "airport": "LHR"},
+        {"op": "shortest-path", "origin": "MAD", "destination": "BCN"},
+        {"op": "shortest-path", "origin": "MAD", "destination": "ISO"},
+        {"op": "shortest-path", "origin": "JFK"},
+        {"op": "unknown"}
+    ])
+    assert calls == ["MAD"]
+    assert [r["status"] for r in results] == [200, 200, 200, 404, 400, 400]
+    assert results[0]["body"]["distance"] == 6700
+    assert results[1]["body"]["total"] == 2
+
+
+def test_route_matches_networkx_on_grid():
+    """Test bidireccional y ALT devuelven las distancias exactas."""
+    import networkx as nx
+    graph = FlightGraph(num_landmarks=3)
+    grid = nx.grid_2d_graph(8, 8)
+    for (a, b) in grid.edges:
+        graph.add_flight(str(a), str(b), 10 + (hash((a, b)) % 7))
+    graph.routes
+    for target in ["(7, 7)", "(0, 7)", "(3, 4)"]:
+        expected = nx.shortest_path_length(graph.graph, "(0, 0)", target, weight="weight")
+        dijkstra = graph.route("(0, 0)", target, "dijkstra")
+        for algorithm in ["bidirectional", "alt"]:
+            route = graph.route("(0, 0)", target, algorithm)
+            assert route["distance"] == expected
+            assert route["settled"] <= dijkstra["settled"] * 2
+
+
+def test_result_cache_hits_and_version(sample_graph):
+    """Test la caché acierta en consultas repetidas y se invalida al mutar."""
+    first = sample_graph.all_paths("MAD", "JFK")
+    assert sample_graph.all_paths("MAD", "JFK", 5) is first
+    assert sample_graph.cache.stats()["hits"] == 1
+    sample_graph.add_flight("BCN", "JFK", 6000)
+    assert len(sample_graph.all_paths("MAD", "JFK")) == 2
+
+
+def test_result_cache_eviction():
+    """Test desalojo LRU por número de entradas y por bytes."""
+    from models.cache import ResultCache
+    cache = ResultCache(max_entries=2, max_bytes=10_000)
+    for key in ["a", "b", "c"]:
+        cache.get_or_compute(key, lambda: [key])
+    assert len(cache) == 2
+    assert cache.stats()["evictions"] == 1
+    cache.get_or_compute("big", lambda: "x" * 9_950)
+    assert cache.stats()["entries"] == 1
+    cache.get_or_compute("huge", lambda: "x" * 20_000)
+    assert cache.bytes <= 10_000
+
+
+def test_result_cache_concurrent_readers():
+    """Test lectores concurrentes comparten la LRU sin corromperla."""
+    from concurrent.futures import ThreadPoolExecutor
+    from models.cache import ResultCache, estimate_size
+    cache = ResultCache(max_entries=8)
+
+    def hammer(seed):
+        for i in range(2000):
+            key = (seed * 7 + i) % 20
+            assert cache.get_or_compute(key, lambda: [key]) == [key]
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(hammer, range(8)))
+    assert len(cache) == 8
+    assert cache.bytes == sum(estimate_size(value) for value in cache._entries.values())
+
+
+def test_iter_paths_snapshot_survives_mutations():
+    """Test un enumerador creado antes de una mutación recorre el grafo que había al crearlo."""
+    graph = FlightGraph()
+    for a, b in [("A", "B"), ("B", "D"), ("A", "C"), ("C", "D")]:
+        graph.add_flight(a, b, 100)
+    weights = graph.csr.weights
+    enumerator = graph.iter_paths("A", "D", 3)
+    graph.update_flight("A", "B", 5)
+    graph.remove_flight("C", "D")
+    graph.add_flight("A", "D", 1)
+    assert sorted(enumerator) == [["A", "B", "D"], ["A", "C", "D"]]
+    assert weights.tolist() == [100] * 8
+
+
+def test_paths_page_resumes_with_cursor():
+    """Test la paginación con cursor recorre los mismos caminos que all_paths."""
+    import networkx as nx
+    graph = FlightGraph()
+    for a, b in nx.complete_graph(6).edges:
+        graph.add_flight(f"A{a}", f"A{b}", 100)
+    expected = graph.all_paths("A0", "A5", 4)
+    collected, cursor = [], None
+    while True:
+        page = graph.paths_page("A0", "A5", 4, 7, cursor)
+        collected.extend(page["paths"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert collected == expected
+    assert sorted(expected) == sorted(nx.all_simple_paths(graph.graph, "A0", "A5", cutoff=4))
+
+
+def test_paths_page_invalid_cursor(sample_graph):
+    """Test un cursor de otra consulta o versión se rechaza."""
+    from models.paths import InvalidCursor
+    cursor = sample_graph.iter_paths("MAD", "JFK").cursor()
+    with pytest.raises(InvalidCursor):
+        sample_graph.paths_page("MAD", "BCN", cursor=cursor)
+    with pytest.raises(InvalidCursor):
+        sample_graph.paths_page("MAD", "JFK", cursor="not-a-cursor")
+
+
+def test_paths_page_budget_truncates_and_resumes():
+    """Test con presupuesto de expansiones la página sale truncada y el cursor no pierde caminos."""
+    import networkx as nx
+    graph = FlightGraph()
+    for a, b in nx.complete_graph(7).edges:
+        graph.add_flight(f"A{a}", f"A{b}", 100)
+    expected = graph.all_paths("A0", "A6", 4)
+    collected, cursor, truncated = [], None, 0
+    while True:
+        page = graph.paths_page("A0", "A6", 4, 1000, cursor, node_budget=25)
+        collected.extend(page["paths"])
+        truncated += page["truncated"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert truncated > 0 and not page["truncated"]
+    assert collected == expected
+
+
+def test_query_planner_downgrades_or_rejects():
+    """Test el planificador rebaja max_length/k hasta caber o rechaza con la política reject."""
+    from models.planner import Budget, QueryPlanner
+    import networkx as nx
+    graph = FlightGraph()
+    for a, b in nx.complete_graph(30).edges:
+        graph.add_flight(f"A{a}", f"A{b}", 100)
+    # 29 + 29 * 28 + 29 * 28 * 28 expansiones estimadas con 3 vuelos
+    planner = QueryPlanner(budget_ms=1)
+    plan = planner.plan_paths(graph.csr, "A0", 3)
+    assert plan.action == "downgrade" and plan.used("max_length", 3) == 2
+    assert plan.as_dict()["downgraded"] == {"max_length": {"requested": 3, "used": 2}}
+    assert planner.plan_paths(graph.csr, "A0", 1).action == "run"
+    assert planner.plan_centrality(graph.csr, 1000, True).used("k", 1000) < 30
+    strict = QueryPlanner(budget_ms=1, policy="reject")
+    plan = strict.plan_paths(graph.csr, "A0", 3)
+    assert plan.rejected and plan.as_dict()["suggested"] == {"max_length": {"requested": 3, "fits": 2}}
+    assert strict.plan_matrix(graph.csr, 1000).rejected
+    assert not strict.plan_longest(0.0005).rejected and strict.plan_longest(None).rejected
+    with pytest.raises(ValueError):
+        QueryPlanner(policy="queue")
+    budget = Budget(expansions=3)
+    assert [budget.spend() for _ in range(5)] == [True, True, True, False, False]
+    assert budget.exhausted == "expansions"
+
+
+def test_query_planner_large_max_length_constant_time():
+    """Test un max_length enorme se recorta a n - 1 vuelos y se planifica sin recorrerlo."""
+    import time
+    from models.planner import QueryPlanner
+    graph = FlightGraph()
+    for a, b in [("A", "B"), ("B", "C"), ("C", "D"), ("B", "D")]:
+        graph.add_flight(a, b, 100)
+    planner = QueryPlanner(budget_ms=1)
+    started = time.perf_counter()
+    plan = planner.plan_paths(graph.csr, "A", 10 ** 12)
+    assert time.perf_counter() - started < 0.05
+    assert plan.estimated == planner.plan_paths(graph.csr, "A", 3).estimated
+    assert plan.action == "run"
+    tight = QueryPlanner(budget_ms=1e-6).plan_paths(graph.csr, "A", 10 ** 12)
+    assert tight.action == "downgrade" and tight.used("max_length", 10 ** 12) == 1
+
+
+def _brute_force_longest(graph, origin, destination, weighted):
+    """Camino más largo por fuerza bruta (referencia para tests)."""
+    import networkx as nx
+    best = None
+    for path in nx.all_simple_paths(graph.graph, origin, destination):
+        value = nx.path_weight(graph.graph, path, "weight") if weighted else len(path)
+        if best is None or value > best:
+            best = value
+    return best
+
+
+@pytest.mark.parametrize("size", [8, 14])
+@pytest.mark.parametrize("weighted", [False, True])
+def test_longest_path_exact(size, weighted):
+    """Test DP exacta (grafo pequeño) y ramificación y poda coinciden con la fuerza bruta."""
+    import networkx as nx
+    graph = FlightGraph()
+    random_graph = nx.gnm_random_graph(size, size * 2, seed=7)
+    for a, b in random_graph.edges:
+        graph.add_flight(f"N{a}", f"N{b}", 100 + (a * 37 + b * 11) % 900)
+    origin, destination = "N0", f"N{size - 1}"
+    result = graph.longest_path_search(origin, destination, weighted=weighted)
+    expected = _brute_force_longest(graph, origin, destination, weighted)
+    assert result["approximate"] is False
+    if weighted:
+        assert result["distance"] == expected
+    else:
+        assert len(result["path"]) == expected
+
+
+def test_longest_path_budget_is_approximate():
+    """Test con el presupuesto agotado se devuelve el mejor camino como aproximado."""
+    import networkx as nx
+    graph = FlightGraph()
+    for a, b in nx.complete_graph(16).edges:
+        graph.add_flight(f"N{a}", f"N{b}", 100)
+    result = graph.longest_path_search("N0", "N1", node_budget=50)
+    assert result["approximate"] is True
+    assert result["path"][0] == "N0" and result["path"][-1] == "N1"
+    assert graph.longest_path_search("N0", "N1", time_budget=None, node_budget=None) is not None
+
+
+def test_time_truncated_paths_page_is_not_cached():
+    """Test una página cortada por el reloj se recalcula; la cortada por expansiones se cachea."""
+    import networkx as nx
+    graph = FlightGraph()
+    for a, b in nx.complete_graph(8).edges:
+        graph.add_flight(f"N{a}", f"N{b}", 100)
+    page = graph.paths_page("N0", "N1", 6, 10000, time_budget=0.0)
+    assert page["truncated"] and page["exhausted"] == "time"
+    assert graph.paths_page("N0", "N1", 6, 10000, time_budget=0.0) is not page
+    page = graph.paths_page("N0", "N1", 6, 10000, node_budget=100)
+    assert page["exhausted"] == "expansions"
+    assert graph.paths_page("N0", "N1", 6, 10000, node_budget=100) is page
+
+
+def test_time_limited_longest_path_is_not_cached(monkeypatch):
+    """Test el camino más largo cortado por el reloj se recalcula en la siguiente llamada."""
+    import itertools
+    import networkx as nx
+    from models import longest
+    # Reloj que avanza un segundo por lectura: se agota en la primera comprobación
+    clock = itertools.count()
+    monkeypatch.setattr(longest.time, "perf_counter", lambda: next(clock))
+    graph = FlightGraph()
+    for a, b in nx.complete_graph(16).edges:
+        graph.add_flight(f"N{a}", f"N{b}", a * 16 + b)
+    result = graph.longest_path_search("N0", "N1", weighted=True, time_budget=0.5)
+    assert result["approximate"] and result["exhausted"] == "time"
+    assert graph.longest_path_search("N0", "N1", weighted=True, time_budget=0.5) is not result
+    result = graph.longest_path_search("N0", "N1", weighted=True, time_budget=None, node_budget=50)
+    assert result["exhausted"] == "expansions"
+    assert graph.longest_path_search("N0", "N1", weighted=True, time_budget=None, node_budget=50) is result
+
+
+def test_longest_path(sample_graph):
+    """Test camino más largo."""
+    assert sample_graph.longest_path("BCN", "JFK") == ["BCN", "MAD", "LHR", "JFK"]
+    assert sample_graph.longest_path("MAD", "ISO") is None
+
+
+def test_degree_index_incremental(sample_graph):
+    """Test el índice de grados se actualiza al añadir vuelos y aeropuertos."""
+    sample_graph.add_flight("ISO", "MAD", 100)
+    sample_graph.add_flight("ISO", "MAD", 120)  # Vuelo repetido: no cambia el grado
+    sample_graph.add_airport("NEW", "New", "New", "Test")
+    assert sample_graph.get_hubs(1) == [{"airport": "MAD", "connections": 3}]
+    assert sample_graph.get_isolated_nodes() == ["NEW"]
+    assert sample_graph.get_nodes_by_degree(1) == ["BCN", "JFK", "ISO"]
+    degrees = dict(sample_graph.graph.degree())
+    for hub in sample_graph.get_hubs(10):
+        assert degrees[hub["airport"]] == hub["connections"]
+
+
+def test_degree_index_matches_load_data():
+    """Test carga masiva e inserción incremental producen el mismo orden."""
+    airports = [{"code": c, "name": c, "city": c, "country": "T"} for c in ["A", "B", "C", "D"]]
+    flights = [
+        {"origin": "A", "destination": "B", "distance": 1},
+        {"origin": "C", "destination": "D", "distance": 1},
+        {"origin": "B", "destination": "C", "distance": 1}
+    ]
+    bulk = FlightGraph()
+    bulk.load_data(airports, flights)
+    incremental = FlightGraph()
+    for airport in airports:
+        incremental.add_airport(airport["code"], airport["name"], airport["city"], airport["country"])
+    for flight in flights:
+        incremental.add_flight(flight["origin"], flight["destination"], flight["distance"])
+    assert bulk.get_hubs(4) == incremental.get_hubs(4)
+    assert bulk.get_hubs(4)[0] == {"airport": "B", "connections": 2}
+
+
+def test_bulk_load_matches_incremental():
+    """Test la carga columnar equivale a add_airport/add_flight (duplicados incluidos)."""
+    airports = [
+        {"code": "MAD", "name": "Madrid", "city": "Madrid", "country": "Spain"},
+        {"code": "BCN", "name": "Barcelona", "city": "Barcelona", "country": "Spain"},
+        {"code": "MAD", "name": "Barajas", "city": "Madrid", "country": "Spain"}
+    ]
+    flights = [
+        {"origin": "MAD", "destination": "BCN", "distance": 500},
+        {"origin": "BCN", "destination": "LHR", "distance": 1100},
+        {"origin": "BCN", "destination": "MAD", "distance": 480},
+        {"origin": "LHR", "destination": "MAD", "distance": 1200}
+    ]
+    bulk = FlightGraph()
+    bulk.load_data(airports, flights)
+    incremental = FlightGraph()
+    for airport in airports:
+        incremental.add_airport(airport["code"], airport["name"], airport["city"], airport["country"])
+    for flight in flights:
+        incremental.add_flight(flight["origin"], flight["destination"], flight["distance"])
+    assert bulk.get_all_airports() == incremental.get_all_airports()
+    assert bulk.get_graph_stats() == incremental.get_graph_stats()
+    for code in ["MAD", "BCN", "LHR"]:
+        assert bulk.get_connections(code) == incremental.get_connections(code)
+    assert bulk.route("MAD", "BCN")["distance"] == 480
+    assert sorted(bulk.graph.edges(data="weight")) == sorted(incremental.graph.edges(data="weight"))
+
+
+def test_load_stream_matches_load_data():
+    """Test la ingesta en streaming produce el mismo grafo que load_data."""
+    from utils.helpers import load_json_file, get_data_path
+    airports_path, flights_path = get_data_path('airports.json'), get_data_path('flights.json')
+    bulk = FlightGraph()
+    bulk.load_data(load_json_file(airports_path), load_json_file(flights_path))
+    streamed = FlightGraph()
+    report = streamed.load_stream(airports_path, flights_path, chunk_size=4)
+    assert report.flights == bulk.number_of_flights() + report.duplicates
+    assert report.rejected == {}
+    assert streamed.get_all_airports() == bulk.get_all_airports()
+    assert streamed.get_graph_stats() == bulk.get_graph_stats()
+    for airport in bulk.get_all_airports():
+        assert streamed.get_connections(airport["code"]) == bulk.get_connections(airport["code"])
+
+
+def test_load_stream_validates_and_keeps_min_distance(tmp_path):
+    """Test la ingesta rechaza registros inválidos y deduplica con la distancia mínima."""
+    import json
+    airports = [
+        {"code": "MAD", "name": "Madrid", "city": "Madrid", "country": "Spain"},
+        {"code": "BCN", "name": "Barcelona", "city": "Barcelona", "country": "Spain"},
+        {"code": "LHR", "name": "London", "city": "London", "country": "UK"},
+        {"code": "", "name": "x", "city": "x", "country": "x"},
+        {"code": "XXX"},
+        {"code": "ZZZ", "name": "z", "city": "z", "country": "z", "lat": 95, "lon": 0}
+    ]
+    flights = [
+        {"origin": "MAD", "destination": "BCN", "distance": 500},
+        {"origin": "MAD", "destination": "LHR", "distance": 1200},
+        {"origin": "BCN", "destination": "MAD", "distance": 480},
+        {"origin": "MAD", "destination": "BCN", "distance": 490},
+        {"origin": "MAD", "destination": "JFK", "distance": 5000},
+        {"origin": "MAD", "destination": "LHR", "distance": "far"},
+        {"origin": "MAD", "destination": "LHR", "distance": -1},
+        ["MAD", "LHR"]
+    ]
+    airports_path, flights_path = tmp_path / "airports.json", tmp_path / "flights.json"
+    airports_path.write_text(json.dumps(airports, indent=2))
+    flights_path.write_text(json.dumps(flights))
+    graph = FlightGraph()
+    report = graph.load_stream(str(airports_path), str(flights_path), chunk_size=2)
+    assert report.airports == 3 and report.flights == 4 and report.duplicates == 2
+    assert report.rejected == {
+        "invalid_code": 1, "missing_attribute": 1, "invalid_coordinates": 1, "unknown_airport": 1,
+        "invalid_distance": 2, "not_an_object": 1
+    }
+    assert report.as_dict()["records"] == 14
+    assert graph.get_connections("MAD") == ["BCN", "LHR"]
+    assert graph.route("MAD", "BCN", "dijkstra")["distance"] == 480
+
+
+def test_iter_json_array_small_chunks(tmp_path):
+    """Test el lector incremental reconstruye elementos partidos entre bloques."""
+    import json
+    from utils.helpers import iter_json_array
+    items = [{"a": 1234567, "b": "ñandú"}, 98765, [1, 2], "x", {}]
+    path = tmp_path / "items.json"
+    path.write_text(json.dumps(items, indent=3), encoding="utf-8")
+    assert list(iter_json_array(str(path), chunk_size=3)) == items
+    path.write_text(" [ ] ")
+    assert list(iter_json_array(str(path), chunk_size=1)) == []
+    path.write_text('{"a": 1}')
+    with pytest.raises(ValueError):
+        list(iter_json_array(str(path)))
+
+
+def test_flight_mutations_repair_derived_structures(sample_graph):
+    """Test alta, cambio y baja de vuelos reparan árboles, componentes y grados."""
+    sample_graph.routes_from("MAD", ("JFK",))
+    assert sample_graph.get_graph_stats()["is_connected"] is False
+    
+    sample_graph.add_flight("ISO", "JFK", 100)
+    assert sample_graph.components.count() == 1
+    assert sample_graph.get_graph_stats()["is_connected"] is True
+    assert sample_graph.routes_from("MAD", ("ISO",))["ISO"]["path"] == ["MAD", "LHR", "JFK", "ISO"]
+    
+    assert sample_graph.update_flight("MAD", "LHR", 5000)
+    assert sample_graph.routes_from("MAD", ("JFK",))["JFK"]["distance"] == 10500
+    assert sample_graph.update_flight("MAD", "LHR", 100)
+    assert sample_graph.route("MAD", "JFK")["distance"] == 5600
+    
+    assert sample_graph.remove_flight("LHR", "JFK")
+    assert not sample_graph.remove_flight("LHR", "JFK")
+    assert not sample_graph.update_flight("LHR", "JFK", 1)
+    assert sample_graph.routes_from("MAD", ("JFK",))["JFK"] is None
+    assert sample_graph.route("MAD", "JFK") is None
+    assert sample_graph.components.count() == 2
+    assert sample_graph.get_nodes_by_degree(1) == ["BCN", "LHR", "JFK", "ISO"]
+    assert sample_graph.trees.repaired > 0
+
+
+def test_mutations_patch_csr_without_rebuild():
+    """Test las mutaciones parchean la vista CSR en lugar de reconstruirla."""
+    from models.csr import CSRGraph
+    graph = FlightGraph(backend="csr")
+    graph.load_data(
+        [{"code": c, "name": c, "city": c, "country": "X"} for c in ["A", "B", "C", "D"]],
+        [{"origin": "A", "destination": "B", "distance": 1}, {"origin": "B", "destination": "C", "distance": 1}]
+    )
+    csr, routes = graph.csr, graph.routes
+    graph.add_airport("E", "E", "E", "X")
+    graph.add_flight("C", "E", 2)
+    graph.update_flight("A", "B", 3)
+    graph.remove_flight("B", "C")
+    graph.add_flight("D", "E", 1)
+    assert graph.csr is csr and graph.routes is routes
+    assert graph._graph is None
+    expected = CSRGraph.from_networkx(graph.graph)
+    assert expected.codes == csr.codes
+    assert (expected.indptr == csr.indptr).all() and (expected.indices == csr.indices).all()
+    assert (expected.weights == csr.weights).all()
+    assert graph.route("C", "D", "alt")["distance"] == 3
+
+
+def test_mutations_wait_for_running_reads():
+    """Test una mutación espera a las lecturas en curso: nada se cachea bajo una versión con otros datos."""
+    import json
+    import threading
+    from utils.locks import ReadWriteLock
+    from utils.rendered import rendered
+    graph = FlightGraph(backend="csr")
+    graph.add_flight("A", "B", 1)
+    reading, release = threading.Event(), threading.Event()
+
+    def build():
+        reading.set()
+        release.wait(5)
+        return {"flights": graph.number_of_flights()}
+
+    reader = threading.Thread(target=rendered, args=(graph, "slow", build))
+    writer = threading.Thread(target=graph.add_flight, args=("B", "C", 1))
+    reader.start()
+    reading.wait(5)
+    writer.start()
+    writer.join(0.2)
+    # La escritura sigue bloqueada mientras dura la lectura
+    assert writer.is_alive() and graph.version == 3
+    release.set()
+    reader.join(5)
+    writer.join(5)
+    assert graph.version == 5 and graph.number_of_flights() == 2
+    # El cuerpo calculado durante la lectura quedó bajo la versión con la que se calculó
+    assert json.loads(graph.cache.get_or_compute(("rendered", "slow", 3), lambda: None).body)["flights"] == 1
+    assert json.loads(rendered(graph, "slow", build).body)["flights"] == 2
+    # Reentrante: lecturas y escrituras anidadas en una escritura; escribir leyendo es un error
+    lock = ReadWriteLock()
+    with lock.write(), lock.write(), lock.read():
+        pass
+    with lock.read(), lock.read():
+        with pytest.raises(RuntimeError):
+            with lock.write():
+                pass
+
+
+def test_k_shortest_paths(sample_graph):
+    """Test k caminos más cortos en orden creciente de distancia."""
+    sample_graph.add_flight("BCN", "JFK", 6500)
+    paths = sample_graph.k_shortest_paths("MAD", "JFK", 5)
+    assert [p["path"] for p in paths] == [["MAD", "LHR", "JFK"], ["MAD", "BCN", "JFK"]]
+    assert [p["distance"] for p in paths] == [6700, 7000]
+    assert paths[0]["stops"] == 1
+    assert sample_graph.k_shortest_paths("MAD", "ISO", 3) == []
+
+
+def test_k_shortest_paths_match_networkx():
+    """Test Yen coincide con nx.shortest_simple_paths (distancias y caminos simples)."""
+    import networkx as nx
+    graph = FlightGraph(backend="csr")
+    grid = nx.grid_2d_graph(6, 6)
+    for (a, b) in grid.edges:
+        graph.add_flight(str(a), str(b), 10 + (hash((a, b)) % 7))
+    # Un aeropuerto con un único vuelo: sus spurs no tienen alternativa
+    graph.add_flight("(5, 5)", "END", 3)
+    for origin, destination in [("(0, 0)", "(5, 5)"), ("(2, 3)", "END"), ("(0, 5)", "(1, 4)")]:
+        expected = list(itertools.islice(
+            nx.shortest_simple_paths(graph.graph, origin, destination, weight="weight"), 25))
+        paths = graph.k_shortest_paths(origin, destination, 25)
+        assert [p["distance"] for p in paths] == [nx.path_weight(graph.graph, p, "weight") for p in expected]
+        for p in paths:
+            assert len(set(p["path"])) == len(p["path"])
+            assert nx.path_weight(graph.graph, p["path"], "weight") == p["distance"]
+        assert len({tuple(p["path"]) for p in paths}) == len(paths)
+
+
+def test_nearby_matches_brute_force():
+    """Test /nearby con la rejilla devuelve lo mismo que recorrer todos los aeropuertos."""
+    import random
+    from models.spatial import unit_vectors, chord_to_km
+    rng = random.Random(7)
+    graph = FlightGraph(backend="csr")
+    graph.load_data([
+        {"code": f"A{i}", "name": "", "city": "", "country": "", "lat": rng.uniform(-90, 90),
+         "lon": rng.uniform(-180, 180)}
+        for i in range(2000)
+    ] + [{"code": "NOCOORDS", "name": "", "city": "", "country": ""}], [])
+    xyz = graph.spatial.xyz
+    for lat, lon, radius in [(40.4, -3.7, 800), (89.9, 0, 1500), (0, 179.9, 300), (-33, 151, 20000), (10, 10, 1)]:
+        found = graph.nearby(lat, lon, radius)
+        center = unit_vectors(np.array([lat]), np.array([lon]))[0]
+        distances = chord_to_km(np.linalg.norm(xyz - center, axis=1))
+        expected = {graph.csr.codes[i] for i in np.flatnonzero(distances <= radius)}
+        assert {airport["code"] for airport in found} == expected
+        assert [a["distance_km"] for a in found] == sorted(a["distance_km"] for a in found)
+    assert len(graph.nearby(0, 0, 20000, limit=5)) == 5
+
+
+def test_great_circle_bound_reduces_settled_nodes():
+    """Test la cota geodésica mantiene las distancias exactas y asienta menos nodos."""
+    import random
+    rng = random.Random(3)
+    points = {f"P{i}": (rng.uniform(-50, 50), rng.uniform(-100, 100)) for i in range(400)}
+    airports = [{"code": code, "name": "", "city": "", "country": "", "lat": lat, "lon": lon}
+                for code, (lat, lon) in points.items()]
+    bare = [{key: value for key, value in airport.items() if key not in ("lat", "lon")} for airport in airports]
+    flights = []
+    for code, (lat, lon) in points.items():
+        for other in rng.sample(list(points), 3):
+            if other != code:
+                flights.append({"origin": code, "destination": other,
+                                "distance": round(math.dist((lat, lon), points[other]) * 111) + 1})
+    located, plain = FlightGraph(num_landmarks=0), FlightGraph(num_landmarks=0)
+    located.load_data(airports, flights)
+    plain.load_data(bare, flights)
+    assert located.spatial.available and not plain.spatial.available
+    settled = [0, 0]
+    for origin, destination in [rng.sample(list(points), 2) for _ in range(20)]:
+        with_bound = located.route(origin, destination, "alt")
+        without = plain.route(origin, destination, "dijkstra")
+        assert with_bound["distance"] == without["distance"]
+        settled[0] += with_bound["settled"]
+        settled[1] += without["settled"]
+    assert settled[0] < settled[1]
+    # Un aeropuerto sin coordenadas desactiva la cota (ya no sería consistente)
+    located.add_flight("P0", "NEW", 10)
+    assert not located.spatial.available
+    assert located.route("NEW", "P5")["distance"] == plain.route("P0", "P5", "dijkstra")["distance"] + 10
+
+
+def test_add_airport_coordinates(sample_graph):
+    """Test coordenadas opcionales en add_airport y en get_all_airports."""
+    sample_graph.add_airport("LPA", "Gran Canaria", "Las Palmas", "Spain", 27.93, -15.39)
+    airports = {airport["code"]: airport for airport in sample_graph.get_all_airports()}
+    assert airports["LPA"]["lat"] == 27.93 and airports["LPA"]["lon"] == -15.39
+    assert "lat" not in airports["MAD"]
+    assert sample_graph.nearby(28.4, -16.3, 200) == [{"code": "LPA", "distance_km": 103.4}]
+    with pytest.raises(ValueError):
+        sample_graph.add_airport("BAD", "", "", "", 91, 0)
+
+
+def _centrality_graph():
+    import networkx as nx
+    grid = nx.grid_2d_graph(5, 5)
+    graph = FlightGraph(backend="csr")
+    for (a, b) in grid.edges:
+        graph.add_flight(str(a), str(b), 10 + (hash((a, b)) % 3))
+    # Otra componente y un aeropuerto aislado
+    graph.add_flight("X", "Y", 5)
+    graph.add_flight("Y", "Z", 5)
+    graph.add_airport("ISO", "Isolated", "Isolated", "Test")
+    return graph
+
+
+@pytest.mark.parametrize("weighted", [False, True])
+def test_centrality_exact_matches_networkx(weighted):
+    """Test con k >= n pivotes betweenness y closeness coinciden con NetworkX."""
+    import networkx as nx
+    graph = _centrality_graph()
+    n = graph.csr.number_of_nodes()
+    weight = "weight" if weighted else None
+    expected = {
+        "betweenness": nx.betweenness_centrality(graph.graph, weight=weight),
+        "closeness": nx.closeness_centrality(graph.graph, distance=weight)
+    }
+    for metric, values in expected.items():
+        result = graph.centrality(metric, k=n, top=n, weighted=weighted)
+        assert result["exact"] and result["error_bound"] == 0
+        assert [r["value"] for r in result["ranking"]] == pytest.approx(sorted(values.values(), reverse=True))
+        for row in result["ranking"]:
+            assert row["value"] == pytest.approx(values[row["airport"]])
+
+
+def test_centrality_approximation_within_bound():
+    """Test con pocos pivotes el error queda dentro de error_bound y el pool da lo mismo que en serie."""
+    import networkx as nx
+    from models.centrality import approximate_centrality
+    graph = _centrality_graph()
+    n = graph.csr.number_of_nodes()
+    exact = nx.betweenness_centrality(graph.graph)
+    result = graph.centrality("betweenness", k=12, top=n, seed=7)
+    assert not result["exact"] and result["pivots"] == 12
+    for row in result["ranking"]:
+        assert abs(row["value"] - exact[row["airport"]]) <= result["error_bound"]
+    sizes = np.ones(n)
+    serial = approximate_centrality(graph.csr, sizes, 20, seed=1, workers=1)
+    parallel = approximate_centrality(graph.csr, sizes, 20, seed=1, workers=2)
+    assert np.allclose(serial["betweenness"], parallel["betweenness"])
+    assert np.allclose(serial["closeness"], parallel["closeness"])
+    with pytest.raises(ValueError):
+        graph.centrality("pagerank")
+
+
+def test_centrality_pool_reuse_and_threads():
+    """Test el pool se reutiliza por versión del grafo y las llamadas concurrentes no se pisan."""
+    from concurrent.futures import ThreadPoolExecutor
+    from models import centrality
+    graph = _centrality_graph()
+    sizes = np.ones(graph.csr.number_of_nodes())
+    n, y = graph.csr.number_of_nodes(), graph.csr.index["Y"]
+    first = centrality.approximate_centrality(graph.csr, sizes, n, workers=2, version=graph.version)
+    pool = centrality._pool[3]
+    centrality.approximate_centrality(graph.csr, sizes, 20, seed=2, workers=2, version=graph.version)
+    assert centrality._pool[3] is pool
+    graph.remove_flight("Y", "Z")
+    changed = centrality.approximate_centrality(graph.csr, sizes, n, workers=2, version=graph.version)
+    # Un pool reutilizado tendría el CSR anterior: Y seguiría entre X y Z
+    assert centrality._pool[3] is not pool
+    assert first["betweenness"][y] > 0 and changed["betweenness"][y] == 0
+    # Llamadas en serie concurrentes sobre dos grafos: cada una calcula sobre su propio CSR
+    other = FlightGraph(backend="csr")
+    other.add_flight("A", "B", 1)
+    other.add_flight("B", "C", 1)
+
+    def betweenness(g):
+        return centrality.approximate_centrality(g.csr, np.ones(g.csr.number_of_nodes()), 3, workers=1)["betweenness"]
+
+    expected = {id(g): betweenness(g) for g in (graph, other)}
+    with ThreadPoolExecutor(4) as executor:
+        graphs = [graph, other] * 20
+        for g, found in zip(graphs, executor.map(betweenness, graphs)):
+            assert np.array_equal(found, expected[id(g)])
+
+
+def test_components_reject_unreachable_queries(sample_graph):
+    """Test las componentes se mantienen al mutar y evitan buscar entre componentes distintas."""
+    from utils.metrics import ROUTE_SEARCHES, UNREACHABLE_QUERIES
+    assert sample_graph.get_components() == {"total_components": 2, "is_connected": False, "sizes": [4, 1]}
+    assert sample_graph.component_size("ISO") == 1 and sample_graph.component_size("XXX") is None
+    assert not sample_graph.reachable("MAD", "ISO") and sample_graph.reachable("BCN", "JFK")
+    
+    searches, rejected = ROUTE_SEARCHES.total(), UNREACHABLE_QUERIES.total()
+    assert sample_graph.route("MAD", "ISO", "dijkstra") is None
+    assert sample_graph.shortest_path("ISO", "JFK") is None
+    assert sample_graph.paths_page("MAD", "ISO") == {"paths": [], "next_cursor": None, "truncated": False, "exhausted": None}
+    assert sample_graph.k_shortest_paths("MAD", "ISO") == []
+    assert ROUTE_SEARCHES.total() == searches
+    assert UNREACHABLE_QUERIES.total() == rejected + 4
+    
+    sample_graph.add_flight("ISO", "NEW", 10)
+    sample_graph.add_flight("BCN", "NEW", 10)
+    assert sample_graph.get_components()["is_connected"] is True
+    assert sample_graph.shortest_path("MAD", "ISO") == ["MAD", "BCN", "NEW", "ISO"]
+    sample_graph.remove_flight("MAD", "LHR")
+    assert sample_graph.get_components()["sizes"] == [4, 2]
+    assert sample_graph.component_size("JFK") == 2
+
+
+def test_reachable_within_matches_bfs():
+    """Test las escalas mínimas por bitsets coinciden con un BFS por origen."""
+    import networkx as nx
+    graph = _centrality_graph()
+    codes = graph.csr.codes
+    origins = tuple(codes[::4]) + ("XXX",)
+    found = graph.reachable_within(origins, 2)
+    assert found["XXX"] is None
+    for origin in origins[:-1]:
+        lengths = nx.single_source_shortest_path_length(graph.graph, origin, cutoff=3)
+        expected = {code: hops - 1 for code, hops in lengths.items() if code != origin}
+        assert {row["airport"]: row["stops"] for row in found[origin]} == expected
+        assert [row["stops"] for row in found[origin]] == sorted(expected.values())
+    matrix = graph.reachability_matrix(2)
+    assert matrix.shape == (len(codes), len(codes)) and (matrix == matrix.T).all()
+    assert (np.diag(matrix) == 0).all()
+    with pytest.raises(ValueError):
+        graph.reachability_matrix(1, ["XXX"])
+
+
+def test_distance_matrix_matches_dijkstra():
+    """Test la matriz de distancias y sus predecesores compactos coinciden con NetworkX."""
+    import base64
+    import networkx as nx
+    graph = _centrality_graph()
+    # Vuelos de distancia 0 (empates): los predecesores no deben formar ciclos
+    graph.add_flight("(0, 0)", "(4, 4)", 0)
+    graph.add_flight("(4, 4)", "X", 0)
+    origins = ("(0, 0)", "(2, 3)", "Z", "ISO", "(2, 3)")
+    destinations = ("(4, 4)", "(1, 2)", "Y", "ISO", "(0, 0)", "(4, 0)")
+    for predecessors in (False, True):
+        result = graph.distance_matrix(origins, destinations, predecessors)
+        for origin, row in zip(origins, result["distances"]):
+            lengths = nx.single_source_dijkstra_path_length(graph.graph, origin)
+            assert row == [lengths.get(destination) for destination in destinations]
+    airports = result["airports"]
+    table = np.frombuffer(base64.b64decode(result["predecessors"]), dtype="<i4").reshape(len(origins), -1)
+    for i, origin in enumerate(origins):
+        for destination, distance in zip(destinations, result["distances"][i]):
+            if distance is None:
+                continue
+            path = [airports.index(destination)]
+            while table[i, path[-1]] >= 0:
+                path.append(table[i, path[-1]])
+            path = [airports[position] for position in reversed(path)]
+            assert path[0] == origin and nx.path_weight(graph.graph, path, "weight") == distance
+    with pytest.raises(ValueError):
+        graph.distance_matrix(("MAD",), ("X",))
+
+
+def test_distance_matrix_scipy_and_numpy_agree():
+    """Test la búsqueda con SciPy y la de respaldo con NumPy dan la misma matriz."""
+    pytest.importorskip("scipy")
+    from models.matrix import distance_matrix, sparse_matrix
+    graph = _centrality_graph()
+    graph.add_flight("(0, 0)", "(4, 4)", 0)
+    csr = graph.csr
+    sources = [csr.index[code] for code in ("(0, 0)", "(2, 3)", "Z", "ISO")]
+    targets = [csr.index[code] for code in ("(4, 4)", "(1, 2)", "Y", "ISO", "(0, 0)")]
+    for predecessors in (False, True):
+        compiled = distance_matrix(csr, sources, targets, sparse_matrix(csr), predecessors)
+        fallback = distance_matrix(csr, sources, targets, None, predecessors)
+        assert np.array_equal(compiled["distances"], fallback["distances"])
+    assert set(compiled) == set(fallback)
@@ -0,0 +1,67 @@
+"""
+Tests para el oráculo de distancias precalculado.
+"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.graph import FlightGraph
+from models.oracle import DistanceOracle
+
+
+@pytest.fixture
+def oracle_graph(tmp_path):
+    """Grafo de ejemplo con su oráculo escrito en disco."""
+    graph = FlightGraph()
+    graph.load_data(
+        [
+            {"code": code, "name": code, "city": code, "country": "Test"}
+            for code in ["MAD", "BCN", "LHR", "JFK", "ISO"]
+        ],
+        [
+            {"origin": "MAD", "destination": "BCN", "distance": 500},
+            {"origin": "MAD", "destination": "LHR", "distance": 1200},
+            {"origin": "LHR", "destination": "JFK", "distance": 5500},
+            {"origin": "BCN", "destination": "JFK", "distance": 6500}
+        ]
+    )
+    path = str(tmp_path / "oracle.bin")
+    DistanceOracle.build(graph.csr, path, "abc")
+    return graph, path
+
+
+def test_oracle_matches_live_search(oracle_graph):
+    """Test las consultas en tabla coinciden con la búsqueda en vivo."""
+    graph, path = oracle_graph
+    oracle = DistanceOracle.load(path, "abc")
+    for origin in graph.csr.codes:
+        for destination in graph.csr.codes:
+            live = graph.route(origin, destination, "dijkstra")
+            cached = oracle.route(origin, destination)
+            if live is None:
+                assert cached is None
+            else:
+                assert cached["distance"] == live["distance"]
+                assert cached["path"][0] == origin and cached["path"][-1] == destination
+                assert len(cached["path"]) - 2 == cached["stops"]
+
+
+def test_oracle_stale_checksum(oracle_graph):
+    """Test un oráculo con otro checksum se descarta."""
+    graph, path = oracle_graph
+    assert DistanceOracle.load(path, "otro") is None
+    assert not graph.load_oracle(path, "otro")
+    assert DistanceOracle.load(path + ".missing") is None
+
+
+def test_oracle_falls_back_after_mutation(oracle_graph):
+    """Test tras modificar el grafo se vuelve a la búsqueda en vivo."""
+    graph, path = oracle_graph
+    assert graph.load_oracle(path, "abc")
+    assert graph.route("MAD", "JFK")["settled"] == 0
+    graph.add_flight("MAD", "JFK", 100)
+    route = graph.route("MAD", "JFK")
+    assert route["distance"] == 100
+    assert route["settled"] > 0
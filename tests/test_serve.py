@@ -0,0 +1,71 @@
+"""
+Tests para el lanzador pre-fork (serve.py).
+"""
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.helpers import get_data_path
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+pytestmark = pytest.mark.skipif(not os.path.exists('/proc/self/task'), reason='requiere fork y /proc (Linux)')
+
+
+def children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children', encoding='utf-8') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def wait_for(condition, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            result = condition()
+            if result:
+                return result
+        except OSError:
+            pass
+        time.sleep(0.05)
+    raise AssertionError('timeout')
+
+
+def test_prefork_workers_share_loaded_graph(tmp_path):
+    """Test el padre carga los datos de DATA_DIR una vez y repone los workers que mueren."""
+    shutil.copy(get_data_path('airports.json'), tmp_path / 'airports.json')
+    with open(get_data_path('flights.json'), encoding='utf-8') as f:
+        flights = json.load(f)
+    # Un vuelo que solo existe en DATA_DIR: prueba que los workers usan esos datos
+    flights.append({'origin': 'LPA', 'destination': 'SIN', 'distance': 1})
+    (tmp_path / 'flights.json').write_text(json.dumps(flights))
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen([sys.executable, 'serve.py', '--workers', '2', '--port', str(port)],
+                              cwd=ROOT, env=dict(os.environ, DATA_DIR=str(tmp_path)),
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        url = f'http://127.0.0.1:{port}/shortest-path?origin=LPA&destination=SIN'
+        body = wait_for(lambda: json.loads(urllib.request.urlopen(url).read()))
+        assert body['path'] == ['LPA', 'SIN']
+        workers = wait_for(lambda: len(children(server.pid)) == 2 and children(server.pid))
+
+        os.kill(workers[0], signal.SIGKILL)
+        replaced = wait_for(lambda: len(children(server.pid)) == 2 and workers[0] not in children(server.pid)
+                            and children(server.pid))
+        assert workers[1] in replaced
+        assert json.loads(urllib.request.urlopen(url).read())['distance'] == 1
+    finally:
+        server.terminate()
+        assert server.wait(timeout=10) == 0
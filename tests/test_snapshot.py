@@ -0,0 +1,60 @@
+"""
+Tests para el snapshot binario del grafo.
+"""
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.graph import FlightGraph
+from models.snapshot import write_snapshot
+from utils.helpers import load_json_file, get_data_path
+
+
+@pytest.fixture
+def graphs(tmp_path):
+    """Grafo cargado desde JSON y el mismo grafo cargado desde su snapshot."""
+    original = FlightGraph()
+    original.load_data(load_json_file(get_data_path('airports.json')), load_json_file(get_data_path('flights.json')))
+    path = str(tmp_path / "graph.snapshot")
+    write_snapshot(original, path, "abc")
+    loaded = FlightGraph()
+    assert loaded.load_snapshot(path, "abc")
+    return original, loaded, path
+
+
+def test_snapshot_roundtrip(graphs):
+    """Test el snapshot responde igual que el grafo original."""
+    original, loaded, _ = graphs
+    assert loaded.get_all_airports() == original.get_all_airports()
+    assert loaded.get_graph_stats() == original.get_graph_stats()
+    assert loaded.get_hubs(5) == original.get_hubs(5)
+    assert loaded.get_connections("MAD") == original.get_connections("MAD")
+    assert loaded.route("MAD", "SIN")["distance"] == original.route("MAD", "SIN")["distance"]
+    assert loaded.routes.landmarks == original.routes.landmarks
+    assert loaded.nearby(48.8, 2.3, 1000) == original.nearby(48.8, 2.3, 1000)
+
+
+def test_snapshot_is_lazy(graphs):
+    """Test NetworkX solo se materializa cuando se necesita."""
+    original, loaded, _ = graphs
+    loaded.get_hubs(3)
+    loaded.route("MAD", "JFK")
+    assert loaded._graph is None
+    # Las mutaciones parchean la vista CSR sin materializar NetworkX
+    loaded.add_flight("MAD", "SIN", 10)
+    assert loaded._graph is None
+    assert loaded.route("MAD", "SIN")["distance"] == 10
+    loaded.get_clusters()
+    assert loaded._graph is not None
+    assert loaded.graph.number_of_edges() == original.graph.number_of_edges() + 1
+
+
+def test_snapshot_stale_checksum(graphs):
+    """Test un snapshot con otro checksum no se carga."""
+    _, _, path = graphs
+    graph = FlightGraph()
+    assert not graph.load_snapshot(path, "otro")
+    assert not graph.load_snapshot(path + ".missing")
+    assert graph.number_of_airports() == 0